@@ -1,8 +1,14 @@
+import os
 import tkinter as tk
 
+from translate_handler import Storage
 from ui import SelectNovelsUI
 from ui import SelectChaptersUI
 from ui import ViewChapterUI
+from ui.chapter_cache import ChapterCache
+from ui.jobs import DONE, ChapterJob, JobManager
+from ui.jobs_panel import JobsPanel
+from ui.prefetch import ChapterPrefetcher
 
 class App:
     def __init__(self, **kwargs):
@@ -24,6 +30,24 @@ class App:
         
         self.current_frame: tk.Frame = None
         
+        # One store shared by every frame
+        self.storage = Storage(kwargs["storage_path"])
+        self.storage.migrate()
+        
+        # Chapters laid out for the reader, loaded in the background
+        self.chapters = ChapterCache(self.storage, max_chapters=kwargs.get("chapter_cache_size", 32))
+        
+        # Every translation runs in the background through one job queue
+        self.jobs = JobManager(self.root,
+                               api_key=kwargs.get("api_key") or os.getenv("GEMINI_API_KEY", ""),
+                               storage_path=kwargs["storage_path"])
+        self.jobs.subscribe(self.on_job_changed)
+        self.jobs_panel = JobsPanel(self.root, self.jobs)
+        self.jobs_panel.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # Translates the next chapters in the background while one is being read
+        self.prefetcher = ChapterPrefetcher(self.jobs, count=kwargs.get("prefetch_chapters", 3))
+        
         if not kwargs.get("novel", None):
             self.show_frame(SelectNovelsUI, **kwargs)
         elif not kwargs.get("chapter", None):
@@ -37,5 +61,15 @@ class App:
         self.current_frame = frame_class(self.root, self, **kwargs)
         self.current_frame.pack(fill="both", expand=True)
 
+    def on_job_changed(self, job: ChapterJob):
+        if job.state != DONE:
+            return
+        self.chapters.invalidate(job.novel, job.idx)
+        
+        # Replace the placeholder if the reader is on the chapter that was just translated
+        frame = self.current_frame
+        if isinstance(frame, ViewChapterUI) and (frame.novel, frame.chapter) == (job.novel, job.idx):
+            frame.reload()
+
     def run(self):
         self.root.mainloop()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import argparse
+import glob
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from translate_handler import Storage
+from translate_handler.sites.syosetu import parse_chapter_page
+
+def parse_html_reference(content: str) -> str | None:
+    '''The original extraction path: full `html.parser` tree, then `str(p)` and two regexes per paragraph.'''
+
+    soup = BeautifulSoup(content, 'html.parser')
+
+    title_container = soup.find('h1', class_='p-novel__title p-novel__title--rensai')
+    title = title_container.get_text(strip=True) if title_container else None
+
+    container = soup.find('div', class_='js-novel-text p-novel__text')
+    paragraphs = container.find_all('p', id=re.compile(r'^L\d+'))
+
+    content = ''
+    for p in paragraphs:
+        html = str(p)
+        html = re.sub(
+            r'<ruby>(.*?)<rp>\(</rp><rt>(.*?)</rt><rp>\)</rp></ruby>',
+            lambda m: '{}【{}】'.format(m.group(1), m.group(2)),
+            html,
+            flags=re.DOTALL
+        )
+        text = re.sub(r'<[^>]+>', '', html)
+        content += text.strip() + '\n'
+
+    content = content.strip()
+
+    return f"{title}\n\n{content}".strip() if (title and content) else None
+
+def time_parser(parse, pages: list[str], repeat: int) -> float:
+    """Return the best total time in seconds to parse every page, over `repeat` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for page in pages:
+            parse(page)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+if __name__ == "__main__":
+    ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+    parser = argparse.ArgumentParser(description="Check the chapter HTML extractor against the original parser and benchmark it.")
+    parser.add_argument("-n", "--novel_name", type=str, default=None,
+                        help="Use the stored raw HTML of this novel as the fixture corpus")
+    parser.add_argument("-d", "--html_dir", type=str, default=None,
+                        help="Directory of saved chapter HTML files to use as the fixture corpus")
+    parser.add_argument("-p", "--storage_path", type=str, default=None,
+                        help="Path to the storage directory where novel data is stored (default: '../chapters')")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Number of timed runs; the best one is reported (default: 3)")
+    args = parser.parse_args()
+
+    storage_path = args.storage_path if args.storage_path else os.path.join(ROOT_DIR, "chapters")
+    pages = []
+    if args.html_dir:
+        for path in sorted(glob.glob(os.path.join(args.html_dir, "*.html"))):
+            with open(path, 'r', encoding='utf-8') as file:
+                pages.append((os.path.basename(path), file.read()))
+    elif args.novel_name:
+        storage = Storage(storage_path)
+        for idx in storage.list_chapters(args.novel_name):
+            page = storage.get_page(args.novel_name, idx)
+            if page:
+                pages.append((f"Chapter {idx}", page['html']))
+    else:
+        parser.error("Either --novel_name or --html_dir is required.")
+
+    if not pages:
+        raise FileNotFoundError("No chapter HTML found.")
+
+    # The fast path must produce exactly what the original parser did
+    mismatches = [name for name, page in pages if parse_chapter_page(page) != parse_html_reference(page)]
+    print(f"Compared {len(pages)} chapters: {len(mismatches)} mismatches")
+    for name in mismatches:
+        print(f"  MISMATCH: {name}")
+
+    html_pages = [page for _, page in pages]
+    reference_time = time_parser(parse_html_reference, html_pages, args.repeat)
+    fast_time = time_parser(parse_chapter_page, html_pages, args.repeat)
+
+    print(f"Reference parser: {reference_time:.3f}s ({1000 * reference_time / len(pages):.2f} ms/chapter)")
+    print(f"Fast parser: {fast_time:.3f}s ({1000 * fast_time / len(pages):.2f} ms/chapter)")
+    print(f"Speedup: {reference_time / fast_time:.2f}x")
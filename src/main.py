@@ -1,10 +1,12 @@
 import argparse
-import csv
 import os
 import asyncio
 from dotenv import load_dotenv
 
-from translate_handler import translate_chapters
+from translate_handler import Storage, translate_chapters
+from translate_handler.bulk import translate_bulk
+from translate_handler.context_cache import ContextCache
+from translate_handler.sites import get_site
 
 if __name__ == "__main__":
     ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -22,11 +24,61 @@ if __name__ == "__main__":
     parser.add_argument("-n","--novel_name", type=str, required=True,
                         help="The name of the novel (used for directory structure)")
     parser.add_argument("-l", "--novel_link", type=str, default=None,
-                        help="The link to the novel on ncode.syosetu.com. If not provided, the script will look for the novel with the given name in the storage catalog.")
+                        help="The link to the novel on a supported site (syosetu, novel18, Kakuyomu). If not provided, the script will look for the novel with the given name in the storage catalog.")
     parser.add_argument("-c", "--chapters", type=int, nargs='+', default=[1], 
                         help="List of chapter indices to translate (default: [1])")
-    parser.add_argument("-t", "--cooldown_time", type=int, default=5,
-                        help="Time in seconds to wait between requests (default: 5)")
+    parser.add_argument("-a", "--all_chapters", action="store_true",
+                        help="Translate every chapter listed in the novel's table of contents")
+    parser.add_argument("--retry_failed", action="store_true",
+                        help="Translate the novel's chapters on the dead-letter list (chapters that failed in earlier runs)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Retrain the novel's compression dictionaries, recompress its stored pages and parsed text, and exit")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Translate through the Gemini Batch API: half the cost and no per-minute quota, but results can take up to a day")
+    parser.add_argument("--bulk_chapters_per_job", type=int, default=200,
+                        help="Maximum number of chapters submitted in one batch job with --bulk (default: 200)")
+    parser.add_argument("--bulk_poll_interval", type=float, default=60,
+                        help="Seconds between checks of unfinished batch jobs with --bulk (default: 60)")
+    parser.add_argument("--toc_max_age", type=float, default=3600,
+                        help="Seconds the stored table of contents is used before re-crawling it (default: 3600)")
+    parser.add_argument("--no_toc", action="store_true",
+                        help="Do not use the table of contents to skip missing chapters and detect revised ones")
+    parser.add_argument("-b", "--batch_tokens", type=int, default=0,
+                        help="Translate short chapters together in one request, up to this many estimated input tokens (default: 0, disabled)")
+    parser.add_argument("--chunk_chars", type=int, default=6000,
+                        help="Split chapters longer than this many characters into chunks translated concurrently (default: 6000, 0 disables)")
+    parser.add_argument("--chunk_overlap", type=int, default=2,
+                        help="Number of preceding paragraphs sent as context with each chunk (default: 2)")
+    parser.add_argument("-r", "--refresh", action="store_true",
+                        help="Re-check chapters that are already translated and retranslate those whose source changed")
+    parser.add_argument("--translation_cache_mb", type=int, default=512,
+                        help="Size limit of the translation cache in megabytes, 0 disables it (default: 512)")
+    parser.add_argument("--http_timeout", type=float, default=30,
+                        help="Timeout in seconds for each scrape request (default: 30)")
+    parser.add_argument("--cache_max_age", type=float, default=None,
+                        help="Seconds saved chapter HTML is reused without revalidating it (default: server's Cache-Control)")
+    parser.add_argument("--syosetu_rpm", type=float, default=12,
+                        help="Maximum requests per minute to each novel site, e.g. ncode.syosetu.com (default: 12)")
+    parser.add_argument("--gemini_rpm", type=float, default=10,
+                        help="Maximum Gemini requests per minute, per API key and model (default: 10)")
+    parser.add_argument("--gemini_tpm", type=float, default=250_000,
+                        help="Maximum Gemini input tokens per minute, per API key and model (default: 250000)")
+    parser.add_argument("--gemini_retries", type=int, default=4,
+                        help="Number of times a failed Gemini request is retried with exponential backoff (default: 4)")
+    parser.add_argument("--gemini_models", type=str, nargs='+', default=None,
+                        help="Gemini models to translate with, in order of preference; later models are used while every key is out of quota for the earlier ones (default: gemini-2.5-flash)")
+    parser.add_argument("--short_chapter_model", type=str, default=None,
+                        help="Cheaper, faster Gemini model for short chapters (default: none)")
+    parser.add_argument("--short_chapter_chars", type=int, default=2000,
+                        help="Chapters of at most this many characters are translated with --short_chapter_model (default: 2000)")
+    parser.add_argument("--context_cache_ttl", type=float, default=3600,
+                        help="Lifetime in seconds of the Gemini context cache holding each novel's instruction and glossary, 0 disables it (default: 3600)")
+    parser.add_argument("--glossary_terms", type=int, default=200,
+                        help="Maximum number of ruby-annotated names and terms added to each novel's glossary, 0 disables them (default: 200)")
+    parser.add_argument("-s", "--scrape_workers", type=int, default=2,
+                        help="Number of chapters scraped concurrently (default: 2)")
+    parser.add_argument("-w", "--translate_workers", type=int, default=2,
+                        help="Number of chapters translated concurrently (default: 2)")
     parser.add_argument("-p", "--storage_path", type=str, default=None,
                         help="Path to the storage directory where novel data is stored (default: '../chapters')")
     parser.add_argument("-v", "--verbosity", type=int, default=1,
@@ -35,38 +87,109 @@ if __name__ == "__main__":
     
     novel_name = args.novel_name
     novel_link = args.novel_link
-    chapters = args.chapters
-    cooldown_time = args.cooldown_time
+    chapters = None if args.all_chapters else args.chapters
+    toc_max_age = None if args.no_toc else args.toc_max_age
+    batch_tokens = args.batch_tokens
+    chunk_chars = args.chunk_chars
+    chunk_overlap = args.chunk_overlap
+    refresh = args.refresh
+    translation_cache_mb = args.translation_cache_mb
+    http_timeout = args.http_timeout
+    cache_max_age = args.cache_max_age
+    syosetu_rpm = args.syosetu_rpm
+    gemini_rpm = args.gemini_rpm
+    gemini_tpm = args.gemini_tpm
+    gemini_retries = args.gemini_retries
     storage_path = args.storage_path if args.storage_path else os.path.join(ROOT_DIR, "chapters")
     verbosity = args.verbosity
+    scrape_workers = args.scrape_workers
+    translate_workers = args.translate_workers
+    
+    # Import a storage directory of an earlier version before anything reads it
+    Storage(storage_path).migrate(verbosity)
     
     if not novel_link: # Assume existing novel in storage
-        novel_catalog_path = os.path.join(storage_path, "novels.csv")
-        
-        # Check if the novel catalog exists
-        if not os.path.exists(novel_catalog_path):
-            raise FileNotFoundError(f"Novel catalog file not found at {novel_catalog_path}.")
-        
-        # Read the novel catalog to find the link
-        with open(novel_catalog_path, mode='r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row['Name'] == novel_name:
-                    novel_link = row['Link']
-                    break
-            else:
-                raise ValueError(f"Novel '{novel_name}' not found in catalog.")
+        novel_link = Storage(storage_path).get_novel_link(novel_name)
+        if novel_link is None:
+            raise ValueError(f"Novel '{novel_name}' not found in catalog.")
                     
     # Validate novel link
-    elif not novel_link.startswith('https://ncode.syosetu.com/'):
-        raise ValueError("Novel link must start with 'https://ncode.syosetu.com/'")
+    else:
+        get_site(novel_link) # Raises if the site is not supported
+    
+    if args.compact:
+        Storage(storage_path).compact(novel_name, verbosity=verbosity)
+        exit(0)
     
+    if args.retry_failed:
+        chapters = [letter['idx'] for letter in Storage(storage_path).list_dead_letters(novel_name)]
+        if not chapters:
+            print(f"No failed chapters to retry for '{novel_name}'.")
+            exit(0)
+        
     # Ensure chapter indices are positive integers
-    if not all(isinstance(idx, int) and idx > 0 for idx in chapters):
+    if args.all_chapters and args.no_toc:
+        raise ValueError("--all_chapters requires the table of contents.")
+    if args.all_chapters and args.retry_failed:
+        raise ValueError("--all_chapters and --retry_failed cannot be combined.")
+    if gemini_retries < 0:
+        raise ValueError("--gemini_retries cannot be negative.")
+    if chapters is not None and not all(isinstance(idx, int) and idx > 0 for idx in chapters):
         raise ValueError("Chapter indices must be positive integers.")
 
+    # Ensure worker counts are positive integers
+    if scrape_workers < 1 or translate_workers < 1:
+        raise ValueError("Worker counts must be positive integers.")
+
+    # Ensure rate limits are positive
+    if min(syosetu_rpm, gemini_rpm, gemini_tpm) <= 0:
+        raise ValueError("Rate limits must be positive numbers.")
+    if 0 < args.context_cache_ttl <= ContextCache.EXPIRY_MARGIN:
+        raise ValueError(f"--context_cache_ttl must be 0 (disabled) or longer than {ContextCache.EXPIRY_MARGIN:.0f} seconds.")
+
+    if args.bulk:
+        # Submitted jobs are recorded in the library; an interrupted run collects their results when run again
+        try:
+            asyncio.run(translate_bulk(api_key, novel_link, novel_name,
+                                       chapter_idxs=chapters,
+                                       storage_path=storage_path,
+                                       model=args.gemini_models[0] if args.gemini_models else None,
+                                       chapters_per_job=args.bulk_chapters_per_job,
+                                       poll_interval=args.bulk_poll_interval,
+                                       refresh=refresh,
+                                       toc_max_age=toc_max_age,
+                                       glossary_terms=args.glossary_terms,
+                                       translation_cache_mb=translation_cache_mb,
+                                       http_timeout=http_timeout,
+                                       cache_max_age=cache_max_age,
+                                       syosetu_rpm=syosetu_rpm,
+                                       scrape_workers=scrape_workers,
+                                       verbosity=verbosity))
+        except KeyboardInterrupt:
+            print("Stopped waiting for batch jobs. Run again with --bulk to collect their results.")
+        exit(0)
+
     # Translate chapters asynchronously
     asyncio.run(translate_chapters(api_key, novel_link, novel_name, 
                                    chapter_idxs=chapters,
-                                   cooldown_time=cooldown_time,
+                                   storage_path=storage_path,
+                                   batch_tokens=batch_tokens,
+                                   chunk_chars=chunk_chars,
+                                   chunk_overlap=chunk_overlap,
+                                   refresh=refresh,
+                                   toc_max_age=toc_max_age,
+                                   translation_cache_mb=translation_cache_mb,
+                                   http_timeout=http_timeout,
+                                   cache_max_age=cache_max_age,
+                                   syosetu_rpm=syosetu_rpm,
+                                   gemini_rpm=gemini_rpm,
+                                   gemini_tpm=gemini_tpm,
+                                   gemini_retries=gemini_retries,
+                                   gemini_models=args.gemini_models,
+                                   short_chapter_model=args.short_chapter_model,
+                                   short_chapter_chars=args.short_chapter_chars,
+                                   context_cache_ttl=args.context_cache_ttl,
+                                   glossary_terms=args.glossary_terms,
+                                   scrape_workers=scrape_workers,
+                                   translate_workers=translate_workers,
                                    verbosity=verbosity))
\ No newline at end of file
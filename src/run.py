@@ -13,6 +13,7 @@ if __name__ == "__main__":
     argparser = argparse.ArgumentParser(description="Run the novel translation application.")
     argparser.add_argument("-n", "--novel", type=str, default=None, help="Name of the novel to read.")
     argparser.add_argument("-c", "--chapter", type=int, default=None, help="Chapter number to read.")
+    argparser.add_argument("-p", "--prefetch", type=int, default=3, help="Number of upcoming chapters to translate in the background while reading, 0 disables it.")
     args = argparser.parse_args()
     
     configs = {}
@@ -20,6 +21,7 @@ if __name__ == "__main__":
     configs["storage_path"] = os.path.join(parent_dir, "chapters")
     configs["maximized"] = True
     configs["fullscreen"] = False
+    configs["prefetch_chapters"] = args.prefetch
     if args.novel: configs["novel"] = args.novel
     if args.chapter: configs["chapter"] = args.chapter
     
@@ -0,0 +1,112 @@
+import argparse
+import os
+import asyncio
+from dotenv import load_dotenv
+
+from translate_handler import Storage
+from translate_handler.context_cache import ContextCache
+from translate_handler.sync import sync_novels
+
+if __name__ == "__main__":
+    ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+    # Load environment variables
+    load_dotenv(os.path.join(ROOT_DIR, ".env"))
+    api_key = os.getenv("GEMINI_API_KEY", None)
+
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set.")
+
+    # Argument parser setup
+    parser = argparse.ArgumentParser(description="Keep every novel in the catalog translated up to its latest chapter.")
+    parser.add_argument("-n", "--novel_names", type=str, nargs='+', default=None,
+                        help="Only sync these novels from the catalog (default: every novel)")
+    parser.add_argument("-i", "--interval", type=float, default=None,
+                        help="Keep running, starting a new sync cycle this many seconds after the previous one finished (default: run once)")
+    parser.add_argument("-m", "--max_chapters_per_novel", type=int, default=None,
+                        help="Maximum number of chapters of each novel translated in one cycle (default: no limit)")
+    parser.add_argument("--toc_max_age", type=float, default=0,
+                        help="Seconds a stored table of contents is used before re-crawling it (default: 0, always re-crawl)")
+    parser.add_argument("-b", "--batch_tokens", type=int, default=0,
+                        help="Translate short chapters together in one request, up to this many estimated input tokens (default: 0, disabled)")
+    parser.add_argument("--chunk_chars", type=int, default=6000,
+                        help="Split chapters longer than this many characters into chunks translated concurrently (default: 6000, 0 disables)")
+    parser.add_argument("--chunk_overlap", type=int, default=2,
+                        help="Number of preceding paragraphs sent as context with each chunk (default: 2)")
+    parser.add_argument("--translation_cache_mb", type=int, default=512,
+                        help="Size limit of the translation cache in megabytes, 0 disables it (default: 512)")
+    parser.add_argument("--http_timeout", type=float, default=30,
+                        help="Timeout in seconds for each scrape request (default: 30)")
+    parser.add_argument("--cache_max_age", type=float, default=None,
+                        help="Seconds saved chapter HTML is reused without revalidating it (default: server's Cache-Control)")
+    parser.add_argument("--syosetu_rpm", type=float, default=12,
+                        help="Maximum requests per minute to each novel site, e.g. ncode.syosetu.com (default: 12)")
+    parser.add_argument("--gemini_rpm", type=float, default=10,
+                        help="Maximum Gemini requests per minute, per API key and model (default: 10)")
+    parser.add_argument("--gemini_tpm", type=float, default=250_000,
+                        help="Maximum Gemini input tokens per minute, per API key and model (default: 250000)")
+    parser.add_argument("--gemini_retries", type=int, default=4,
+                        help="Number of times a failed Gemini request is retried with exponential backoff (default: 4)")
+    parser.add_argument("--gemini_models", type=str, nargs='+', default=None,
+                        help="Gemini models to translate with, in order of preference; later models are used while every key is out of quota for the earlier ones (default: gemini-2.5-flash)")
+    parser.add_argument("--short_chapter_model", type=str, default=None,
+                        help="Cheaper, faster Gemini model for short chapters (default: none)")
+    parser.add_argument("--short_chapter_chars", type=int, default=2000,
+                        help="Chapters of at most this many characters are translated with --short_chapter_model (default: 2000)")
+    parser.add_argument("--context_cache_ttl", type=float, default=3600,
+                        help="Lifetime in seconds of the Gemini context cache holding each novel's instruction and glossary, 0 disables it (default: 3600)")
+    parser.add_argument("--glossary_terms", type=int, default=200,
+                        help="Maximum number of ruby-annotated names and terms added to each novel's glossary, 0 disables them (default: 200)")
+    parser.add_argument("-s", "--scrape_workers", type=int, default=2,
+                        help="Number of chapters scraped concurrently across all novels (default: 2)")
+    parser.add_argument("-w", "--translate_workers", type=int, default=2,
+                        help="Number of chapters translated concurrently across all novels (default: 2)")
+    parser.add_argument("-p", "--storage_path", type=str, default=None,
+                        help="Path to the storage directory where novel data is stored (default: '../chapters')")
+    parser.add_argument("-v", "--verbosity", type=int, default=1,
+                        help="Verbosity level (0: silent, 1: basic info, 2: detailed info)")
+    args = parser.parse_args()
+
+    storage_path = args.storage_path if args.storage_path else os.path.join(ROOT_DIR, "chapters")
+
+    # Ensure limits are positive
+    if args.max_chapters_per_novel is not None and args.max_chapters_per_novel < 1:
+        raise ValueError("--max_chapters_per_novel must be a positive integer.")
+    if args.scrape_workers < 1 or args.translate_workers < 1:
+        raise ValueError("Worker counts must be positive integers.")
+    if min(args.syosetu_rpm, args.gemini_rpm, args.gemini_tpm) <= 0:
+        raise ValueError("Rate limits must be positive numbers.")
+    if 0 < args.context_cache_ttl <= ContextCache.EXPIRY_MARGIN:
+        raise ValueError(f"--context_cache_ttl must be 0 (disabled) or longer than {ContextCache.EXPIRY_MARGIN:.0f} seconds.")
+
+    # Import a storage directory of an earlier version before anything reads it
+    Storage(storage_path).migrate(args.verbosity)
+
+    # Progress is saved as chapters finish, so an interrupted sync resumes where it stopped
+    try:
+        asyncio.run(sync_novels(api_key,
+                                storage_path=storage_path,
+                                interval=args.interval,
+                                novel_names=args.novel_names,
+                                max_chapters_per_novel=args.max_chapters_per_novel,
+                                toc_max_age=args.toc_max_age,
+                                batch_tokens=args.batch_tokens,
+                                chunk_chars=args.chunk_chars,
+                                chunk_overlap=args.chunk_overlap,
+                                translation_cache_mb=args.translation_cache_mb,
+                                http_timeout=args.http_timeout,
+                                cache_max_age=args.cache_max_age,
+                                syosetu_rpm=args.syosetu_rpm,
+                                gemini_rpm=args.gemini_rpm,
+                                gemini_tpm=args.gemini_tpm,
+                                gemini_retries=args.gemini_retries,
+                                gemini_models=args.gemini_models,
+                                short_chapter_model=args.short_chapter_model,
+                                short_chapter_chars=args.short_chapter_chars,
+                                context_cache_ttl=args.context_cache_ttl,
+                                glossary_terms=args.glossary_terms,
+                                scrape_workers=args.scrape_workers,
+                                translate_workers=args.translate_workers,
+                                verbosity=args.verbosity))
+    except KeyboardInterrupt:
+        print("Sync interrupted. Run again to resume.")
@@ -1,3 +1,4 @@
+from .storage import Storage
 from .translator import translate_chapters
 
-__all__ = ["translate_chapters"]
\ No newline at end of file
+__all__ = ["Storage", "translate_chapters"]
\ No newline at end of file
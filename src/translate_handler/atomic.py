@@ -0,0 +1,31 @@
+import json
+import os
+import tempfile
+
+def write_text(path: str, text: str) -> None:
+    """
+    Write a text file atomically: the text goes to a temporary file in the same
+    directory, which is flushed to disk and then renamed over `path`. A crash
+    leaves either the previous file or the complete new one, never a truncated file.
+
+    Args:
+        path (str): Path of the file to write.
+        text (str): The text to write.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_json(path: str, data) -> None:
+    """Write a JSON file atomically (see `write_text`)."""
+    write_text(path, json.dumps(data, ensure_ascii=False))
@@ -0,0 +1,182 @@
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+from google.genai import errors
+
+from .retry import RetryPolicy
+
+# Normalized job states. Gemini reports them as "BATCH_STATE_<STATE>" / "JOB_STATE_<STATE>"
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED, EXPIRED}
+
+@dataclass
+class BatchStatus:
+    """
+    The state of a submitted batch job.
+
+    `results` is only set once the job succeeded: one `(key, result)` pair per
+    request, where `key` is the key the request was submitted under (None if the
+    backend did not echo it; results are then in submission order) and `result` is
+    either a `GenerateContentResponse` JSON or `{"error": {...}}`.
+    """
+    state: str
+    results: list[tuple[str | None, dict]] | None = None
+    error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+class BatchBackend(ABC):
+    """Submits `GenerateContentRequest`s as an asynchronous batch job and polls for the results."""
+
+    @abstractmethod
+    def submit(self, model: str, requests: dict[str, dict], display_name: str = "") -> str:
+        """
+        Submit a batch job.
+
+        Args:
+            model (str): The model to run the requests on.
+            requests (dict[str, dict]): Request JSON by key; the key identifies the result.
+            display_name (str): Human-readable name of the job.
+
+        Returns:
+            str: The job name, used to poll it.
+        """
+
+    @abstractmethod
+    def poll(self, name: str) -> BatchStatus:
+        """
+        Get the state of a batch job, and its results once it succeeded.
+
+        Args:
+            name (str): The job name returned by `submit`.
+
+        Returns:
+            BatchStatus: The job's state.
+        """
+
+def _normalize_state(state: str | None) -> str:
+    state = (state or "").upper().removeprefix("BATCH_STATE_").removeprefix("JOB_STATE_").lower()
+    if state == "partially_succeeded":
+        return SUCCEEDED
+    return state if state in FINISHED_STATES | {PENDING, RUNNING} else PENDING
+
+class GeminiBatchBackend(BatchBackend):
+    """
+    The Gemini Developer API's Batch Mode, with the requests inlined in the job.
+    Batch jobs are billed at half the price of regular requests, do not count
+    against the per-minute quota, and complete within 24 hours.
+
+    The installed google-genai SDK only supports batch jobs on Vertex AI (Cloud
+    Storage / BigQuery sources), so the REST endpoints are called directly.
+    """
+
+    BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+    def __init__(self, api_key: str, retry_policy: RetryPolicy | None = None, timeout: float = 120.0):
+        """
+        Args:
+            api_key (str): API key for Google Gemini.
+            retry_policy (RetryPolicy): How failed submissions and polls are retried (default: `RetryPolicy()`).
+            timeout (float): Timeout in seconds for each HTTP request (default: 120).
+        """
+        self.client = httpx.Client(base_url=self.BASE_URL, headers={"x-goog-api-key": api_key}, timeout=timeout)
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        def request() -> dict:
+            response = self.client.request(method, path, **kwargs)
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"error": {"message": response.text}}
+            if response.is_error:
+                raise errors.APIError(response.status_code, body, response)
+            return body
+        return self.retry_policy.call(request)
+
+    def submit(self, model: str, requests: dict[str, dict], display_name: str = "") -> str:
+        body = {"batch": {
+            "display_name": display_name,
+            "input_config": {"requests": {"requests": [
+                {"request": request, "metadata": {"key": key}} for key, request in requests.items()
+            ]}},
+        }}
+        operation = self._request("POST", f"/models/{model}:batchGenerateContent", json=body)
+        return operation["name"]
+
+    def poll(self, name: str) -> BatchStatus:
+        operation = self._request("GET", f"/{name}")
+        state = _normalize_state((operation.get("metadata") or {}).get("state"))
+        if "error" in operation:
+            return BatchStatus(FAILED, error=operation["error"].get("message"))
+        if state != SUCCEEDED:
+            return BatchStatus(state)
+
+        output = (operation.get("response") or {}).get("inlinedResponses") or {}
+        results = []
+        for item in output.get("inlinedResponses", []):
+            key = (item.get("metadata") or {}).get("key")
+            results.append((key, {"error": item["error"]} if "error" in item else item.get("response", {})))
+        return BatchStatus(SUCCEEDED, results=results)
+
+class FakeBatchBackend(BatchBackend):
+    """
+    In-memory stand-in for the Batch API, to run the submit -> poll -> ingest cycle
+    offline. Jobs succeed after `polls` polls, answering every request with
+    `translate(prompt)`; requests whose key is in `fail_keys` get an error result.
+    """
+
+    def __init__(self,
+                 translate: Callable[[str], str] | None = None,
+                 polls: int = 1,
+                 fail_keys: set[str] = set()):
+        """
+        Args:
+            translate (Callable): Produces the response text for a prompt (default: echo the prompt).
+            polls (int): Number of polls a job stays running before it succeeds (default: 1).
+            fail_keys (set[str]): Keys of requests that fail (default: none).
+        """
+        self.translate = translate or (lambda prompt: prompt)
+        self.polls = polls
+        self.fail_keys = fail_keys
+        self.jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, model: str, requests: dict[str, dict], display_name: str = "") -> str:
+        with self._lock:
+            name = f"batches/fake-{uuid.uuid4().hex[:12]}"
+            self.jobs[name] = {"model": model, "requests": dict(requests), "polls": 0}
+        return name
+
+    def poll(self, name: str) -> BatchStatus:
+        with self._lock:
+            job = self.jobs.get(name)
+            if job is None:
+                return BatchStatus(EXPIRED, error=f"Unknown batch job {name}.")
+            job["polls"] += 1
+            if job["polls"] <= self.polls:
+                return BatchStatus(RUNNING)
+
+        results = []
+        for key, request in job["requests"].items():
+            if key in self.fail_keys:
+                results.append((key, {"error": {"code": 500, "message": "Fake failure."}}))
+                continue
+            prompt = ''.join(part["text"] for part in request["contents"][-1]["parts"])
+            results.append((key, {"candidates": [{
+                "content": {"role": "model", "parts": [{"text": self.translate(prompt)}]},
+                "finishReason": "STOP",
+            }]}))
+        return BatchStatus(SUCCEEDED, results=results)
@@ -0,0 +1,242 @@
+import asyncio
+import os
+from urllib.parse import urlparse
+
+from . import rate_limiter, sites
+from .batch_api import FAILED as JOB_FAILED, SUCCEEDED, BatchBackend, BatchStatus, GeminiBatchBackend
+from .client_pool import split_api_keys
+from .gemini_client import GeminiClient
+from .glossary import build_glossary
+from .retry import GeminiError, is_retryable
+from .scraper import ScraperSession
+from .storage import FAILED, Storage
+from .translation_cache import TranslationCache
+from .pipeline import REQUEST_HEADERS, open_translation_cache, plan_jobs, scrape_job, write_translation
+
+async def translate_bulk(api_key: str,
+                         novel_link: str,
+                         novel_name: str,
+                         chapter_idxs: list[int] | None = None,
+                         storage_path: str = "chapters",
+                         backend: BatchBackend | None = None,
+                         model: str | None = None,
+                         chapters_per_job: int = 200,
+                         poll_interval: float = 60,
+                         syosetu_rpm: float = 12,
+                         scrape_workers: int = 2,
+                         http_timeout: float = 30.0,
+                         cache_max_age: float | None = None,
+                         refresh: bool = False,
+                         translation_cache_mb: int = 512,
+                         toc_max_age: float | None = 3600,
+                         glossary_terms: int = 200,
+                         verbosity: int = 1) -> dict[int, bool | None]:
+    """Translate chapters of a novel offline through the Gemini Batch API.
+
+    Meant for backfilling whole novels, where latency does not matter: batch jobs
+    cost half as much as regular requests and do not count against the per-minute
+    quota, but take up to a day to complete. Chapters are scraped and parsed as in
+    `translate_chapters`, chapters found in the translation cache are served from
+    it, and the rest are submitted as batch jobs of at most `chapters_per_job`
+    chapters. The jobs are then polled until they finish, and their results are
+    written to the library like any other translation. Chapters that fail are
+    added to the dead-letter list.
+
+    Submitted jobs are recorded in the library, so if the run is interrupted while
+    waiting, running it again collects their results instead of resubmitting them.
+
+    :param str api_key: API key for Google Gemini (the first one is used if several are given).
+    :param str novel_link: The link to the novel on a supported site (see `sites.supported_sites`).
+    :param str novel_name: The name of the novel in the library.
+    :param list[int] chapter_idxs: List of chapter indices to translate, or None for every chapter in the table of contents (default: None).
+    :param str storage_path: Path to the storage directory (default: "chapters").
+    :param BatchBackend backend: Where batch jobs are submitted, e.g. a `FakeBatchBackend` in tests (default: the Gemini Batch API).
+    :param str model: The model to translate with (default: gemini-2.5-flash).
+    :param int chapters_per_job: Maximum number of chapters submitted in one batch job (default: 200).
+    :param float poll_interval: Seconds between polls of unfinished jobs (default: 60).
+    :param float syosetu_rpm: Maximum requests per minute to the novel's host (default: 12).
+    :param int scrape_workers: Number of chapters scraped concurrently (default: 2).
+    :param float http_timeout: Timeout in seconds for each scrape request (default: 30).
+    :param float cache_max_age: Seconds saved chapter HTML is reused without revalidating it (default: server's Cache-Control).
+    :param bool refresh: Re-check chapters that already have a translation (default: False).
+    :param int translation_cache_mb: Size limit of the translation cache in megabytes, 0 disables it (default: 512).
+    :param float toc_max_age: Seconds the stored table of contents is used before re-crawling it, or None to not use it (default: 3600).
+    :param int glossary_terms: Maximum number of ruby-annotated terms added to the novel's glossary, 0 disables them (default: 200).
+    :param int verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :raises ValueError: If the novel's site is not supported.
+    :return: Mapping of chapter index to status (True: translated, False: failed, None: already translated).
+    """
+
+    novel_link = sites.get_site(novel_link).normalize_link(novel_link)
+    if chapters_per_job < 1 or scrape_workers < 1:
+        raise ValueError("Job size and worker count must be positive integers.")
+
+    rate_limiter.configure_limit(urlparse(novel_link).hostname, syosetu_rpm, burst=1)
+
+    backend = backend or GeminiBatchBackend(split_api_keys(api_key)[0])
+    model = model or GeminiClient.MODEL
+    storage = Storage(storage_path)
+    cache = open_translation_cache(storage_path, translation_cache_mb)
+
+    if storage.get_novel_link(novel_name) is None:
+        storage.add_novel(novel_name, novel_link)
+    os.makedirs(f"{storage_path}/{novel_name}", exist_ok=True)
+
+    # Chapters of jobs submitted by an earlier run are not submitted again
+    unfinished = storage.list_batch_jobs(novel_name)
+    in_flight = {chapter['idx'] for job in unfinished for chapter in job['chapters']}
+    if unfinished and verbosity >= 1:
+        print(f"Resuming {len(unfinished)} batch job(s) submitted earlier ({len(in_flight)} chapters).")
+
+    statuses: dict[int, bool | None] = {}
+    async with ScraperSession(headers=REQUEST_HEADERS,
+                              max_connections=scrape_workers,
+                              timeout=http_timeout) as session:
+        jobs = [job for job in await plan_jobs(session, storage, novel_name, novel_link, chapter_idxs, toc_max_age,
+                                               verbosity=verbosity)
+                if job.idx not in in_flight]
+
+        # Scrape everything first; the batch is only submitted once its chapters are parsed
+        semaphore = asyncio.Semaphore(scrape_workers)
+        async def scrape(job) -> bool | None:
+            async with semaphore:
+                return await scrape_job(session, storage, job, cache_max_age, refresh, verbosity=verbosity)
+
+        for job, status in zip(jobs, await asyncio.gather(*(scrape(job) for job in jobs))):
+            if not status:
+                statuses[job.idx] = status
+                if status is False and not storage.has_translation(novel_name, job.idx):
+                    storage.set_status(novel_name, job.idx, FAILED)
+
+    # Built after scraping, so the chapters just parsed contribute their terms
+    glossary = build_glossary(storage, novel_name, max_terms=glossary_terms, verbosity=verbosity)
+
+    # Serve what we can from the translation cache and submit the rest
+    to_submit = []
+    for job in jobs:
+        if job.idx in statuses:
+            continue
+        cache_key = TranslationCache.make_key(job.content, model, GeminiClient.SYSTEM_INSTRUCTION_VERSION, glossary)
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached:
+            if verbosity >= 2: print(f"Using cached translation for chapter {job.idx}.")
+            write_translation(storage, novel_name, job.idx, job.content, cached)
+            statuses[job.idx] = True
+        else:
+            to_submit.append((job, cache_key))
+
+    for start in range(0, len(to_submit), chapters_per_job):
+        part = to_submit[start:start + chapters_per_job]
+        requests = {str(job.idx): GeminiClient.batch_request(job.content, glossary) for job, _ in part}
+        display_name = f"{novel_name} {part[0][0].idx}-{part[-1][0].idx}"
+        name = await asyncio.to_thread(backend.submit, model, requests, display_name)
+        # The content key, which leaves out the glossary, tells whether the chapter was re-scraped by the time the results arrive
+        chapter_keys = [{'idx': job.idx, 'cache_key': key,
+                         'content_key': TranslationCache.make_key(job.content, model, GeminiClient.SYSTEM_INSTRUCTION_VERSION)}
+                        for job, key in part]
+        storage.add_batch_job(name, novel_name, model, chapter_keys)
+        if verbosity >= 1: print(f"Submitted batch job {name} with {len(part)} chapters.")
+
+    # Wait for every unfinished job of the novel, including those of earlier runs
+    pending = storage.list_batch_jobs(novel_name)
+    while pending:
+        still_pending = []
+        for job in pending:
+            try:
+                status = await asyncio.to_thread(backend.poll, job['name'])
+            except GeminiError as e:
+                if verbosity >= 1: print(f"Could not poll batch job {job['name']}: {e}")
+                if is_retryable(e.__cause__ or e):
+                    still_pending.append(job)
+                    continue
+                # Gone or unreachable for good (e.g. deleted server-side, key revoked); polling again would not help
+                status = BatchStatus(JOB_FAILED, error=str(e))
+
+            if not status.finished:
+                if verbosity >= 2: print(f"Batch job {job['name']} is {status.state}.")
+                still_pending.append(job)
+                continue
+
+            statuses.update(_ingest(storage, cache, job, status, verbosity=verbosity))
+            storage.finish_batch_job(job['name'], status.state)
+
+        pending = still_pending
+        if pending:
+            if verbosity >= 1: print(f"Waiting for {len(pending)} batch job(s)...")
+            await asyncio.sleep(poll_interval)
+
+    failed = [idx for idx, status in statuses.items() if status is False]
+    if failed and verbosity >= 1:
+        print(f"{len(failed)} chapter(s) failed and were added to the dead-letter list: {', '.join(map(str, failed))}")
+    return statuses
+
+def _ingest(storage: Storage,
+            cache: TranslationCache | None,
+            job: dict,
+            status,
+            verbosity: int = 1) -> dict[int, bool]:
+    """
+    Write the results of a finished batch job to the library and the translation cache.
+
+    :param storage: The store translations are written to.
+    :param cache: Optional translation cache the results are added to.
+    :param job: The batch job, as returned by `Storage.list_batch_jobs`.
+    :param status: The job's final `BatchStatus`.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :return: Mapping of chapter index to status (True: translated, False: failed).
+    """
+    novel_name = job['novel']
+    chapters = {str(chapter['idx']): chapter for chapter in job['chapters']}
+    statuses = {}
+    answered = set()
+
+    def fail(idx: int, reason: str, error: str) -> None:
+        if verbosity >= 1: print(f"Translation failed for chapter {idx}: {error}")
+        storage.add_dead_letter(novel_name, idx, reason, error)
+        if not storage.has_translation(novel_name, idx):
+            storage.set_status(novel_name, idx, FAILED)
+        statuses[idx] = False
+
+    if status.state != SUCCEEDED:
+        for chapter in job['chapters']:
+            fail(chapter['idx'], f"batch_{status.state}", status.error or f"Batch job {job['name']} {status.state}.")
+        return statuses
+
+    # Results without their key are matched to the requests by position
+    for position, (key, result) in enumerate(status.results):
+        chapter = chapters.get(key) if key is not None else list(chapters.values())[position]
+        if chapter is None:
+            continue
+        idx = chapter['idx']
+        answered.add(idx)
+
+        if "error" in result:
+            error = result["error"]
+            fail(idx, f"http_{error.get('code')}" if error.get('code') else "error", error.get('message', str(error)))
+            continue
+        try:
+            translated_text = GeminiClient.response_text(result).strip()
+        except GeminiError as e:
+            fail(idx, e.reason, str(e))
+            continue
+
+        if cache is not None:
+            cache.put(chapter['cache_key'], translated_text)
+
+        # The chapter may have been re-scraped since it was submitted; only a translation of the current text is stored
+        content = storage.get_content(novel_name, idx)
+        # Jobs recorded before cache keys covered the glossary only have the cache key, which then covers the content alone
+        content_key = chapter.get('content_key', chapter['cache_key'])
+        if content is None or TranslationCache.make_key(content, job['model'], GeminiClient.SYSTEM_INSTRUCTION_VERSION) != content_key:
+            if verbosity >= 1: print(f"Chapter {idx} changed since it was submitted. Discarding its batch translation...")
+            continue
+
+        write_translation(storage, novel_name, idx, content, translated_text)
+        statuses[idx] = True
+        if verbosity >= 1: print(f"Chapter {idx} translated by batch job {job['name']}.")
+
+    # Chapters missing from the results
+    for chapter in job['chapters']:
+        if chapter['idx'] not in answered:
+            fail(chapter['idx'], "empty", f"Batch job {job['name']} returned no result for the chapter.")
+    return statuses
@@ -0,0 +1,178 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+
+from google import genai
+
+from . import rate_limiter
+
+# HTTP statuses meaning the key itself is unusable (invalid, revoked, API not enabled)
+_KEY_ERROR_STATUSES = {400, 401, 403}
+
+# Seconds a key is avoided after a quota error that did not say how long to wait
+_DEFAULT_COOLDOWN = 60.0
+
+@dataclass
+class Endpoint:
+    """One API key serving one model, with its own quota buckets and health statistics."""
+    label: str
+    model: str
+    client: genai.Client
+    request_limit_key: str
+    token_limit_key: str
+    requests: int = 0
+    failures: int = 0
+    quota_errors: int = 0
+    error_rate: float = 0.0 # Exponential moving average of failed requests
+    exhausted_until: float = 0.0 # time.monotonic() before which the quota is known to be exhausted
+    disabled: str | None = None # Why the key was taken out of rotation for good
+    _stats_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def expected_wait(self, tokens: float, now: float) -> float:
+        """Seconds a request of `tokens` input tokens would currently wait before being sent."""
+        waits = [self.exhausted_until - now, 0.0]
+        for key, amount in ((self.request_limit_key, 1), (self.token_limit_key, tokens)):
+            bucket = rate_limiter.get_limit(key)
+            if bucket:
+                waits.append(bucket.wait_time(amount))
+        return max(waits)
+
+    def record(self, error: Exception | None = None, cooldown: float | None = None) -> None:
+        """Update the statistics after a request, taking the key out of rotation if it is unusable."""
+        with self._stats_lock:
+            self.requests += 1
+            self.error_rate = 0.8 * self.error_rate + (0.2 if error else 0.0)
+            if error is None:
+                return
+            self.failures += 1
+
+            code = getattr(error, 'code', None)
+            if code == 429:
+                self.quota_errors += 1
+                seconds = cooldown if cooldown is not None else _DEFAULT_COOLDOWN
+                self.exhausted_until = max(self.exhausted_until, time.monotonic() + seconds)
+                rate_limiter.pause(self.request_limit_key, seconds)
+            elif code in _KEY_ERROR_STATUSES and _is_key_error(error):
+                self.disabled = f"{code} {getattr(error, 'status', '')}".strip()
+
+    def stats(self) -> dict:
+        """Usage statistics, for logging."""
+        return {
+            "key": self.label,
+            "model": self.model,
+            "requests": self.requests,
+            "failures": self.failures,
+            "quota_errors": self.quota_errors,
+            "disabled": self.disabled,
+        }
+
+def _is_key_error(error: Exception) -> bool:
+    # A 400 is usually a bad prompt; only treat it as a key problem if the API says so
+    if getattr(error, 'code', None) != 400:
+        return True
+    return 'API_KEY' in str(error) or 'API key' in str(error)
+
+def split_api_keys(api_key: str | list[str]) -> list[str]:
+    """
+    Split an API key setting into individual keys.
+
+    Args:
+        api_key (str | list[str]): A single key, several keys separated by commas
+            (e.g. `GEMINI_API_KEY=key1,key2`), or a list of keys.
+
+    Returns:
+        list[str]: The distinct keys, in order.
+    """
+    keys = api_key.split(',') if isinstance(api_key, str) else api_key
+    return list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+
+class ClientPool:
+    """
+    Spread Gemini requests over several API keys and models.
+
+    Every (key, model) pair is an `Endpoint` with its own request and token
+    buckets, since Gemini quotas are counted per key and model. Each request goes
+    to the endpoint of the requested models that would serve it soonest, so the
+    pool's throughput is the sum of its keys' quotas. Keys that report an
+    exhausted quota are avoided until the server's retry delay has passed, keys
+    that are rejected outright are dropped, and keys that fail often are
+    deprioritized. Models are tried in the order given: a later model is only
+    used while every key of the earlier ones is exhausted.
+    """
+
+    # Seconds of waiting that a fully failing endpoint is considered to be worth
+    ERROR_PENALTY = 30.0
+
+    def __init__(self, api_keys: list[str], models: list[str]):
+        """
+        Args:
+            api_keys (list[str]): The API keys to use.
+            models (list[str]): Every model requests may be routed to.
+        """
+        if not api_keys:
+            raise ValueError("At least one Gemini API key is required.")
+
+        self.endpoints: dict[str, list[Endpoint]] = {}
+        clients = {key: genai.Client(api_key=key) for key in api_keys}
+        for model in dict.fromkeys(models):
+            self.endpoints[model] = []
+            for key, client in clients.items():
+                fingerprint = hashlib.sha256(key.encode()).hexdigest()[:12]
+                self.endpoints[model].append(Endpoint(
+                    label=f"...{key[-4:]}",
+                    model=model,
+                    client=client,
+                    request_limit_key=f"gemini:requests:{fingerprint}:{model}",
+                    token_limit_key=f"gemini:tokens:{fingerprint}:{model}",
+                ))
+        self._lock = threading.Lock()
+
+    def configure_limits(self, rpm: float, tpm: float) -> None:
+        """
+        Configure the request and input token limits of every endpoint.
+
+        Args:
+            rpm (float): Maximum requests per minute per key and model.
+            tpm (float): Maximum input tokens per minute per key and model.
+        """
+        for endpoint in self.all_endpoints():
+            rate_limiter.configure_limit(endpoint.request_limit_key, rpm)
+            rate_limiter.configure_limit(endpoint.token_limit_key, tpm)
+
+    def all_endpoints(self) -> list[Endpoint]:
+        return [endpoint for endpoints in self.endpoints.values() for endpoint in endpoints]
+
+    def pick(self, models: list[str], tokens: float, exclude: set[int] = set()) -> Endpoint | None:
+        """
+        Choose the endpoint that should serve the next request.
+
+        Args:
+            models (list[str]): Acceptable models, in order of preference.
+            tokens (float): Estimated input tokens of the request.
+            exclude (set[int]): `id()`s of endpoints that already failed this request.
+
+        Returns:
+            Endpoint: The endpoint expected to answer soonest, or None if every key was rejected.
+        """
+        with self._lock:
+            now = time.monotonic()
+            fallback = None
+            for model in models:
+                candidates = [endpoint for endpoint in self.endpoints.get(model, [])
+                              if not endpoint.disabled and id(endpoint) not in exclude]
+                if not candidates:
+                    continue
+
+                best = min(candidates, key=lambda endpoint: endpoint.expected_wait(tokens, now)
+                                                            + endpoint.error_rate * self.ERROR_PENALTY)
+                if best.exhausted_until <= now:
+                    return best
+                # Every key of this model is out of quota; remember the one that recovers first
+                if fallback is None or best.exhausted_until < fallback.exhausted_until:
+                    fallback = best
+            return fallback
+
+    def stats(self) -> list[dict]:
+        """Usage statistics of every endpoint that served requests or was disabled."""
+        return [endpoint.stats() for endpoint in self.all_endpoints() if endpoint.requests or endpoint.disabled]
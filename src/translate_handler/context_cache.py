@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+from google.genai import errors, types
+
+from .client_pool import Endpoint
+
+# Smallest cacheable context per model; Gemini rejects smaller cached contents
+_MIN_TOKENS = {"gemini-2.5-pro": 4096}
+_DEFAULT_MIN_TOKENS = 1024
+
+@dataclass
+class _CachedContent:
+    name: str | None # None: the context could not be cached, send it inline
+    digest: str
+    expires_at: float
+
+# Shared by every client in the process: each `translate_chapters` run builds its own
+# client, and the caches of an earlier run stay valid for the next one
+_entries: dict[tuple[str, str], _CachedContent] = {}
+_lock = threading.Lock()
+
+class ContextCache:
+    """
+    Explicit Gemini context caches of system instructions, one per API key, model and novel.
+
+    A novel's system instruction (the translation instructions plus its glossary)
+    is uploaded once as a cached content, and every request for that novel refers
+    to it instead of resending it. Cached input tokens are billed at a fraction of
+    the regular price and do not have to be processed again on every request.
+    Caches live for `ttl` seconds and are recreated once they are about to expire
+    or the instruction changed. Instructions below the model's minimum cacheable
+    size are sent inline as before.
+    """
+
+    # Recreate caches this many seconds before they expire, so no request refers to an expired cache
+    EXPIRY_MARGIN = 60.0
+
+    def __init__(self, ttl: float = 3600):
+        """
+        Args:
+            ttl (float): Lifetime of each cached content in seconds (default: 3600).
+        """
+        if ttl <= self.EXPIRY_MARGIN:
+            raise ValueError(f"Context cache TTL must be longer than {self.EXPIRY_MARGIN:.0f} seconds.")
+
+        self.ttl = ttl
+
+    def get(self, endpoint: Endpoint, novel: str, instruction: str, tokens: int) -> str | None:
+        """
+        Name of the cached content holding `instruction` for `novel` on `endpoint`, creating it if needed.
+
+        Args:
+            endpoint (Endpoint): The key and model the request is sent to.
+            novel (str): The novel the instruction belongs to.
+            instruction (str): The system instruction to cache.
+            tokens (int): The instruction's estimated size in tokens (see `GeminiClient.estimate_tokens`).
+
+        Returns:
+            str: The cached content name, or None if the instruction must be sent inline.
+        """
+        if tokens < _MIN_TOKENS.get(endpoint.model, _DEFAULT_MIN_TOKENS):
+            return None
+
+        key = (endpoint.request_limit_key, novel)
+        digest = hashlib.sha256(instruction.encode('utf-8')).hexdigest()
+        # Held while creating, so concurrent workers do not create duplicate caches
+        with _lock:
+            entry = _entries.get(key)
+            now = time.time()
+            if entry and entry.digest == digest and entry.expires_at - now > self.EXPIRY_MARGIN:
+                return entry.name
+
+            if entry and entry.name:
+                self._delete(endpoint, entry.name)
+
+            try:
+                cached = endpoint.client.caches.create(
+                    model=endpoint.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name=f"{novel} translation context"[:128],
+                        system_instruction=instruction,
+                        ttl=f"{int(self.ttl)}s",
+                    ),
+                )
+                entry = _CachedContent(cached.name, digest, now + self.ttl)
+            except errors.APIError as e:
+                print(f"Could not create a context cache for '{novel}' ({e}). Sending the instruction inline.")
+                if e.code != 400:
+                    # Transient (quota, server error); try again on the next request
+                    _entries.pop(key, None)
+                    return None
+                # Too small or not cacheable with this model; do not try again until the cache would have expired
+                entry = _CachedContent(None, digest, now + self.ttl)
+
+            _entries[key] = entry
+            return entry.name
+
+    def invalidate(self, endpoint: Endpoint, novel: str) -> None:
+        """Forget the cache of `novel` on `endpoint`, e.g. after the server reported it missing; it is recreated on next use."""
+        with _lock:
+            _entries.pop((endpoint.request_limit_key, novel), None)
+
+    @staticmethod
+    def is_cache_error(error: Exception) -> bool:
+        """Whether a failed request was rejected because its cached content expired or was deleted."""
+        return (isinstance(error, errors.APIError) and error.code in (400, 403, 404)
+                and 'cache' in str(error).lower())
+
+    @staticmethod
+    def _delete(endpoint: Endpoint, name: str) -> None:
+        # Stop paying storage for a cache that is being replaced; it expires on its own otherwise
+        try:
+            endpoint.client.caches.delete(name=name)
+        except errors.APIError:
+            pass
@@ -1,8 +1,21 @@
-from google import genai
-from google.genai import types
+import re
+import time
+
+from google.genai import errors, types
 from google.genai.types import HarmCategory, HarmBlockThreshold, SafetySetting
 
+from . import rate_limiter
+from .client_pool import ClientPool, Endpoint, split_api_keys
+from .context_cache import ContextCache
+from .retry import ContentBlockedError, EmptyResponseError, GeminiError, RetryPolicy, retry_after
+from .translation_cache import TranslationCache
+
 class GeminiClient:
+    MODEL = "gemini-2.5-flash"
+    
+    # Bump whenever SYSTEM_INSTRUCTION changes, so cached translations made with the old one are not reused
+    SYSTEM_INSTRUCTION_VERSION = "1"
+    
     SYSTEM_INSTRUCTION = '''
     You are a model for translating Japanese web novels. You will be given the contents of a chapter in Japanese, and your task is to translate it into English. The translation should be accurate, fluent, and maintain the original meaning and context of the text.
 
@@ -14,10 +27,42 @@ class GeminiClient:
     - Return only the translated text without any additional formatting or metadata.
     '''
     
+    GLOSSARY_TEMPLATE = '''
+    Use this glossary for the names and terms of this novel. Translate them consistently as given, and keep the spelling of names identical across chapters:
+    {glossary}
+    '''
+    
     PROMPT_TEMPLATE = '''Here is the chapter content to translate:
     {content}
     '''
     
+    BATCH_PROMPT_TEMPLATE = '''Here are {count} separate chapters to translate. Each chapter is enclosed between a line "{begin}" and a line "{end}", where N is the chapter's position in this request.
+    Translate every chapter independently and return each translation enclosed in the same marker lines, in the same order. Keep the marker lines exactly as given.
+    {content}
+    '''
+    
+    CHUNK_PROMPT_TEMPLATE = '''Here is one part of a longer chapter to translate.
+    For context only, these are the paragraphs immediately before this part. Do NOT translate or repeat them:
+    {context}
+    
+    Translate only the following part:
+    {content}
+    '''
+    
+    PARAGRAPHS_PROMPT_TEMPLATE = '''The following numbered paragraphs were revised in a chapter that is otherwise already translated.
+    Translate each numbered paragraph and return exactly one line per paragraph, starting with its number in square brackets (e.g. "[1] ..."), in the same order.
+    For context only, these are the paragraphs around them. Do NOT translate or repeat them:
+    {before}
+    ...
+    {after}
+    
+    Paragraphs to translate:
+    {content}
+    '''
+    
+    BATCH_BEGIN_MARKER = "===== BEGIN CHAPTER {n} ====="
+    BATCH_END_MARKER = "===== END CHAPTER {n} ====="
+    
     SAFETY_SETTINGS = [
         SafetySetting(
             category=HarmCategory.HARM_CATEGORY_HATE_SPEECH,
@@ -37,35 +82,468 @@ class GeminiClient:
         )
     ]
     
-    def __init__(self, api_key: str):
-        self.client = genai.Client(api_key=api_key)
+    # Finish reasons meaning the model refused to answer; retrying the same prompt will not help
+    BLOCKED_FINISH_REASONS = {"SAFETY", "PROHIBITED_CONTENT", "BLOCKLIST", "SPII", "RECITATION"}
+    
+    def __init__(self,
+                 api_key: str | list[str],
+                 retry_policy: RetryPolicy | None = None,
+                 models: list[str] | None = None,
+                 short_chapter_model: str | None = None,
+                 short_chapter_chars: int = 2000,
+                 context_cache_ttl: float = 3600):
+        """
+        Args:
+            api_key (str | list[str]): API key for Google Gemini, or several keys (a list or a
+                comma-separated string) to spread requests over.
+            retry_policy (RetryPolicy): How failed requests are retried (default: `RetryPolicy()`).
+            models (list[str]): Models to translate with, in order of preference; later models are only
+                used while every key is out of quota for the earlier ones (default: `[MODEL]`).
+            short_chapter_model (str): Cheaper, faster model for chapters of at most `short_chapter_chars`
+                characters (default: None, every chapter uses `models`).
+            short_chapter_chars (int): Length up to which a chapter counts as short (default: 2000).
+            context_cache_ttl (float): Lifetime in seconds of the context cache holding each novel's system
+                instruction and glossary (default: 3600, 0 sends them with every request).
+        """
+        self.models = list(dict.fromkeys(models or [self.MODEL]))
+        self.short_chapter_model = short_chapter_model
+        self.short_chapter_chars = short_chapter_chars
+        self.pool = ClientPool(split_api_keys(api_key),
+                               self.models + ([short_chapter_model] if short_chapter_model else []))
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.context_cache = ContextCache(context_cache_ttl) if context_cache_ttl > 0 else None
+        self.glossaries: dict[str, list[str]] = {}
 
-    def translate_chapter(self, content: str) -> str:
+    def set_glossary(self, novel: str, entries: list[str]) -> None:
+        """
+        Set the glossary included in the system instruction of every request for `novel`.
+
+        Args:
+            novel (str): The name of the novel.
+            entries (list[str]): Glossary entries, e.g. `term = translation`.
+        """
+        self.glossaries[novel] = list(entries)
+
+    @classmethod
+    def system_instruction(cls, glossary: list[str] | None = None) -> str:
+        """The system instruction, with the glossary appended if there is one."""
+        if not glossary:
+            return cls.SYSTEM_INSTRUCTION
+        return cls.SYSTEM_INSTRUCTION + cls.GLOSSARY_TEMPLATE.format(glossary='\n'.join(f"- {entry}" for entry in glossary))
+
+    def configure_limits(self, rpm: float, tpm: float) -> None:
+        """
+        Configure the shared rate limits. Gemini counts quotas per API key and model,
+        so every key gets these limits for every model.
+
+        Args:
+            rpm (float): Maximum requests per minute per key and model.
+            tpm (float): Maximum input tokens per minute per key and model.
+        """
+        self.pool.configure_limits(rpm, tpm)
+
+    def _route(self, contents: list[str]) -> list[str]:
+        """Models to translate `contents` with, in order of preference."""
+        if self.short_chapter_model and all(len(content) <= self.short_chapter_chars for content in contents):
+            # The regular models remain a fallback while the short chapter model is out of quota
+            return [self.short_chapter_model] + [model for model in self.models if model != self.short_chapter_model]
+        return self.models
+
+    def translate_chapter(self, content: str, novel: str | None = None, answered_by: set[str] | None = None) -> str:
         """
         Translate the chapter content to the target language using Google Gemini.
 
         Args:
             content (str): The contents of the chapter.
+            novel (str): The novel the chapter belongs to, whose glossary is used (default: no glossary).
+            answered_by (set[str]): Optional set the model that produced the translation is added to.
 
         Returns:
             str: The translated content.
+        
+        Raises:
+            GeminiError: If the request was blocked or kept failing.
         """
         
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=self.PROMPT_TEMPLATE.format(content=content),
-            config=types.GenerateContentConfig(
-                system_instruction=self.SYSTEM_INSTRUCTION,
-                safety_settings=self.SAFETY_SETTINGS
-            )
+        return self._generate(self.PROMPT_TEMPLATE.format(content=content), models=self._route([content]), novel=novel,
+                              answered_by=answered_by)
+
+    def translate_batch(self, contents: list[str], novel: str | None = None, answered_by: set[str] | None = None) -> list[str] | None:
+        """
+        Translate several chapters in a single Gemini request. Each chapter is
+        wrapped in numbered marker lines, and the response is split back on them.
+
+        Args:
+            contents (list[str]): The contents of each chapter.
+            novel (str): The novel the chapters belong to, whose glossary is used (default: no glossary).
+            answered_by (set[str]): Optional set the model that produced the translations is added to.
+
+        Returns:
+            list[str]: The translated content of each chapter, in order,
+                or None if the response could not be split back into chapters.
+        
+        Raises:
+            GeminiError: If the request was blocked or kept failing.
+        """
+        
+        packed = '\n'.join(
+            f"{self.BATCH_BEGIN_MARKER.format(n=n)}\n{content}\n{self.BATCH_END_MARKER.format(n=n)}"
+            for n, content in enumerate(contents, start=1)
         )
+        prompt = self.BATCH_PROMPT_TEMPLATE.format(count=len(contents),
+                                                   begin=self.BATCH_BEGIN_MARKER.format(n="N"),
+                                                   end=self.BATCH_END_MARKER.format(n="N"),
+                                                   content=packed)
         
-        if not response:
-            print("No response received from Gemini translation.")
+        return self._split_batch(self._generate(prompt, models=self._route(contents), novel=novel, answered_by=answered_by),
+                                 len(contents))
+
+    def translate_chunk(self,
+                        content: str,
+                        context: str = "",
+                        novel: str | None = None,
+                        answered_by: set[str] | None = None) -> str:
+        """
+        Translate one part of a long chapter, streaming the response.
+
+        Args:
+            content (str): The paragraphs to translate.
+            context (str): Preceding paragraphs given as context only (not translated).
+            novel (str): The novel the chapter belongs to, whose glossary is used (default: no glossary).
+            answered_by (set[str]): Optional set the model that produced the translation is added to.
+
+        Returns:
+            str: The translated paragraphs.
+        
+        Raises:
+            GeminiError: If the request was blocked or kept failing.
+        """
+        
+        if not context:
+            prompt = self.PROMPT_TEMPLATE.format(content=content)
+        else:
+            prompt = self.CHUNK_PROMPT_TEMPLATE.format(context=context, content=content)
+        return self._generate(prompt, stream=True, novel=novel, answered_by=answered_by)
+
+    def translate_paragraphs(self,
+                             paragraphs: list[str],
+                             before: list[str] = [],
+                             after: list[str] = [],
+                             novel: str | None = None,
+                             answered_by: set[str] | None = None) -> list[str] | None:
+        """
+        Translate individual paragraphs of an already translated chapter, e.g. after the author revised them.
+
+        Args:
+            paragraphs (list[str]): The paragraphs to translate.
+            before (list[str]): Paragraphs preceding them, given as context only.
+            after (list[str]): Paragraphs following them, given as context only.
+            novel (str): The novel the chapter belongs to, whose glossary is used (default: no glossary).
+            answered_by (set[str]): Optional set the model that produced the translations is added to.
+
+        Returns:
+            list[str]: One translated paragraph per input paragraph, or None if the
+                response does not contain exactly one line per paragraph.
+        
+        Raises:
+            GeminiError: If the request was blocked or kept failing.
+        """
+        
+        content = '\n'.join(f"[{n}] {paragraph}" for n, paragraph in enumerate(paragraphs, start=1))
+        response_text = self._generate(self.PARAGRAPHS_PROMPT_TEMPLATE.format(before='\n'.join(before),
+                                                                             after='\n'.join(after),
+                                                                             content=content),
+                                       novel=novel,
+                                       answered_by=answered_by)
+        
+        translations: dict[int, str] = {}
+        for line in response_text.split('\n'):
+            match = re.match(r'^\s*\[(\d+)\]\s*(.+)$', line)
+            if not match:
+                continue
+            n = int(match.group(1))
+            if n in translations or not 1 <= n <= len(paragraphs):
+                print("Gemini paragraph translation returned an unexpected paragraph number.")
+                return None
+            translations[n] = match.group(2).strip()
+        
+        if len(translations) != len(paragraphs):
+            print(f"Gemini paragraph translation returned {len(translations)} of {len(paragraphs)} paragraphs.")
             return None
+        return [translations[n] for n in range(1, len(paragraphs) + 1)]
+
+    @staticmethod
+    def split_chapter(content: str, max_chars: int, overlap: int = 2) -> list[tuple[str, str]]:
+        """
+        Split a chapter into size-bounded chunks on paragraph boundaries (one paragraph per line).
+        Each chunk carries the last `overlap` non-empty paragraphs of the previous chunk as context.
+        A single paragraph longer than `max_chars` becomes its own chunk.
+
+        Args:
+            content (str): The chapter content (title, blank line, one paragraph per line).
+            max_chars (int): Maximum number of characters per chunk.
+            overlap (int): Number of preceding paragraphs to include as context.
+
+        Returns:
+            list[tuple[str, str]]: (context, chunk) pairs, in chapter order.
+        """
         
-        if not response.text:
-            print(f"No text returned from Gemini translation. Response: {response}")
+        chunks: list[list[str]] = [[]]
+        size = 0
+        for line in content.split('\n'):
+            if chunks[-1] and size + len(line) + 1 > max_chars:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(line)
+            size += len(line) + 1
+        
+        pairs = []
+        previous: list[str] = []
+        for lines in chunks:
+            context = [line for line in previous if line.strip()][-overlap:] if overlap > 0 else []
+            pairs.append(('\n'.join(context), '\n'.join(lines)))
+            previous = lines
+        return pairs
+
+    @classmethod
+    def _split_batch(cls, text: str, count: int) -> list[str] | None:
+        """Split a batched response on its chapter markers, validating that every chapter came back exactly once."""
+        translations = []
+        for n in range(1, count + 1):
+            pattern = (re.escape(cls.BATCH_BEGIN_MARKER.format(n=n)) + r'\s*\n(.*?)\n\s*'
+                       + re.escape(cls.BATCH_END_MARKER.format(n=n)))
+            matches = re.findall(pattern, text, flags=re.DOTALL)
+            if len(matches) != 1 or not matches[0].strip():
+                print(f"Batched Gemini response is missing or repeats chapter {n} of {count}.")
+                return None
+            translations.append(matches[0].strip())
+        
+        # Leftover markers mean the model merged, split or invented chapters
+        if len(re.findall(r'=====\s*(?:BEGIN|END) CHAPTER', text)) != 2 * count:
+            print("Batched Gemini response contains unexpected chapter markers.")
             return None
+        
+        return translations
+
+    def _generate(self,
+                  prompt: str,
+                  stream: bool = False,
+                  models: list[str] | None = None,
+                  novel: str | None = None,
+                  answered_by: set[str] | None = None) -> str:
+        """
+        Send a prompt to Gemini under the shared rate limits and return the response text.
+        With `stream`, the response is received incrementally with `generate_content_stream`.
+        
+        Each attempt goes to the key (and model, in order of `models`) that would serve it
+        soonest. A key that reports its quota exhausted or is rejected is set aside and the
+        request is sent to the next key right away. Once no key is left, the failure is
+        retried according to `retry_policy` like any other transient failure (server
+        errors, empty responses).
+        
+        The system instruction, with the glossary of `novel` if it has one, is sent through
+        the novel's context cache on each key and model when context caching is enabled.
+        The model that answered is added to `answered_by`, if given.
+        
+        Raises:
+            ContentBlockedError: If Gemini refused to answer.
+            GeminiError: If the request failed with a permanent error or kept failing.
+        """
+        
+        instruction = self.system_instruction(self.glossaries.get(novel))
+        models = models or self.models
+        tokens = self.estimate_tokens(prompt, instruction)
+        
+        def request() -> str:
+            tried: set[int] = set()
+            error: Exception | None = None
+            inline = False
+            while True:
+                endpoint = self.pool.pick(models, tokens, exclude=tried)
+                if endpoint is None:
+                    if error is not None:
+                        raise error
+                    raise GeminiError("Every Gemini API key was rejected.", reason="auth")
+                if getattr(error, 'code', None) == 429 and endpoint.exhausted_until > time.monotonic():
+                    # Every remaining key is out of quota too; let the retry policy wait
+                    raise error
+                
+                cached_content = None
+                if self.context_cache and not inline:
+                    cached_content = self.context_cache.get(endpoint, novel or "", instruction,
+                                                            self.estimate_tokens("", instruction))
+                if cached_content:
+                    config = types.GenerateContentConfig(cached_content=cached_content,
+                                                         safety_settings=self.SAFETY_SETTINGS)
+                else:
+                    config = types.GenerateContentConfig(system_instruction=instruction,
+                                                         safety_settings=self.SAFETY_SETTINGS)
+                
+                try:
+                    text = self._send(endpoint, prompt, config, tokens, stream)
+                except errors.APIError as e:
+                    if cached_content and ContextCache.is_cache_error(e):
+                        # The cache expired or was deleted early; send this request inline and recreate the cache next time
+                        self.context_cache.invalidate(endpoint, novel or "")
+                        inline = True
+                        continue
+                    endpoint.record(e, cooldown=retry_after(e))
+                    if e.code != 429 and not endpoint.disabled:
+                        raise
+                    tried.add(id(endpoint))
+                    error = e
+                    continue
+                except ContentBlockedError:
+                    # The prompt's fault, not the key's
+                    endpoint.record()
+                    raise
+                except Exception as e:
+                    endpoint.record(e)
+                    raise
+                
+                endpoint.record()
+                if answered_by is not None:
+                    answered_by.add(endpoint.model)
+                return text
+        
+        return self.retry_policy.call(request)
 
-        return response.text
\ No newline at end of file
+    def _send(self, endpoint: Endpoint, prompt: str, config: types.GenerateContentConfig, tokens: int, stream: bool) -> str:
+        """Send one request to `endpoint` under its rate limits and return the response text."""
+        rate_limiter.acquire(endpoint.request_limit_key)
+        rate_limiter.acquire(endpoint.token_limit_key, tokens)
+        
+        if stream:
+            parts = []
+            for response in endpoint.client.models.generate_content_stream(model=endpoint.model,
+                                                                           contents=prompt,
+                                                                           config=config):
+                self._check_blocked(response)
+                if response and response.text:
+                    parts.append(response.text)
+            
+            if not parts:
+                raise EmptyResponseError("No text returned from streamed Gemini translation.")
+            return ''.join(parts)
+        
+        response = endpoint.client.models.generate_content(
+            model=endpoint.model,
+            contents=prompt,
+            config=config
+        )
+        
+        if not response:
+            raise EmptyResponseError("No response received from Gemini translation.")
+        self._check_blocked(response)
+        
+        if not response.text:
+            raise EmptyResponseError(f"No text returned from Gemini translation. Response: {response}")
+        return response.text
+
+    @classmethod
+    def _check_blocked(cls, response) -> None:
+        """Raise ContentBlockedError if the prompt or the response was blocked."""
+        feedback = getattr(response, 'prompt_feedback', None)
+        if feedback and feedback.block_reason:
+            raise ContentBlockedError(f"Gemini blocked the prompt: {feedback.block_reason}")
+        
+        for candidate in getattr(response, 'candidates', None) or []:
+            reason = getattr(candidate.finish_reason, 'name', candidate.finish_reason)
+            if reason in cls.BLOCKED_FINISH_REASONS:
+                raise ContentBlockedError(f"Gemini stopped the response: {reason}")
+
+    def cache_key(self, content: str, model: str, novel: str | None = None) -> str:
+        """
+        Key identifying the translation of `content` by `model` in a `TranslationCache`.
+        The key covers the glossary of `novel`, so editing the glossary invalidates its translations.
+
+        Args:
+            content (str): The contents of the chapter.
+            model (str): The model that produced (or would produce) the translation.
+            novel (str): The novel the chapter belongs to, whose glossary is used (default: no glossary).
+
+        Returns:
+            str: The cache key.
+        """
+        return TranslationCache.make_key(content, model, self.SYSTEM_INSTRUCTION_VERSION, self.glossaries.get(novel))
+
+    def cache_keys(self, content: str, novel: str | None = None) -> list[str]:
+        """
+        Keys under which a usable translation of `content` may be cached: one per model this
+        client would translate it with, in order of preference.
+
+        Args:
+            content (str): The contents of the chapter.
+            novel (str): The novel the chapter belongs to, whose glossary is used (default: no glossary).
+
+        Returns:
+            list[str]: The cache keys.
+        """
+        return [self.cache_key(content, model, novel) for model in self._route([content])]
+
+    def usage(self) -> list[dict]:
+        """
+        Per key and model usage statistics: requests, failures, quota errors and whether the key was disabled.
+
+        Returns:
+            list[dict]: One entry per key and model that was used.
+        """
+        return self.pool.stats()
+
+    @classmethod
+    def batch_request(cls, content: str, glossary: list[str] | None = None) -> dict:
+        """
+        Build the request translating one chapter, as JSON for the Batch API.
+        It matches what `translate_chapter` sends.
+
+        Args:
+            content (str): The contents of the chapter.
+            glossary (list[str]): The novel's glossary entries (default: none).
+
+        Returns:
+            dict: A `GenerateContentRequest` in its REST (camelCase) form.
+        """
+        return {
+            "contents": [{"role": "user", "parts": [{"text": cls.PROMPT_TEMPLATE.format(content=content)}]}],
+            "systemInstruction": {"parts": [{"text": cls.system_instruction(glossary)}]},
+            "safetySettings": [setting.model_dump(mode='json', by_alias=True, exclude_none=True)
+                               for setting in cls.SAFETY_SETTINGS],
+        }
+
+    @classmethod
+    def response_text(cls, response: dict) -> str:
+        """
+        Extract the translation from a `GenerateContentResponse` in its REST form, e.g. a Batch API result.
+
+        Args:
+            response (dict): The response JSON.
+
+        Returns:
+            str: The response text.
+
+        Raises:
+            ContentBlockedError: If Gemini refused to answer.
+            EmptyResponseError: If the response contains no text.
+        """
+        parsed = types.GenerateContentResponse.model_validate(response)
+        cls._check_blocked(parsed)
+        if not parsed.text:
+            raise EmptyResponseError(f"No text returned from Gemini translation. Response: {response}")
+        return parsed.text
+
+    @classmethod
+    def estimate_tokens(cls, prompt: str, instruction: str | None = None) -> int:
+        """
+        Roughly estimate the input tokens billed for a prompt, without an API call: about
+        one token per Japanese (non-ASCII) character and one per four ASCII characters.
+
+        Args:
+            prompt (str): The prompt sent alongside the system instruction.
+            instruction (str): The system instruction sent with it (default: `SYSTEM_INSTRUCTION`, "" for none).
+
+        Returns:
+            int: The estimated number of input tokens.
+        """
+        text = prompt + (cls.SYSTEM_INSTRUCTION if instruction is None else instruction)
+        ascii_chars = len(text.encode('ascii', 'ignore'))
+        return (len(text) - ascii_chars) + ascii_chars // 4
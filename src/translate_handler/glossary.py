@@ -0,0 +1,119 @@
+import os
+import re
+from collections import Counter
+
+from .storage import Storage
+
+# `漢字【よみ】`, as the scraper renders <ruby>. Ruby bases are runs of kanji, katakana or
+# Latin characters; hiragana and punctuation before them belong to the surrounding sentence.
+# Kanji right before a ruby base are indistinguishable from it once rendered, so a few
+# terms carry a prefix; they rarely recur often enough to be selected
+_RUBY = re.compile(r'([\u4e00-\u9fff\u3400-\u4dbf々〆ヶ\u30a1-\u30faー・A-Za-zＡ-Ｚａ-ｚ0-9０-９]{1,20})【([^】\n]{1,30})】')
+
+# Readings made only of these are emphasis dots (傍点), not readings
+_EMPHASIS = set('・﹅﹆゛、。･.●○ ')
+
+def load_glossary(path: str) -> list[str]:
+    """
+    Load a hand-written glossary: one entry per line, typically `term = translation`
+    (e.g. `魔導具 = magic tool`). Blank lines and lines starting with `#` are ignored.
+
+    Args:
+        path (str): Path to the glossary file.
+
+    Returns:
+        list[str]: The glossary entries, in file order; empty if there is no glossary.
+    """
+    if not os.path.exists(path):
+        return []
+
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = [line.strip() for line in file]
+    return [line for line in lines if line and not line.startswith('#')]
+
+def glossary_path(storage_path: str, novel_name: str) -> str:
+    """Path of a novel's hand-written glossary, next to its table of contents."""
+    return os.path.join(storage_path, novel_name, "glossary.txt")
+
+def extract_ruby(content: str) -> Counter:
+    """
+    Count the ruby-annotated terms in a chapter's parsed content.
+
+    Args:
+        content (str): The parsed chapter content, with ruby rendered as `漢字【よみ】`.
+
+    Returns:
+        Counter: Occurrences of each (term, reading) pair.
+    """
+    terms = Counter()
+    for term, reading in _RUBY.findall(content):
+        reading = reading.strip()
+        if not reading or set(reading) <= _EMPHASIS or reading == term:
+            continue
+        terms[term, reading] += 1
+    return terms
+
+def update_glossary_index(storage: Storage, novel_name: str, verbosity: int = 1) -> int:
+    """
+    Add the ruby-annotated terms of a novel's newly parsed chapters to its glossary index.
+    Only chapters that were not indexed yet, or were re-parsed since, are read.
+
+    Args:
+        storage (Storage): The store holding the novel.
+        novel_name (str): The name of the novel.
+        verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+    Returns:
+        int: The number of chapters scanned.
+    """
+    scanned = 0
+    for batch in storage.iter_unscanned_contents(novel_name):
+        storage.put_glossary_occurrences(novel_name, [(idx, parsed_at, extract_ruby(content))
+                                                      for idx, parsed_at, content in batch])
+        scanned += len(batch)
+
+    if scanned and verbosity >= 2: print(f"Indexed ruby annotations of {scanned} chapters of '{novel_name}'.")
+    return scanned
+
+def build_glossary(storage: Storage,
+                   novel_name: str,
+                   max_terms: int = 200,
+                   min_chapters: int = 2,
+                   verbosity: int = 1) -> list[str]:
+    """
+    Build the glossary sent with a novel's translation requests: the hand-written
+    entries of its `glossary.txt`, followed by the ruby-annotated terms that appear
+    in the most chapters, each with its most common reading (e.g. `魔導具 (read まどうぐ)`).
+
+    The index is brought up to date first. The selected terms are listed in order
+    of first appearance rather than frequency, so the glossary only changes when a
+    term enters or leaves the selection, which keeps its context cache valid.
+
+    Args:
+        storage (Storage): The store holding the novel.
+        novel_name (str): The name of the novel.
+        max_terms (int): Maximum number of ruby-annotated terms (default: 200, 0 disables them).
+        min_chapters (int): Only include terms annotated in at least this many chapters (default: 2).
+        verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+    Returns:
+        list[str]: The glossary entries.
+    """
+    entries = load_glossary(glossary_path(storage.storage_path, novel_name))
+    if max_terms <= 0:
+        return entries
+
+    update_glossary_index(storage, novel_name, verbosity=verbosity)
+
+    # Hand-written entries take precedence over readings of the same term, and a term read several
+    # ways keeps only its most widespread reading (listed first), so the glossary never contradicts itself
+    seen = {re.split(r'\s*[=:]\s*', entry, maxsplit=1)[0] for entry in entries}
+    terms = []
+    for term in storage.list_glossary_terms(novel_name, min_chapters=min_chapters):
+        if len(terms) >= max_terms:
+            break
+        if term['term'] not in seen:
+            seen.add(term['term'])
+            terms.append(term)
+    terms.sort(key=lambda term: (term['first_idx'], term['term']))
+    return entries + [f"{term['term']} (read {term['reading']})" for term in terms]
@@ -0,0 +1,99 @@
+import difflib
+import json
+import os
+from typing import Callable
+
+def split_paragraphs(text: str) -> list[str]:
+    """Split a chapter (title first, one paragraph per line) into its non-empty paragraphs."""
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+def load_alignment(path: str) -> dict | None:
+    """
+    Load a paragraph-aligned source/translation map stored as a file (the layout before the SQLite store).
+
+    Args:
+        path (str): Path to the alignment file.
+
+    Returns:
+        dict: {"source": [...], "translation": [...]} with one translated paragraph
+            per source paragraph, or None if there is no usable alignment.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            alignment = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if len(alignment.get('source', [])) != len(alignment.get('translation', [])):
+        return None
+    return alignment
+
+def make_alignment(source: str, translation: str) -> dict | None:
+    """
+    Build the paragraph alignment of a chapter and its translation.
+
+    Args:
+        source (str): The chapter content.
+        translation (str): The translated chapter.
+
+    Returns:
+        dict: {"source": [...], "translation": [...]}, or None if the paragraph counts do not line up.
+    """
+    source_paragraphs = split_paragraphs(source)
+    translated_paragraphs = split_paragraphs(translation)
+
+    if len(source_paragraphs) != len(translated_paragraphs):
+        return None
+    return {'source': source_paragraphs, 'translation': translated_paragraphs}
+
+def retranslate_changes(alignment: dict,
+                        source: str,
+                        translate: Callable[[list[str], list[str], list[str]], list[str] | None],
+                        context: int = 2,
+                        max_changed_ratio: float = 0.5) -> list[str] | None:
+    """
+    Update an aligned translation for a revised chapter by translating only the
+    paragraphs that changed and splicing them into the existing translation.
+
+    Args:
+        alignment (dict): The stored alignment of the previous version (see `make_alignment`).
+        source (str): The revised chapter content.
+        translate (Callable): Called as `translate(paragraphs, before, after)` for each changed
+            run of paragraphs, with up to `context` surrounding paragraphs on each side.
+            Returns one translated paragraph per input paragraph, or None on failure.
+        context (int): Number of surrounding paragraphs sent as context.
+        max_changed_ratio (float): If more than this fraction of paragraphs changed,
+            give up so the chapter is retranslated as a whole.
+
+    Returns:
+        list[str]: The translated paragraphs of the revised chapter, or None if
+            it should be retranslated as a whole.
+    """
+    old_paragraphs = alignment['source']
+    old_translations = alignment['translation']
+    new_paragraphs = split_paragraphs(source)
+
+    matcher = difflib.SequenceMatcher(a=old_paragraphs, b=new_paragraphs, autojunk=False)
+    opcodes = matcher.get_opcodes()
+
+    changed = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag in ('replace', 'insert'))
+    if changed > max_changed_ratio * max(len(new_paragraphs), 1):
+        return None
+
+    translations: list[str] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            translations.extend(old_translations[i1:i2])
+        elif tag in ('replace', 'insert'):
+            translated = translate(new_paragraphs[j1:j2],
+                                   new_paragraphs[max(0, j1 - context):j1],
+                                   new_paragraphs[j2:j2 + context])
+            if not translated or len(translated) != j2 - j1:
+                return None
+            translations.extend(translated)
+        # Deleted paragraphs simply drop their translation
+
+    return translations
@@ -0,0 +1,507 @@
+import asyncio
+import functools
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from . import incremental, sites
+from .gemini_client import GeminiClient
+from .retry import ContentBlockedError, GeminiError
+from .scraper import ScraperSession, scrape_chapter
+from .storage import FAILED, Storage
+from .toc import sync_toc
+from .translation_cache import TranslationCache
+
+# Sent to every site; each site adds its own (see `sites.SiteAdapter.request_headers`)
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+}
+
+# Nothing carried over between batches; None is the queue's shutdown sentinel
+_NO_CARRY = object()
+
+@dataclass
+class ChapterJob:
+    """A single chapter moving through the scrape -> translate pipeline."""
+    novel_name: str
+    idx: int
+    url: str
+    stale: bool = False # Revised on the site since it was last fetched
+    content: str | None = None
+    status: bool | None = None # True: translated, False: failed, None: already translated
+    start_time: float = field(default_factory=time.time)
+
+def make_job(storage: Storage,
+             novel_name: str,
+             novel_link: str,
+             idx: int,
+             modified_at: float | None = None,
+             url: str | None = None) -> ChapterJob:
+    """
+    Create the pipeline job for one chapter of a novel.
+
+    :param storage: The store holding the novel.
+    :param novel_name: The name of the novel in the store.
+    :param novel_link: The link to the novel, without a trailing slash.
+    :param idx: Chapter index.
+    :param modified_at: When the table of contents says the chapter was last published or revised, if known.
+    :param url: The chapter's URL from the table of contents (default: derived from the index by the novel's site).
+    :raises ValueError: If the URL is not given and the site cannot derive it.
+    :return: The chapter job.
+    """
+    job = ChapterJob(novel_name=novel_name, idx=idx, url=url or sites.get_site(novel_link).chapter_url(novel_link, idx))
+
+    page = storage.get_page(novel_name, idx) if modified_at or url else None
+    if page and page['url'] == job.url:
+        # The chapter was revised on the site after we last fetched it
+        job.stale = bool(modified_at and modified_at > page['fetched_at'])
+    elif page and url:
+        # Another episode now sits at this position of the table of contents
+        job.stale = True
+    return job
+
+async def plan_jobs(session: ScraperSession,
+                    storage: Storage,
+                    novel_name: str,
+                    novel_link: str,
+                    chapter_idxs: list[int] | None = None,
+                    toc_max_age: float | None = 3600,
+                    verbosity: int = 1) -> list[ChapterJob]:
+    """
+    Create the jobs for chapters of a novel, using its table of contents to skip missing
+    chapters and spot revised ones. The chapter titles it lists are saved to the store.
+
+    :param session: The scraping session the table of contents is fetched with.
+    :param storage: The store holding the novel.
+    :param novel_name: The name of the novel in the store.
+    :param novel_link: The link to the novel, without a trailing slash.
+    :param chapter_idxs: Chapter indices, or None for every chapter in the table of contents.
+    :param toc_max_age: Seconds the stored table of contents is used before re-crawling it, or None to not use it.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :raises ValueError: If no chapter indices are given and the table of contents is unavailable.
+    :return: One job per chapter, without duplicates, in the given order.
+    """
+    modified_at: dict[int, float | None] = {}
+    urls: dict[int, str | None] = {}
+    if toc_max_age is not None:
+        toc = await sync_toc(session, novel_link, f"{storage.storage_path}/{novel_name}/toc.json",
+                             max_age=toc_max_age, verbosity=verbosity)
+        if toc and toc['chapters']:
+            modified_at = {entry.idx: entry.modified_at for entry in toc['chapters']}
+            urls = {entry.idx: entry.url for entry in toc['chapters']}
+            storage.set_titles(novel_name, {entry.idx: entry.title for entry in toc['chapters']})
+
+    if chapter_idxs is None:
+        if not modified_at:
+            raise ValueError("The table of contents is unavailable, chapter indices must be given explicitly.")
+        chapter_idxs = list(modified_at)
+    elif modified_at:
+        missing = [idx for idx in chapter_idxs if idx not in modified_at]
+        if missing and verbosity >= 1:
+            print(f"Chapters {', '.join(map(str, missing))} are not in the table of contents. Skipping...")
+        chapter_idxs = [idx for idx in chapter_idxs if idx in modified_at]
+
+    return [make_job(storage, novel_name, novel_link, idx, modified_at.get(idx), url=urls.get(idx))
+            for idx in dict.fromkeys(chapter_idxs)] # Drop duplicates, keep order
+
+def open_translation_cache(storage_path: str, translation_cache_mb: int) -> TranslationCache | None:
+    """Open the translation cache shared by every novel in the storage, or None if its size limit is 0."""
+    if translation_cache_mb <= 0:
+        return None
+    return TranslationCache(os.path.join(storage_path, ".translation_cache"),
+                            max_bytes=translation_cache_mb * 1024 * 1024)
+
+async def run_pipeline(session: ScraperSession,
+                       storage: Storage,
+                       client: GeminiClient,
+                       cache: TranslationCache | None,
+                       jobs: list[ChapterJob],
+                       scrape_workers: int = 2,
+                       translate_workers: int = 2,
+                       queue_size: int | None = None,
+                       cache_max_age: float | None = None,
+                       refresh: bool = False,
+                       batch_tokens: int = 0,
+                       chunk_chars: int = 6000,
+                       chunk_overlap: int = 2,
+                       on_done: Callable[[ChapterJob], None] | None = None,
+                       verbosity: int = 1) -> None:
+    """
+    Run chapter jobs, possibly from several novels, through the scrape -> translate
+    pipeline in the given order. Each job's outcome is stored in its `status`.
+
+    :param session: Pooled session scrapes are fetched through.
+    :param storage: The store chapters are read from and written to.
+    :param client: Instance of GeminiClient for translation.
+    :param cache: Optional translation cache consulted before calling Gemini.
+    :param jobs: The chapter jobs to run.
+    :param on_done: Optional callback invoked as each job finishes (successfully or not).
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+    See `translator.translate_chapters` for the remaining parameters.
+    """
+
+    # Chapters waiting to be scraped, and scraped chapters waiting to be translated
+    pending: asyncio.Queue[ChapterJob] = asyncio.Queue()
+    scraped: asyncio.Queue[ChapterJob | None] = asyncio.Queue(maxsize=queue_size or 2 * translate_workers)
+    for job in jobs:
+        pending.put_nowait(job)
+
+    def finish(job: ChapterJob, status: bool | None) -> None:
+        job.status = status
+        if status is False and not storage.has_translation(job.novel_name, job.idx):
+            storage.set_status(job.novel_name, job.idx, FAILED)
+        if on_done:
+            on_done(job)
+
+    async def scrape_worker():
+        while True:
+            try:
+                job = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            job.start_time = time.time()
+            status = await scrape_job(session, storage, job, cache_max_age, refresh, verbosity=verbosity)
+            if status:
+                await scraped.put(job)
+            else:
+                finish(job, status)
+
+    async def translate_worker():
+        # A chapter (or the shutdown sentinel) taken off the queue that did not fit the last batch
+        carry: ChapterJob | None | object = _NO_CARRY
+        while True:
+            job = await scraped.get() if carry is _NO_CARRY else carry
+            carry = _NO_CARRY
+            if job is None:
+                return
+
+            # Greedily pack already-scraped chapters into the batch while they fit the budget.
+            # The system instruction, with the novel's glossary, is sent once per request
+            batch = [job]
+            batch_size = client.estimate_tokens(job.content, client.system_instruction(client.glossaries.get(job.novel_name)))
+            while batch_size < batch_tokens:
+                try:
+                    next_job = scraped.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                next_size = client.estimate_tokens(next_job.content, "") if next_job is not None else 0
+                if next_job is None or batch_size + next_size > batch_tokens:
+                    carry = next_job
+                    break
+                batch.append(next_job)
+                batch_size += next_size
+
+            try:
+                statuses = await _translate_batch(client, storage, batch,
+                                                  cache=cache,
+                                                  chunk_chars=chunk_chars,
+                                                  chunk_overlap=chunk_overlap,
+                                                  verbosity=verbosity)
+            except Exception as e: # One bad response must not take the rest of the run down with it
+                if verbosity >= 1: print(f"Unexpected error translating chapters {', '.join(str(job.idx) for job in batch)}: {e!r}")
+                for job in batch:
+                    storage.add_dead_letter(job.novel_name, job.idx, "error", repr(e))
+                statuses = [False] * len(batch)
+            for job, status in zip(batch, statuses):
+                finish(job, status)
+
+                elapsed_time = time.time() - job.start_time
+                if status and verbosity >= 1:
+                    print(f"Chapter {job.idx} processed successfully in {elapsed_time:.2f} seconds")
+
+    async def produce():
+        await asyncio.gather(*(scrape_worker() for _ in range(scrape_workers)))
+
+        # Signal the translate workers that no more chapters are coming
+        for _ in range(translate_workers):
+            await scraped.put(None)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(translate_worker()) for _ in range(translate_workers)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def scrape_job(session: ScraperSession,
+                     storage: Storage,
+                     job: ChapterJob,
+                     cache_max_age: float | None = None,
+                     refresh: bool = False,
+                     verbosity: int = 1) -> bool | None:
+    """
+    Scrape and parse a single chapter, storing the parsed content on the job.
+
+    :param session: Pooled session to fetch the chapter through.
+    :param storage: The store the page and parsed content are cached in.
+    :param job: The chapter job to scrape.
+    :param cache_max_age: Seconds saved HTML is reused without revalidation (default: server's Cache-Control).
+    :param refresh: Scrape the chapter even if a translation already exists.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :return: True if scraping was successful, False if it failed, None if translation already exists.
+    """
+
+    # Check if the translation already exists (and the chapter has not been revised since)
+    if not (refresh or job.stale) and storage.has_translation(job.novel_name, job.idx):
+        if verbosity >= 1: print(f"Translation for chapter {job.idx} already exists. Skipping...")
+        return None
+
+    # Resume from the last completed stage of an earlier, interrupted or failed run:
+    # stored content goes straight to translation, and a stored page is parsed without asking the server
+    page = storage.get_page(job.novel_name, job.idx)
+    content = storage.get_content(job.novel_name, job.idx)
+    max_age = 0 if job.stale else cache_max_age
+    if not (refresh or job.stale):
+        if content:
+            if verbosity >= 2: print(f"Resuming chapter {job.idx} from its stored content.")
+            job.content = content
+            return True
+        if page:
+            if verbosity >= 2: print(f"Resuming chapter {job.idx} from its stored page.")
+            max_age = float('inf')
+
+    if verbosity >= 2: print(f"Scraping chapter {job.idx} HTML content...")
+    site = sites.get_site(job.url)
+    job.content = await scrape_chapter(job.url, session,
+                                       headers=site.request_headers(job.url),
+                                       verbosity=verbosity-1,
+                                       cached_page=page,
+                                       cached_content=content,
+                                       save_page=lambda page: storage.put_page(job.novel_name, job.idx, page),
+                                       save_content=lambda content: storage.put_content(job.novel_name, job.idx, content),
+                                       parse=site.parse_chapter,
+                                       max_age=max_age)
+
+    if not job.content:
+        if verbosity >= 1: print(f"Failed to retrieve or parse HTML content for chapter {job.idx}. Skipping...")
+        storage.add_dead_letter(job.novel_name, job.idx, "scrape", "Failed to retrieve or parse the HTML content.")
+        return False
+
+    if verbosity >= 2: print(f"Scraped chapter {job.idx}.")
+    return True
+
+async def _translate_batch(client: GeminiClient,
+                           storage: Storage,
+                           jobs: list[ChapterJob],
+                           cache: TranslationCache | None = None,
+                           chunk_chars: int = 0,
+                           chunk_overlap: int = 2,
+                           verbosity: int = 1) -> list[bool]:
+    """
+    Translate several scraped chapters in a single Gemini request. Chapters found
+    in the translation cache are served from it, revised chapters with an aligned
+    previous translation only have their changed paragraphs retranslated, and
+    chapters whose translation cannot be split back out of the response are
+    retried one by one.
+
+    :param client: Instance of GeminiClient for translation.
+    :param storage: The store translations are written to.
+    :param jobs: The scraped chapter jobs to translate.
+    :param cache: Optional translation cache consulted before calling Gemini.
+    :param chunk_chars: Chapters longer than this are translated in chunks (0 disables chunking).
+    :param chunk_overlap: Number of preceding paragraphs sent as context with each chunk.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :return: For each job, True if translation was successful, False if it failed.
+    """
+
+    statuses = {job.idx: True for job in jobs if _load_cached_translation(storage, job, client, cache, verbosity=verbosity)}
+    for job in jobs:
+        if job.idx not in statuses and await _translate_incremental(client, storage, job, cache, verbosity=verbosity):
+            statuses[job.idx] = True
+    jobs_to_translate = [job for job in jobs if job.idx not in statuses]
+
+    if len(jobs_to_translate) == 1:
+        job = jobs_to_translate[0]
+        statuses[job.idx] = await _translate_chapter(client, storage, job, cache, chunk_chars, chunk_overlap,
+                                                     verbosity=verbosity)
+
+    elif jobs_to_translate:
+        chapters = ', '.join(str(job.idx) for job in jobs_to_translate)
+        if verbosity >= 2: print(f"Translating chapters {chapters} in one batch...")
+
+        try:
+            # Chapters of different novels (see sync.py) share no glossary
+            novels = {job.novel_name for job in jobs_to_translate}
+            answered_by: set[str] = set()
+            translations = await asyncio.to_thread(client.translate_batch, [job.content for job in jobs_to_translate],
+                                                   novels.pop() if len(novels) == 1 else None, answered_by)
+        except GeminiError as e:
+            # A block may come from a single chapter, so the others still get their chance
+            if verbosity >= 1: print(f"Batch request failed: {e}")
+            translations = None
+
+        if translations is None:
+            if verbosity >= 1: print(f"Batch translation failed for chapters {chapters}. Translating them individually...")
+            for job in jobs_to_translate:
+                statuses[job.idx] = await _translate_chapter(client, storage, job, cache, chunk_chars, chunk_overlap,
+                                                             verbosity=verbosity)
+        else:
+            for job, translated_text in zip(jobs_to_translate, translations):
+                _save_translation(storage, job, translated_text, client, cache, answered_by)
+                statuses[job.idx] = True
+
+    return [statuses[job.idx] for job in jobs]
+
+async def _translate_chapter(client: GeminiClient,
+                             storage: Storage,
+                             job: ChapterJob,
+                             cache: TranslationCache | None = None,
+                             chunk_chars: int = 0,
+                             chunk_overlap: int = 2,
+                             verbosity: int = 1) -> bool:
+    """
+    Translate a single scraped chapter of a Japanese web novel using Google Gemini.
+
+    :param client: Instance of GeminiClient for translation.
+    :param storage: The store the translation is written to.
+    :param job: The scraped chapter job to translate.
+    :param cache: Optional translation cache the new translation is stored in.
+    :param chunk_chars: Chapters longer than this are translated in chunks (0 disables chunking).
+    :param chunk_overlap: Number of preceding paragraphs sent as context with each chunk.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :return: True if translation was successful, False if it failed (the chapter is then added to the dead-letter list).
+    """
+
+    if verbosity >= 2: print(f"Translating chapter {job.idx} content...")
+
+    answered_by: set[str] = set()
+    try:
+        if chunk_chars and len(job.content) > chunk_chars:
+            translated_text = await _translate_chunked(client, job, chunk_chars, chunk_overlap,
+                                                       answered_by=answered_by, verbosity=verbosity)
+        else:
+            translated_text = await asyncio.to_thread(client.translate_chapter, job.content, job.novel_name, answered_by)
+    except GeminiError as e:
+        if verbosity >= 1: print(f"Translation failed for chapter {job.idx}: {e}")
+        storage.add_dead_letter(job.novel_name, job.idx, e.reason, str(e))
+        return False
+
+    _save_translation(storage, job, translated_text, client, cache, answered_by)
+    return True
+
+async def _translate_chunked(client: GeminiClient,
+                             job: ChapterJob,
+                             chunk_chars: int,
+                             chunk_overlap: int,
+                             retries: int = 1,
+                             answered_by: set[str] | None = None,
+                             verbosity: int = 1) -> str:
+    """
+    Translate a long chapter as paragraph-aligned chunks streamed concurrently, then
+    reassemble them in order. A failed chunk is retried on its own, unless it was blocked.
+
+    :param client: Instance of GeminiClient for translation.
+    :param job: The scraped chapter job to translate.
+    :param chunk_chars: Maximum number of characters per chunk.
+    :param chunk_overlap: Number of preceding paragraphs sent as context with each chunk.
+    :param retries: Number of times a failed chunk is retried.
+    :param answered_by: Optional set the models that translated the chunks are added to.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :raises GeminiError: If any chunk could not be translated.
+    :return: The translated chapter.
+    """
+
+    chunks = client.split_chapter(job.content, chunk_chars, chunk_overlap)
+    if verbosity >= 2: print(f"Translating chapter {job.idx} in {len(chunks)} chunks...")
+
+    async def translate_chunk(n: int, context: str, content: str) -> str:
+        for attempt in range(retries + 1):
+            try:
+                return (await asyncio.to_thread(client.translate_chunk, content, context, job.novel_name, answered_by)).strip()
+            except ContentBlockedError:
+                raise
+            except GeminiError:
+                if attempt == retries:
+                    raise
+                if verbosity >= 1: print(f"Chunk {n} of chapter {job.idx} failed. Retrying...")
+
+    translations = await asyncio.gather(*(translate_chunk(n, context, content)
+                                          for n, (context, content) in enumerate(chunks, start=1)))
+    return '\n'.join(translations)
+
+async def _translate_incremental(client: GeminiClient,
+                                 storage: Storage,
+                                 job: ChapterJob,
+                                 cache: TranslationCache | None = None,
+                                 verbosity: int = 1) -> bool:
+    """
+    Update the existing translation of a revised chapter by retranslating only the
+    paragraphs that changed since the stored paragraph alignment was made.
+
+    :param client: Instance of GeminiClient for translation.
+    :param storage: The store holding the existing translation.
+    :param job: The scraped chapter job to translate.
+    :param cache: Optional translation cache the updated translation is stored in.
+    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :return: True if the existing translation is up to date, False if the chapter needs a full translation.
+    """
+    alignment = storage.get_alignment(job.novel_name, job.idx)
+    if alignment is None:
+        return False
+
+    if alignment['source'] == incremental.split_paragraphs(job.content):
+        if verbosity >= 2: print(f"Chapter {job.idx} is unchanged, keeping the existing translation.")
+        return True
+
+    if verbosity >= 2: print(f"Chapter {job.idx} was revised, retranslating changed paragraphs...")
+    answered_by: set[str] = set()
+    try:
+        translations = await asyncio.to_thread(incremental.retranslate_changes, alignment, job.content,
+                                               functools.partial(client.translate_paragraphs,
+                                                                 novel=job.novel_name, answered_by=answered_by))
+    except GeminiError as e:
+        if verbosity >= 1: print(f"Paragraph translation failed for chapter {job.idx}: {e}")
+        translations = None
+
+    if translations is None:
+        if verbosity >= 1: print(f"Could not update chapter {job.idx} paragraph by paragraph. Retranslating it...")
+        return False
+
+    _save_translation(storage, job, '\n'.join(translations), client, cache, answered_by)
+    return True
+
+def _load_cached_translation(storage: Storage,
+                             job: ChapterJob,
+                             client: GeminiClient,
+                             cache: TranslationCache | None,
+                             verbosity: int = 1) -> bool:
+    """Write the cached translation of the job's content, if any. Returns True on a cache hit."""
+    if cache is None:
+        return False
+
+    # A translation by any of the models the chapter may be translated with will do
+    translated_text = next(filter(None, map(cache.get, client.cache_keys(job.content, job.novel_name))), None)
+    if not translated_text:
+        return False
+
+    if verbosity >= 2: print(f"Using cached translation for chapter {job.idx}.")
+    write_translation(storage, job.novel_name, job.idx, job.content, translated_text)
+    return True
+
+def write_translation(storage: Storage, novel_name: str, idx: int, content: str, translated_text: str) -> None:
+    """
+    Store a chapter's translation along with its paragraph alignment to the source.
+
+    :param storage: The store holding the novel.
+    :param novel_name: The name of the novel in the store.
+    :param idx: Chapter index.
+    :param content: The parsed source text the translation was made from.
+    :param translated_text: The translation.
+    """
+    storage.put_translation(novel_name, idx, translated_text, incremental.make_alignment(content, translated_text))
+
+def _save_translation(storage: Storage,
+                      job: ChapterJob,
+                      translated_text: str,
+                      client: GeminiClient,
+                      cache: TranslationCache | None = None,
+                      answered_by: set[str] | None = None) -> None:
+    write_translation(storage, job.novel_name, job.idx, job.content, translated_text)
+
+    # Cached under the model that produced it; translations mixing models (e.g. chunks served by a fallback) are not cached
+    if cache is not None and answered_by and len(answered_by) == 1:
+        cache.put(client.cache_key(job.content, next(iter(answered_by)), job.novel_name), translated_text)
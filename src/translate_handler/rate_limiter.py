@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at a fixed rate per minute.
+
+    Callers reserve tokens up front: if the bucket is short, the balance goes
+    negative and the caller waits until it would have refilled. Later callers
+    queue behind that debt, so concurrent workers are served in arrival order
+    and the long-run rate never exceeds the configured limit.
+    """
+
+    def __init__(self, per_minute: float, burst: float | None = None):
+        """
+        Args:
+            per_minute (float): Number of tokens added to the bucket per minute.
+            burst (float): Maximum number of tokens the bucket can hold (default: one minute's worth).
+        """
+        if per_minute <= 0:
+            raise ValueError("Rate limit must be a positive number.")
+
+        self.per_minute = per_minute
+        self.capacity = burst if burst is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Take `amount` tokens from the bucket and return how long to wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            rate = self.per_minute / 60
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+
+            # A request larger than the bucket could never be served; cap it at a full bucket
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / rate)
+
+    def wait_time(self, amount: float = 1) -> float:
+        """How long a caller taking `amount` tokens now would wait, without taking them."""
+        with self._lock:
+            rate = self.per_minute / 60
+            tokens = min(self.capacity, self._tokens + (time.monotonic() - self._updated) * rate)
+            return max(0.0, (min(amount, self.capacity) - tokens) / rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for at least `seconds`, e.g. after the server reported the quota exhausted."""
+        with self._lock:
+            now = time.monotonic()
+            rate = self.per_minute / 60
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate, -seconds * rate)
+            self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block the current thread until `amount` tokens are available. Returns the time waited."""
+        delay = self._reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, amount: float = 1) -> float:
+        """Wait without blocking the event loop until `amount` tokens are available. Returns the time waited."""
+        delay = self._reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+# Buckets shared by every client in the process, keyed by host name or API quota
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+def configure_limit(key: str, per_minute: float, burst: float | None = None) -> TokenBucket:
+    """
+    Create or update the shared bucket for `key`.
+
+    Reconfiguring a bucket with the same limits keeps its current balance, so
+    concurrent runs sharing a key do not reset each other's throttling.
+
+    Args:
+        key (str): Name of the limit, e.g. a host name or "gemini:requests".
+        per_minute (float): Number of tokens allowed per minute.
+        burst (float): Maximum burst size (default: one minute's worth).
+
+    Returns:
+        TokenBucket: The shared bucket for `key`.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        capacity = burst if burst is not None else per_minute
+        if bucket is None or bucket.per_minute != per_minute or bucket.capacity != capacity:
+            bucket = TokenBucket(per_minute, burst)
+            _buckets[key] = bucket
+        return bucket
+
+def get_limit(key: str) -> TokenBucket | None:
+    """Return the shared bucket for `key`, or None if that key is not rate limited."""
+    return _buckets.get(key)
+
+def acquire(key: str, amount: float = 1) -> float:
+    """Block until `amount` tokens are available for `key`. No-op for unlimited keys."""
+    bucket = _buckets.get(key)
+    return bucket.acquire(amount) if bucket else 0.0
+
+async def acquire_async(key: str, amount: float = 1) -> float:
+    """Asynchronously wait until `amount` tokens are available for `key`. No-op for unlimited keys."""
+    bucket = _buckets.get(key)
+    return await bucket.acquire_async(amount) if bucket else 0.0
+
+def pause(key: str, seconds: float) -> None:
+    """Hold back every caller of `key` for at least `seconds`. No-op for unlimited keys."""
+    bucket = _buckets.get(key)
+    if bucket:
+        bucket.pause(seconds)
@@ -0,0 +1,135 @@
+import email.utils
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+import httpx
+from google.genai import errors
+
+T = TypeVar('T')
+
+# HTTP statuses worth retrying: timeouts, quota exhaustion and server-side failures
+_RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class GeminiError(Exception):
+    """A Gemini request failed for good. `reason` is a short machine-readable cause."""
+
+    def __init__(self, message: str, reason: str = "error"):
+        super().__init__(message)
+        self.reason = reason
+
+class ContentBlockedError(GeminiError):
+    """Gemini refused to answer (safety filters, recitation, ...). Sending the same prompt again will not help."""
+
+    def __init__(self, message: str):
+        super().__init__(message, reason="blocked")
+
+class EmptyResponseError(GeminiError):
+    """Gemini answered without any text, which is usually transient."""
+
+    def __init__(self, message: str):
+        super().__init__(message, reason="empty")
+
+def _reason(error: Exception) -> str:
+    if isinstance(error, GeminiError):
+        return error.reason
+    if isinstance(error, errors.APIError):
+        return f"http_{error.code}"
+    return "network"
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed request may succeed if sent again."""
+    if isinstance(error, ContentBlockedError):
+        return False
+    if isinstance(error, EmptyResponseError):
+        return True
+    if isinstance(error, errors.APIError):
+        return error.code in _RETRYABLE_STATUSES or (error.code or 0) >= 500
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+def retry_after(error: Exception) -> float | None:
+    """
+    Seconds the server asked us to wait before retrying, if it said so.
+
+    Both the `Retry-After` header (seconds or HTTP date) and the `RetryInfo`
+    detail Gemini attaches to quota errors (e.g. `"retryDelay": "23s"`) are honored.
+
+    Args:
+        error (Exception): The error raised by the failed request.
+
+    Returns:
+        float: The requested delay in seconds, or None.
+    """
+    if not isinstance(error, errors.APIError):
+        return None
+
+    headers = getattr(error.response, 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if value:
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    match = re.search(r"'retryDelay':\s*'(\d+(?:\.\d+)?)s'", str(error.details))
+    return float(match.group(1)) if match else None
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry transient failures with jittered exponential backoff.
+
+    The n-th retry waits a random time between 0 and `min(max_delay, base_delay * 2**n)`
+    ("full jitter"), so workers that failed together do not retry in lockstep. If the
+    server asked for a specific delay, at least that long is waited. Content blocks
+    and client errors (bad request, invalid key) are not retried.
+    """
+    max_attempts: int = 5
+    base_delay: float = 2.0
+    max_delay: float = 120.0
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, request: Callable[[], T], verbosity: int = 1) -> T:
+        """
+        Call `request` until it succeeds, retrying transient failures.
+
+        Args:
+            request (Callable): The request to send.
+            verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+        Returns:
+            The result of `request`.
+
+        Raises:
+            GeminiError: If the request was blocked, failed with a permanent error, or kept failing.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return request()
+            except GeminiError as e:
+                error = e
+            except (errors.APIError, httpx.TransportError, ConnectionError, TimeoutError) as e:
+                error = e
+
+            if not is_retryable(error):
+                if isinstance(error, GeminiError):
+                    raise error
+                raise GeminiError(f"Gemini request failed: {error}", reason=_reason(error)) from error
+
+            if attempt == self.max_attempts - 1:
+                break
+
+            requested = retry_after(error)
+            delay = max(requested, self.backoff(attempt)) if requested is not None else self.backoff(attempt)
+            if verbosity >= 1: print(f"Gemini request failed ({error}). Retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
+
+        raise GeminiError(f"Gemini request failed after {self.max_attempts} attempts: {error}",
+                          reason=_reason(error)) from error
@@ -1,115 +1,208 @@
+import asyncio
 import re
+import time
+from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
 
-def _scrape_html(url: str, headers: dict = {}, save_dir: str = None) -> str | None:
+from . import rate_limiter
+from .sites import get_site
+
+class ScraperSession:
+    """
+    Long-lived, pooled HTTP session shared by every scrape in a run.
+
+    Connections to a host are kept alive and reused across chapters, so only the
+    first request pays the TCP+TLS handshake. Requests are made natively with
+    asyncio, so many chapters can be in flight without a thread per request.
+    Compressed responses (gzip/deflate, plus brotli when the `brotli` package is
+    installed) are negotiated and decoded transparently.
+    """
+
+    def __init__(self,
+                 headers: dict = {},
+                 max_connections: int = 10,
+                 max_keepalive_connections: int | None = None,
+                 keepalive_expiry: float = 30.0,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 10.0):
+        """
+        Args:
+            headers (dict): Headers sent with every request.
+            max_connections (int): Maximum number of open connections in the pool.
+            max_keepalive_connections (int): Maximum number of idle connections kept alive (default: `max_connections`).
+            keepalive_expiry (float): Seconds an idle connection is kept alive.
+            timeout (float): Timeout in seconds for reading a response.
+            connect_timeout (float): Timeout in seconds for establishing a connection.
+        """
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections or max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            follow_redirects=True,
+        )
+
+    async def get(self, url: str, headers: dict = {}) -> httpx.Response:
+        """
+        Send a GET request through the pool, honoring the host's rate limit.
+
+        Args:
+            url (str): The URL to retrieve.
+            headers (dict): Extra headers for this request.
+
+        Returns:
+            httpx.Response: The response. Errors are not raised for bad status codes.
+        """
+        await rate_limiter.acquire_async(urlparse(url).hostname)
+        return await self.client.get(url, headers=headers)
+
+    async def aclose(self) -> None:
+        """Close every pooled connection."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "ScraperSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+def _parse_max_age(cache_control: str | None) -> float:
+    """Extract the freshness lifetime from a Cache-Control header (0 if absent or not cacheable)."""
+    if not cache_control or re.search(r'\b(no-cache|no-store)\b', cache_control):
+        return 0
+    match = re.search(r'\bmax-age=(\d+)', cache_control)
+    return float(match.group(1)) if match else 0
+
+async def _scrape_html(session: ScraperSession,
+                       url: str,
+                       headers: dict = {},
+                       cached: dict | None = None,
+                       max_age: float | None = None) -> tuple[dict | None, bool]:
     """
-    Retrieve the HTML content of a given URL. If `save_dir` is provided,
-    the HTML content will be saved to that directory.
+    Retrieve the HTML content of a given URL. Requests are throttled by the
+    rate limit configured for the URL's host, if any.
+    
+    A previously saved copy of the page doubles as an HTTP cache: a fresh copy is
+    served as is, and a stale copy is revalidated with a conditional GET (using its
+    ETag and Last-Modified) so an unchanged page costs a 304.
 
     Args:
+        session (ScraperSession): The pooled session to send the request through.
         url (str): The URL to retrieve.
         headers (dict): Optional headers for the request.
-        save_dir (str): Optional directory to save the HTML content.
+        cached (dict): Optional saved copy of the page (url, html, etag, last_modified, max_age, fetched_at).
+        max_age (float): Seconds a saved copy stays fresh without revalidation
+            (default: the server's Cache-Control max-age).
 
     Returns:
-        str: The HTML content of the page.
+        tuple[dict | None, bool]: The page in the same form as `cached` (None on failure),
+            and whether it is unchanged from the saved copy.
     """
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise an error for bad responses
-    except requests.RequestException as e:
-        print(f"Error retrieving {url}: {e}")
-        return None    
-    
-    if save_dir:
-        with open(save_dir, 'w', encoding='utf-8') as file:
-            file.write(response.text)
+    if cached and cached.get('url') != url:
+        cached = None
     
-    return response.text
-
-def _parse_html(content: str, save_dir: str = None) -> str | None:
-    '''Parse the HTML content to extract the title and main content of the novel.
-    
-    Args:
-        content (str): The HTML content of the page.
-        save_dir (str): Optional directory to save the parsed content.
-    
-    Returns:
-        str: The parsed text containing the title and content of the novel.
-    '''
-    
-    soup = BeautifulSoup(content, 'html.parser')
-    
-    # === Extract the title of the novel ===
-    title_container = soup.find('h1', class_='p-novel__title p-novel__title--rensai')
-    title = title_container.get_text(strip=True) if title_container else None
-
-    # === Extract the content of the novel ===
-    container = soup.find('div', class_='js-novel-text p-novel__text')
-    paragraphs = container.find_all('p', id=re.compile(r'^L\d+'))
-
-    content = ''
-    for p in paragraphs:
-        html = str(p)
-        # Replace ruby tags
-        html = re.sub(
-            r'<ruby>(.*?)<rp>\(</rp><rt>(.*?)</rt><rp>\)</rp></ruby>',
-            lambda m: '{}【{}】'.format(m.group(1), m.group(2)),
-            html,
-            flags=re.DOTALL
-        )
-
-        # Remove remaining tags like <p>, </p>
-        text = re.sub(r'<[^>]+>', '', html)
+    if cached:
+        lifetime = max_age if max_age is not None else cached.get('max_age', 0)
+        if time.time() - cached.get('fetched_at', 0) < lifetime:
+            return cached, True
         
-        content += text.strip() + '\n'
-         
-    content = content.strip()
+        # Revalidate the saved copy
+        headers = dict(headers)
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
     
-    parsed_text = f"{title}\n\n{content}" if (title and content) else None
-    if not parsed_text:
-        print("ERROR: Failed to parse HTML content.")
-        return None
+    try:
+        response = await session.get(url, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()  # Raise an error for bad responses
+    except httpx.HTTPError as e:
+        print(f"Error retrieving {url}: {e}")
+        return None, False
     
-    if save_dir:
-        with open(save_dir, 'w', encoding='utf-8') as file:
-            file.write(parsed_text)
-            
-    return parsed_text.strip()
+    if response.status_code == 304:
+        if not cached:
+            print(f"Error retrieving {url}: unexpected 304 response without a saved copy")
+            return None, False
+        return {
+            **cached,
+            'max_age': _parse_max_age(response.headers.get('Cache-Control')) or cached.get('max_age', 0),
+            'fetched_at': time.time(),
+        }, True
     
-def scrape_chapter(url, headers: dict = {}, verbosity: int = 1, **kwargs) -> str | None:
+    return {
+        'url': url,
+        'html': response.text,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'max_age': _parse_max_age(response.headers.get('Cache-Control')),
+        'fetched_at': time.time(),
+    }, False
+
+async def scrape_chapter(url, session: ScraperSession = None, headers: dict = {}, verbosity: int = 1, **kwargs) -> str | None:
     """
     Scrape the chapter content from a given URL.
 
     Args:
         url (str): The URL of the chapter to scrape.
+        session (ScraperSession): Pooled session to fetch through. A temporary one is used if omitted.
         headers (dict): Optional headers for the request.
         verbosity (int): Level of verbosity for logging (default is 1).
+        cached_page (dict): Optional saved copy of the page, used as an HTTP cache (see `_scrape_html`).
+        cached_content (str): Optional saved parsed content, reused if the page is unchanged.
+        save_page (Callable[[dict], None]): Optional callback saving the page whenever it was fetched or revalidated.
+        save_content (Callable[[str], None]): Optional callback saving newly parsed content.
+        parse (Callable[[str], str | None]): Extracts the chapter text from the page's HTML (default: the parser of the URL's site).
+        max_age (float): Seconds a saved page stays fresh without revalidation.
 
     Returns:
         str: The scraped chapter content or None if scraping fails.
     """
     
+    if session is None:
+        async with ScraperSession() as session:
+            return await scrape_chapter(url, session, headers, verbosity, **kwargs)
+    
     if verbosity >= 2: print(f"Scraping chapter from {url}...")
-        
-    html_content = _scrape_html(url, headers, kwargs.get('html_save_dir', None))
     
-    if not html_content:
+    cached_page = kwargs.get('cached_page', None)
+    cached_content = kwargs.get('cached_content', None)
+    save_page = kwargs.get('save_page', None)
+    save_content = kwargs.get('save_content', None)
+    parse = kwargs.get('parse') or get_site(url).parse_chapter
+    
+    page, unchanged = await _scrape_html(session, url, headers, cached_page, kwargs.get('max_age', None))
+    
+    if not page:
         if verbosity >= 1: print(f"Failed to retrieve HTML content from {url}.")
         return None
     
     if verbosity >= 2: print("HTML content retrieved successfully.")
+    if save_page and page is not cached_page: # Served from the saved copy otherwise, nothing to save
+        save_page(page)
+    
+    # Reuse the previous parse if the page has not changed
+    if unchanged and cached_content:
+        if verbosity >= 2: print("HTML content unchanged, using saved parsed content.")
+        return cached_content.strip()
     
     if verbosity >= 2: print("Parsing HTML content...")
-    parsed_content = _parse_html(html_content, kwargs.get('content_save_dir', None))
+    # Parsing is CPU-bound, keep it off the event loop
+    parsed_content = await asyncio.to_thread(parse, page['html'])
 
     if not parsed_content:
         if verbosity >= 1: print("Failed to parse HTML content.")
         return None
     
+    if save_content:
+        save_content(parsed_content)
+    
     if verbosity >= 2: print("HTML content parsed successfully.")
     if verbosity >= 2: print("Scraping completed successfully.")
     
-    return parsed_content
\ No newline at end of file
+    return parsed_content
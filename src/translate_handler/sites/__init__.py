@@ -0,0 +1,32 @@
+# Novel sites the scraper supports, keyed by link pattern: a novel's link selects the
+# adapter that builds its chapter URLs, crawls its table of contents and extracts chapter text
+from .base import SiteAdapter, TocEntry
+from .kakuyomu import KakuyomuSite
+from .syosetu import SyosetuSite
+
+_SITES: list[SiteAdapter] = [SyosetuSite(), KakuyomuSite()]
+
+def register_site(site: SiteAdapter) -> None:
+    """Add a site adapter; it takes precedence over the adapters registered before it."""
+    _SITES.insert(0, site)
+
+def find_site(link: str) -> SiteAdapter | None:
+    """The adapter of the site a novel or chapter link belongs to, or None if the site is not supported."""
+    return next((site for site in _SITES if site.matches(link)), None)
+
+def get_site(link: str) -> SiteAdapter:
+    """
+    Like `find_site`, for links that must be supported.
+
+    Raises:
+        ValueError: If no adapter matches the link.
+    """
+    site = find_site(link)
+    if site is None:
+        raise ValueError(f"Unsupported novel link: {link}. Supported sites: {', '.join(supported_sites())}.")
+    return site
+
+def supported_sites() -> list[str]:
+    return [site.name for site in _SITES]
+
+__all__ = ["SiteAdapter", "TocEntry", "find_site", "get_site", "register_site", "supported_sites"]
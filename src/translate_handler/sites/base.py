@@ -0,0 +1,126 @@
+import html
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import lxml.etree
+
+# Dates on the supported sites are shown in Japan Standard Time
+JST = timezone(timedelta(hours=9))
+
+@dataclass
+class TocEntry:
+    """A chapter listed in a novel's table of contents."""
+    idx: int
+    title: str
+    published: str | None = None
+    updated: str | None = None
+    url: str | None = None # Where the chapter is read, if it cannot be derived from `idx`
+
+    @property
+    def modified_at(self) -> float | None:
+        """Epoch time the chapter was last published or revised, if known."""
+        date = self.updated or self.published
+        if not date:
+            return None
+        return datetime.strptime(date, '%Y/%m/%d %H:%M').replace(tzinfo=JST).timestamp()
+
+class SiteAdapter(ABC):
+    """
+    What the scraper needs to know about one novel site.
+
+    An adapter claims the links matching its `link_pattern`, whose first group
+    is the novel's canonical link. It builds chapter URLs, crawls tables of
+    contents and extracts chapter text; every request goes through the caller's
+    pooled, rate-limited `ScraperSession`.
+    """
+
+    name: str = ""
+    link_pattern: re.Pattern
+
+    def matches(self, url: str) -> bool:
+        return self.link_pattern.match(url) is not None
+
+    def normalize_link(self, link: str) -> str:
+        """The canonical link to the novel a link points into, without a trailing slash."""
+        match = self.link_pattern.match(link)
+        return match.group(1) if match else link.rstrip('/')
+
+    def request_headers(self, url: str) -> dict:
+        """Headers sent with every request to the site, on top of the session's."""
+        return {}
+
+    def chapter_url(self, novel_link: str, idx: int) -> str:
+        """
+        The URL of a chapter, for chapters whose table of contents entry has none.
+
+        Raises:
+            ValueError: If the site's chapter URLs cannot be derived from the chapter index.
+        """
+        raise ValueError(f"{self.name} chapters can only be found through the table of contents.")
+
+    @abstractmethod
+    async def fetch_toc(self, session, novel_link: str, verbosity: int = 1) -> list[TocEntry] | None:
+        """
+        Crawl a novel's table of contents.
+
+        Args:
+            session (ScraperSession): The pooled session to fetch through.
+            novel_link (str): The link to the novel.
+            verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+        Returns:
+            list[TocEntry]: Every chapter of the novel in order, or None if a page could not be retrieved.
+        """
+
+    @abstractmethod
+    def parse_chapter(self, content: str) -> str | None:
+        """Extract the title and text of a chapter page as "title\\n\\nparagraphs", or None if it has neither."""
+
+def has_class(cls: str) -> str:
+    """XPath predicate matching elements with the class `cls` among others."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {cls} ")'
+
+def _escape(text: str | None) -> str:
+    return html.escape(text, quote=False) if text else ''
+
+def _is_rp(element, text: str) -> bool:
+    return element.tag == 'rp' and element.text == text and len(element) == 0 and not element.tail
+
+def element_text(element, escape: bool = False, strict: bool = False) -> str:
+    """
+    The text of an lxml element (excluding its tail), rendering ruby as `base【reading】`.
+
+    Args:
+        element (lxml.etree._Element): The element, typically a paragraph.
+        escape (bool): Keep `&`, `<` and `>` escaped, as they are in the page's markup.
+        strict (bool): Only render ruby of the exact form `base<rp>(</rp><rt>reading</rt><rp>)</rp>`,
+            keeping the text of any other ruby, <rt> and <rp> as is. Otherwise every ruby with an
+            <rt> is rendered, and ruby parentheses (<rp>) are dropped wherever they are.
+
+    Returns:
+        str: The element's text.
+    """
+    text = _escape if escape else (lambda value: value or '')
+
+    def child_text(child, skip: tuple[str, ...] = ()) -> str:
+        if child.tag is lxml.etree.Comment or child.tag in skip:
+            return text(child.tail)
+        return element_text(child, escape, strict) + text(child.tail)
+
+    if strict:
+        children = [child for child in element if child.tag is not lxml.etree.Comment or child.tail]
+        if (element.tag == 'ruby' and len(children) >= 3
+                and _is_rp(children[-3], '(') and children[-2].tag == 'rt' and not children[-2].tail
+                and _is_rp(children[-1], ')')):
+            base = text(element.text) + ''.join(child_text(child) for child in children[:-3])
+            return f"{base}【{element_text(children[-2], escape, strict)}】"
+        return text(element.text) + ''.join(child_text(child) for child in children)
+
+    if element.tag == 'ruby':
+        base = text(element.text) + ''.join(child_text(child, ('rt', 'rp')) for child in element)
+        reading = ''.join(element_text(child, escape, strict) for child in element if child.tag == 'rt')
+        return f"{base}【{reading}】" if reading else base
+
+    return text(element.text) + ''.join(child_text(child, ('rp',)) for child in element)
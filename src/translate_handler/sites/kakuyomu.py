@@ -0,0 +1,110 @@
+import json
+import re
+from datetime import datetime
+from urllib.parse import urljoin
+
+import httpx
+import lxml.etree
+import lxml.html
+
+from .base import JST, SiteAdapter, TocEntry, element_text, has_class
+
+def _format_date(value: str | None) -> str | None:
+    """Convert an ISO 8601 timestamp to the '%Y/%m/%d %H:%M' JST form used by `TocEntry`."""
+    if not value:
+        return None
+    try:
+        date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return date.astimezone(JST).strftime('%Y/%m/%d %H:%M')
+
+def _toc_from_next_data(root, work_id: str, page_url: str) -> list[TocEntry] | None:
+    """Read the episode list from the Apollo cache embedded in the work page, or None if it is not there."""
+    scripts = root.xpath('//script[@id="__NEXT_DATA__"]/text()')
+    if not scripts:
+        return None
+    try:
+        state = json.loads(scripts[0])['props']['pageProps']['__APOLLO_STATE__']
+        work = state[f"Work:{work_id}"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    def resolve(ref) -> dict:
+        return state.get(ref.get('__ref'), {}) if isinstance(ref, dict) else {}
+
+    sections = work.get('tableOfContents') or work.get('tableOfContentsV2')
+    if not sections:
+        return None
+
+    entries = []
+    for section in map(resolve, sections):
+        for episode in map(resolve, section.get('episodeUnions') or section.get('episodes') or []):
+            if not episode.get('id'):
+                continue
+            entries.append(TocEntry(idx=len(entries) + 1,
+                                    title=(episode.get('title') or '').strip(),
+                                    published=_format_date(episode.get('publishedAt')),
+                                    url=urljoin(page_url, f"/works/{work_id}/episodes/{episode['id']}")))
+    return entries
+
+def _toc_from_links(root, work_id: str, page_url: str) -> list[TocEntry]:
+    """Fall back to the episode links on the work page, in document order."""
+    entries: dict[str, TocEntry] = {}
+    pattern = re.compile(rf'/works/{work_id}/episodes/(\d+)')
+    for link in root.xpath('//a[@href]'):
+        match = pattern.search(link.get('href'))
+        if match and match.group(1) not in entries:
+            entries[match.group(1)] = TocEntry(idx=len(entries) + 1,
+                                               title=link.text_content().strip(),
+                                               url=urljoin(page_url, match.group(0)))
+    return list(entries.values())
+
+class KakuyomuSite(SiteAdapter):
+    """
+    kakuyomu.jp. Episodes are identified by opaque ids, so chapter indices are
+    positions in the table of contents, which is always crawled first.
+    """
+
+    name = "Kakuyomu"
+    link_pattern = re.compile(r'^(https?://kakuyomu\.jp/works/\d+)(?:/|$)', re.IGNORECASE)
+
+    def request_headers(self, url: str) -> dict:
+        return {'Referer': 'https://kakuyomu.jp/'}
+
+    async def fetch_toc(self, session, novel_link: str, verbosity: int = 1) -> list[TocEntry] | None:
+        """Read every episode of a work from its page (the list is not paginated)."""
+        url = self.normalize_link(novel_link)
+        work_id = url.rsplit('/', 1)[-1]
+
+        if verbosity >= 2: print(f"Fetching table of contents page {url}...")
+        try:
+            response = await session.get(url, headers=self.request_headers(url))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if verbosity >= 1: print(f"Error retrieving table of contents {url}: {e}")
+            return None
+
+        page_url = str(response.url)
+        root = lxml.html.fromstring(response.text)
+        entries = _toc_from_next_data(root, work_id, page_url)
+        return entries if entries is not None else _toc_from_links(root, work_id, page_url)
+
+    def parse_chapter(self, content: str) -> str | None:
+        try:
+            root = lxml.html.fromstring(content)
+        except (ValueError, lxml.etree.ParserError):
+            print("ERROR: Failed to parse HTML content.")
+            return None
+
+        titles = root.xpath(f'//*[{has_class("widget-episodeTitle")}]')
+        title = titles[0].text_content().strip() if titles else None
+
+        bodies = root.xpath(f'//div[{has_class("widget-episodeBody")}]')
+        paragraphs = bodies[0].iterdescendants('p') if bodies else []
+        text = '\n'.join(element_text(p).strip() for p in paragraphs).strip()
+
+        if not (title and text):
+            print("ERROR: Failed to parse HTML content.")
+            return None
+        return f"{title}\n\n{text}"
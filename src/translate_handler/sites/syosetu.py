@@ -0,0 +1,182 @@
+import re
+from urllib.parse import urljoin
+
+import httpx
+import lxml.etree
+import lxml.html
+
+from .base import SiteAdapter, TocEntry, element_text, has_class
+
+_DATE_PATTERN = re.compile(r'\d{4}/\d{2}/\d{2} \d{2}:\d{2}')
+
+# Guard against pagination loops on malformed pages
+_MAX_PAGES = 1000
+
+def parse_toc_page(content: str, page_url: str) -> tuple[list[TocEntry], str | None]:
+    """
+    Parse one page of a novel's table of contents.
+
+    Args:
+        content (str): The HTML content of the page.
+        page_url (str): The URL of the page, used to resolve links.
+
+    Returns:
+        tuple[list[TocEntry], str | None]: The chapters listed on the page, and the URL of the next page if any.
+    """
+    root = lxml.html.fromstring(content)
+
+    entries = []
+    for sublist in root.xpath(f'//div[{has_class("p-eplist__sublist")}]'):
+        links = sublist.xpath(f'.//a[{has_class("p-eplist__subtitle")}]')
+        if not links:
+            continue
+
+        match = re.search(r'/(\d+)/?$', links[0].get('href', ''))
+        if not match:
+            continue
+
+        published = updated = None
+        update_containers = sublist.xpath(f'.//div[{has_class("p-eplist__update")}]')
+        if update_containers:
+            published_match = _DATE_PATTERN.search(update_containers[0].text or '')
+            published = published_match.group(0) if published_match else None
+
+            # Revised chapters carry e.g. <span title="2024/01/01 12:00 改稿">（改）</span>
+            for span in update_containers[0].xpath('.//span[@title]'):
+                updated_match = _DATE_PATTERN.search(span.get('title'))
+                if updated_match:
+                    updated = updated_match.group(0)
+
+        entries.append(TocEntry(idx=int(match.group(1)),
+                                title=links[0].text_content().strip(),
+                                published=published,
+                                updated=updated))
+
+    next_links = root.xpath(f'//a[{has_class("c-pager__item--next")}]/@href')
+    next_url = urljoin(page_url, next_links[0]) if next_links else None
+    return entries, next_url
+
+def parse_short_story(content: str, page_url: str) -> TocEntry | None:
+    """
+    A short story (tanpen) is a single chapter shown at the novel's own link, with no table of contents.
+
+    Returns:
+        TocEntry: The story as chapter 1, or None if the page is not a short story.
+    """
+    root = lxml.html.fromstring(content)
+    if not root.xpath(f'//div[{has_class("p-novel__text")}]'):
+        return None
+    titles = root.xpath(f'//h1[{has_class("p-novel__title")}]')
+    title = titles[0].text_content().strip() if titles else ''
+    return TocEntry(idx=1, title=title, url=page_url)
+
+# The title carries a modifier class (p-novel__title--rensai on serialized chapters, another on short stories)
+_TITLE_CLASS = 'p-novel__title'
+_TEXT_CLASS = 'js-novel-text p-novel__text'
+
+_PARAGRAPH_ID = re.compile(r'^L\d+')
+
+_UTF8_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+def _text_nodes(element):
+    """The text nodes under an lxml element, skipping comments and ruby readings like BeautifulSoup's get_text."""
+    if element.tag is not lxml.etree.Comment and element.tag not in ('rt', 'rp'):
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from _text_nodes(child)
+            if child.tail:
+                yield child.tail
+
+def _extract_with_lxml(content: str) -> tuple[str | None, list[str]]:
+    """Extract the title and paragraph texts with lxml, which is several times faster than BeautifulSoup."""
+    try:
+        root = lxml.html.fromstring(content)
+    except ValueError:
+        # lxml refuses a str with an XML encoding declaration, so the page is handed over as the bytes it declares
+        root = lxml.html.fromstring(content.encode('utf-8'), parser=_UTF8_PARSER)
+
+    title_containers = root.xpath(f'//h1[{has_class(_TITLE_CLASS)}]')
+    title = None
+    if title_containers:
+        # Same as BeautifulSoup's get_text(strip=True)
+        title = ''.join(text.strip() for text in _text_nodes(title_containers[0]))
+
+    containers = root.xpath('//div[normalize-space(@class)=$cls]', cls=_TEXT_CLASS)
+    paragraphs = containers[0].iterdescendants('p') if containers else []
+    return title, [element_text(p, escape=True, strict=True) for p in paragraphs if _PARAGRAPH_ID.match(p.get('id', ''))]
+
+def parse_chapter_page(content: str) -> str | None:
+    """
+    Parse the HTML content of a chapter page to extract its title and text.
+
+    The page is parsed with lxml and only the title and novel text container are
+    walked; ruby annotations are converted while walking the tree instead of
+    re-serializing and regex-matching every paragraph. Paragraphs are rendered
+    with `element_text(escape=True, strict=True)`, which keeps `&`, `<` and `>`
+    escaped and only converts ruby of the exact form syosetu emits, so stored
+    chapters stay byte-for-byte identical to the original parser's output.
+
+    Args:
+        content (str): The HTML content of the page.
+
+    Returns:
+        str: The title and paragraphs as "title\\n\\nparagraphs", or None if the page has neither.
+    """
+    try:
+        title, paragraphs = _extract_with_lxml(content)
+    except lxml.etree.ParserError: # Empty or unparseable document
+        title, paragraphs = None, []
+
+    text = '\n'.join(paragraph.strip() for paragraph in paragraphs).strip()
+    if not (title and text):
+        print("ERROR: Failed to parse HTML content.")
+        return None
+    return f"{title}\n\n{text}".strip()
+
+class SyosetuSite(SiteAdapter):
+    """ncode.syosetu.com and its adult counterpart novel18.syosetu.com, which share their layout."""
+
+    name = "Syosetu"
+    link_pattern = re.compile(r'^(https?://(?:ncode|novel18)\.syosetu\.com/n\w+)(?:/|$)', re.IGNORECASE)
+
+    def request_headers(self, url: str) -> dict:
+        origin = re.match(r'^https?://[^/]+/', url).group(0)
+        headers = {'Referer': origin}
+        if 'novel18.' in origin:
+            headers['Cookie'] = 'over18=yes' # Skips the age confirmation page
+        return headers
+
+    def chapter_url(self, novel_link: str, idx: int) -> str:
+        return f"{novel_link}/{idx}/"
+
+    async def fetch_toc(self, session, novel_link: str, verbosity: int = 1) -> list[TocEntry] | None:
+        """Crawl every page of a novel's table of contents (`?p=N` pagination)."""
+        url = novel_link.rstrip('/') + '/'
+        entries: dict[int, TocEntry] = {}
+
+        for page in range(_MAX_PAGES):
+            if verbosity >= 2: print(f"Fetching table of contents page {url}...")
+            try:
+                response = await session.get(url, headers=self.request_headers(url))
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                if verbosity >= 1: print(f"Error retrieving table of contents {url}: {e}")
+                return None
+
+            page_url = str(response.url)
+            page_entries, url = parse_toc_page(response.text, page_url)
+            if page == 0 and not page_entries and not url:
+                story = parse_short_story(response.text, page_url)
+                if story:
+                    return [story]
+
+            for entry in page_entries:
+                entries[entry.idx] = entry
+            if not url:
+                break
+
+        return sorted(entries.values(), key=lambda entry: entry.idx)
+
+    def parse_chapter(self, content: str) -> str | None:
+        return parse_chapter_page(content)
@@ -0,0 +1,4 @@
+from .library import FAILED, FETCHED, LISTED, PARSED, TRANSLATED, Storage
+from .migration import migrate_from_files
+
+__all__ = ["Storage", "migrate_from_files", "LISTED", "FETCHED", "PARSED", "TRANSLATED", "FAILED"]
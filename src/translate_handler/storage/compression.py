@@ -0,0 +1,187 @@
+import os
+import time
+
+import zstandard
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    novel_id INTEGER NOT NULL REFERENCES novels(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    data BLOB NOT NULL,
+    trained_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dictionaries_by_novel ON dictionaries (novel_id, kind, id);
+"""
+
+# Compressed columns by kind: (table, column)
+_COMPRESSED = {'html': ('pages', 'html'), 'content': ('contents', 'content')}
+
+# Pages of a novel share most of their markup (navigation, scripts, ads), so a zstd
+# dictionary trained on a few of them compresses the rest several times better
+_COMPRESSION_LEVEL = 10
+_DICTIONARY_SIZE = 112 * 1024
+_TRAIN_MIN_SAMPLES = 16
+_TRAIN_MAX_SAMPLES = 128
+
+class CompressionMixin:
+    """
+    zstd compression of the stored pages and parsed contents, for `Storage`.
+
+    Rows are compressed one frame per chapter, so any chapter is still read with a single
+    lookup. Once a novel has enough rows of a kind, a dictionary is trained on them and
+    used for that novel from then on.
+    """
+
+    def compact(self, novel_name: str | None = None, vacuum: bool = True, verbosity: int = 1) -> None:
+        """
+        Retrain the compression dictionaries and recompress every stored page and parsed content.
+
+        Args:
+            novel_name (str): Only compact this novel (default: every novel).
+            vacuum (bool): Return the freed space to the file system afterwards.
+            verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+        """
+        names = [novel_name] if novel_name else [name for name, _ in self.list_novels()]
+        size = os.path.getsize(self.path)
+        for name in names:
+            for kind in _COMPRESSED:
+                recompressed = self._train(self._novel_id(name), kind, only_untrained=False)
+                if verbosity >= 2:
+                    print(f"Recompressed {recompressed} {kind} rows of '{name}'.")
+        if vacuum:
+            self._connection().execute("VACUUM")
+        if verbosity >= 1:
+            print(f"Compacted {len(names)} novels: {size / 2**20:.1f} MB -> {os.path.getsize(self.path) / 2**20:.1f} MB.")
+
+    def _put_compressed(self, novel_id: int, kind: str, text: str, write) -> None:
+        """
+        Compress `text` and store it with `write(conn, value, dict_id)` in one transaction.
+
+        Another process may have compacted the novel and dropped the dictionary cached here.
+        The dictionary is checked after the write, when a compaction can no longer drop it;
+        if it is gone, the write is rolled back and repeated with the current dictionary.
+        """
+        while True:
+            value, dict_id = self._compress(novel_id, kind, text)
+            with self._connection() as conn:
+                write(conn, value, dict_id)
+                if dict_id is None or conn.execute("SELECT 1 FROM dictionaries WHERE id = ?", (dict_id,)).fetchone():
+                    return
+                conn.rollback()
+            self._forget_dictionary(novel_id, kind)
+
+    def _compress(self, novel_id: int, kind: str, text: str) -> tuple[bytes, int | None]:
+        dict_id = self._dictionary_id(novel_id, kind)
+        compressor = self._codec(zstandard.ZstdCompressor, dict_id)
+        if compressor is None: # Dropped by a compaction in another process
+            self._forget_dictionary(novel_id, kind)
+            return self._compress(novel_id, kind, text)
+        return compressor.compress(text.encode('utf-8')), dict_id
+
+    def _decompress(self, value: bytes | str, dict_id: int | None) -> str:
+        if isinstance(value, str): # Stored before compression was introduced
+            return value
+        decompressor = self._codec(zstandard.ZstdDecompressor, dict_id)
+        if decompressor is None:
+            raise LookupError(f"Compression dictionary {dict_id} no longer exists; the row was recompressed while being read.")
+        return decompressor.decompress(value).decode('utf-8')
+
+    def _codec(self, kind: type, dict_id: int | None):
+        """
+        Return this thread's compressor or decompressor for a dictionary (they are not thread-safe),
+        or None if the dictionary no longer exists.
+        """
+        codecs = getattr(self._local, 'codecs', None)
+        if codecs is None:
+            codecs = self._local.codecs = {}
+
+        if (kind, dict_id) not in codecs:
+            options = {'level': _COMPRESSION_LEVEL} if kind is zstandard.ZstdCompressor else {}
+            if dict_id is not None:
+                row = self._connection().execute("SELECT data FROM dictionaries WHERE id = ?", (dict_id,)).fetchone()
+                if row is None:
+                    return None
+                options['dict_data'] = zstandard.ZstdCompressionDict(row['data'])
+            codecs[kind, dict_id] = kind(**options)
+        return codecs[kind, dict_id]
+
+    def _dictionary_id(self, novel_id: int, kind: str) -> int | None:
+        """The dictionary new rows of a novel are compressed with, if one was trained."""
+        dict_id = self._dictionary_ids.get((novel_id, kind))
+        if dict_id is None:
+            # Not cached until found, so a dictionary trained by another process is picked up
+            row = self._connection().execute("SELECT MAX(id) AS id FROM dictionaries WHERE novel_id = ? AND kind = ?",
+                                             (novel_id, kind)).fetchone()
+            dict_id = row['id']
+            if dict_id is not None:
+                self._dictionary_ids[novel_id, kind] = dict_id
+        return dict_id
+
+    def _forget_dictionary(self, novel_id: int, kind: str) -> None:
+        dict_id = self._dictionary_ids.pop((novel_id, kind), None)
+        codecs = getattr(self._local, 'codecs', {})
+        codecs.pop((zstandard.ZstdCompressor, dict_id), None)
+
+    def _train_if_ready(self, novel_id: int, kind: str) -> None:
+        if self._dictionary_id(novel_id, kind) is not None:
+            return
+
+        table, _ = _COMPRESSED[kind]
+        row = self._connection().execute(f"SELECT COUNT(*) AS n FROM {table} WHERE novel_id = ?", (novel_id,)).fetchone()
+        if row['n'] >= _TRAIN_MIN_SAMPLES:
+            self._train(novel_id, kind)
+
+    def _train(self, novel_id: int, kind: str, only_untrained: bool = True, batch_size: int = 256) -> int:
+        """
+        Train a novel's dictionary for a kind of content on a sample of its stored rows, then
+        recompress the rows with it (only those compressed without a dictionary, if `only_untrained`),
+        a batch at a time.
+
+        Returns:
+            int: The number of rows recompressed.
+        """
+        table, column = _COMPRESSED[kind]
+        conn = self._connection()
+
+        # Sample evenly across the novel, reading only the sampled rows
+        idxs = [row['idx'] for row in conn.execute(f"SELECT idx FROM {table} WHERE novel_id = ? ORDER BY idx", (novel_id,))]
+        sampled = idxs[::max(1, len(idxs) // _TRAIN_MAX_SAMPLES)]
+        rows = conn.execute(f"SELECT {column} AS value, dict_id FROM {table} "
+                            f"WHERE novel_id = ? AND idx IN ({', '.join('?' * len(sampled))}) LIMIT ?",
+                            [novel_id, *sampled, _TRAIN_MAX_SAMPLES]).fetchall()
+        samples = [self._decompress(row['value'], row['dict_id']).encode('utf-8') for row in rows]
+        try:
+            data = zstandard.train_dictionary(_DICTIONARY_SIZE, samples).as_bytes()
+        except zstandard.ZstdError:
+            return 0 # Too few or too small samples, keep compressing without a dictionary
+
+        with conn:
+            dict_id = conn.execute("INSERT INTO dictionaries (novel_id, kind, data, trained_at) VALUES (?, ?, ?, ?)",
+                                   (novel_id, kind, data, time.time())).lastrowid
+        self._dictionary_ids[novel_id, kind] = dict_id
+        compressor = self._codec(zstandard.ZstdCompressor, dict_id)
+
+        untrained = " AND dict_id IS NULL" if only_untrained else ""
+        idxs = [row['idx'] for row in conn.execute(f"SELECT idx FROM {table} WHERE novel_id = ? AND "
+                                                   f"(dict_id IS NULL OR dict_id != ?){untrained} ORDER BY idx",
+                                                   (novel_id, dict_id))]
+        recompressed = 0
+        for start in range(0, len(idxs), batch_size):
+            batch = idxs[start:start + batch_size]
+            rows = conn.execute(f"SELECT idx, {column} AS value, dict_id FROM {table} "
+                                f"WHERE novel_id = ? AND idx IN ({', '.join('?' * len(batch))})",
+                                [novel_id, *batch]).fetchall()
+            with conn:
+                # Rows rewritten since they were read keep their new value
+                recompressed += conn.executemany(
+                    f"UPDATE {table} SET {column} = ?, dict_id = ? WHERE novel_id = ? AND idx = ? AND {column} = ?",
+                    [(compressor.compress(self._decompress(row['value'], row['dict_id']).encode('utf-8')),
+                      dict_id, novel_id, row['idx'], row['value']) for row in rows]).rowcount
+
+        # Drop dictionaries no row refers to anymore
+        with conn:
+            conn.execute(f"DELETE FROM dictionaries WHERE novel_id = ? AND kind = ? AND id != ? "
+                         f"AND id NOT IN (SELECT dict_id FROM {table} WHERE novel_id = ? AND dict_id IS NOT NULL)",
+                         (novel_id, kind, dict_id, novel_id))
+        return recompressed
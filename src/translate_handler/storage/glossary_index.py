@@ -0,0 +1,88 @@
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS glossary_scans (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    parsed_at REAL NOT NULL,
+    PRIMARY KEY (novel_id, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS glossary_occurrences (
+    novel_id INTEGER NOT NULL,
+    term TEXT NOT NULL,
+    reading TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (novel_id, term, reading, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS glossary_occurrences_by_chapter ON glossary_occurrences (novel_id, idx);
+"""
+
+class GlossaryIndexMixin:
+    """Index of the ruby-annotated terms found in each chapter's parsed content, for `Storage`."""
+
+    def iter_unscanned_contents(self, novel_name: str, batch_size: int = 256):
+        """
+        Yield the parsed content of chapters that are not in the glossary index yet,
+        or were re-parsed since they were indexed, in batches.
+
+        Args:
+            novel_name (str): The name of the novel.
+            batch_size (int): Number of chapters per batch (default: 256).
+
+        Yields:
+            list[tuple[int, float, str]]: (idx, parsed_at, content) of each chapter in the batch.
+        """
+        novel_id = self._novel_id(novel_name)
+        conn = self._connection()
+        # Collect the chapters up front, since the caller updates glossary_scans between batches
+        idxs = [row['idx'] for row in conn.execute(
+            "SELECT contents.idx AS idx FROM contents "
+            "LEFT JOIN glossary_scans ON glossary_scans.novel_id = contents.novel_id AND glossary_scans.idx = contents.idx "
+            "WHERE contents.novel_id = ? AND (glossary_scans.parsed_at IS NULL OR glossary_scans.parsed_at < contents.parsed_at) "
+            "ORDER BY contents.idx", (novel_id,))]
+
+        for start in range(0, len(idxs), batch_size):
+            batch = idxs[start:start + batch_size]
+            rows = conn.execute(f"SELECT idx, parsed_at, content, dict_id FROM contents "
+                                f"WHERE novel_id = ? AND idx IN ({', '.join('?' * len(batch))}) ORDER BY idx",
+                                [novel_id, *batch]).fetchall()
+            yield [(row['idx'], row['parsed_at'], self._decompress(row['content'], row['dict_id'])) for row in rows]
+
+    def put_glossary_occurrences(self, novel_name: str, scans: list[tuple[int, float, dict[tuple[str, str], int]]]) -> None:
+        """
+        Replace the indexed terms of the given chapters.
+
+        Args:
+            novel_name (str): The name of the novel.
+            scans (list): (idx, parsed_at, {(term, reading): count}) for each scanned chapter,
+                where `parsed_at` is the version of the content that was scanned.
+        """
+        novel_id = self._novel_id(novel_name)
+        with self._connection() as conn:
+            conn.executemany("DELETE FROM glossary_occurrences WHERE novel_id = ? AND idx = ?",
+                             [(novel_id, idx) for idx, _, _ in scans])
+            conn.executemany("INSERT INTO glossary_occurrences (novel_id, term, reading, idx, count) VALUES (?, ?, ?, ?, ?)",
+                             [(novel_id, term, reading, idx, count)
+                              for idx, _, terms in scans for (term, reading), count in terms.items()])
+            conn.executemany("INSERT OR REPLACE INTO glossary_scans (novel_id, idx, parsed_at) VALUES (?, ?, ?)",
+                             [(novel_id, idx, parsed_at) for idx, parsed_at, _ in scans])
+
+    def list_glossary_terms(self, novel_name: str, min_chapters: int = 1, limit: int | None = None) -> list[dict]:
+        """
+        Args:
+            novel_name (str): The name of the novel.
+            min_chapters (int): Only list terms annotated in at least this many chapters (default: 1).
+            limit (int): Maximum number of terms (default: no limit).
+
+        Returns:
+            list[dict]: Indexed terms (term, reading, count, chapters, first_idx), the most widespread first.
+        """
+        query = ("SELECT term, reading, SUM(count) AS count, COUNT(*) AS chapters, MIN(idx) AS first_idx "
+                 "FROM glossary_occurrences WHERE novel_id = ? GROUP BY term, reading HAVING COUNT(*) >= ? "
+                 "ORDER BY chapters DESC, count DESC, first_idx")
+        params = [self._novel_id(novel_name), min_chapters]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._connection().execute(query, params)]
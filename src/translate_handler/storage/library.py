@@ -0,0 +1,516 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .compression import _COMPRESSED, CompressionMixin
+from .compression import _SCHEMA as _COMPRESSION_SCHEMA
+from .glossary_index import _SCHEMA as _GLOSSARY_SCHEMA
+from .glossary_index import GlossaryIndexMixin
+from .migration import migrate_from_files
+from .search import _SCHEMA as _SEARCH_SCANS_SCHEMA
+from .search import _SEARCH_SCHEMA, SearchMixin
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS novels (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    link TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chapters (
+    novel_id INTEGER NOT NULL REFERENCES novels(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    title TEXT,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (novel_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chapters_by_status ON chapters (novel_id, status, idx);
+CREATE TABLE IF NOT EXISTS pages (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    html TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    max_age REAL NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL,
+    dict_id INTEGER,
+    PRIMARY KEY (novel_id, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contents (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    parsed_at REAL NOT NULL,
+    dict_id INTEGER,
+    PRIMARY KEY (novel_id, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS translations (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    translation TEXT NOT NULL,
+    alignment TEXT,
+    translated_at REAL NOT NULL,
+    PRIMARY KEY (novel_id, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chapter_index (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    title TEXT,
+    words INTEGER NOT NULL,
+    translated_at REAL NOT NULL,
+    PRIMARY KEY (novel_id, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dead_letters (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL,
+    failed_at REAL NOT NULL,
+    PRIMARY KEY (novel_id, idx),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    name TEXT PRIMARY KEY,
+    novel_id INTEGER NOT NULL REFERENCES novels(id) ON DELETE CASCADE,
+    model TEXT NOT NULL,
+    chapters TEXT NOT NULL,
+    state TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    finished_at REAL
+);
+"""
+_SCHEMA_VERSION = 2
+
+# Chapter statuses, in pipeline order
+LISTED, FETCHED, PARSED, TRANSLATED, FAILED = "listed", "fetched", "parsed", "translated", "failed"
+
+class Storage(CompressionMixin, GlossaryIndexMixin, SearchMixin):
+    """
+    SQLite store of the novel catalog and every chapter's raw HTML, parsed content,
+    translation and status.
+
+    Everything lives in one database file (`library.db` in the storage directory)
+    in WAL mode, so the UI can read while a translation run writes, and listing the
+    chapters of a novel is an indexed query instead of a directory scan. Each thread
+    gets its own connection, shared by the compression, glossary index and search
+    mixins. Libraries in the previous file layout are imported with `migrate()`.
+    """
+
+    FILENAME = "library.db"
+
+    def __init__(self, storage_path: str):
+        """
+        Args:
+            storage_path (str): Path to the storage directory.
+        """
+        self.storage_path = storage_path
+        self.path = os.path.join(storage_path, self.FILENAME)
+        self._local = threading.local()
+        self._novel_ids: dict[str, int] = {}
+        self._dictionary_ids: dict[tuple[int, str], int | None] = {}
+
+        os.makedirs(storage_path, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            for schema in (_COMPRESSION_SCHEMA, _GLOSSARY_SCHEMA, _SEARCH_SCANS_SCHEMA):
+                conn.executescript(schema)
+            self._upgrade_schema(conn)
+            try:
+                conn.execute(_SEARCH_SCHEMA)
+                self.search_available = True
+            except sqlite3.OperationalError:
+                self.search_available = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _upgrade_schema(conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            # Libraries created before compression keep their plain text rows until compacted
+            for table, _ in _COMPRESSED.values():
+                columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if 'dict_id' not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN dict_id INTEGER")
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def migrate(self, verbosity: int = 1) -> int:
+        """
+        Import the previous file layout (`novels.csv` and the per-chapter files) of the
+        storage directory, unless it was imported before.
+
+        Args:
+            verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+        Returns:
+            int: Number of translated chapters imported.
+        """
+        if self.get_meta('migrated_from_files') is not None:
+            return 0
+        imported = migrate_from_files(self, verbosity)
+        self.set_meta('migrated_from_files', str(time.time()))
+        return imported
+
+    def get_meta(self, key: str) -> str | None:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # Novels
+
+    def add_novel(self, name: str, link: str) -> None:
+        """Add a novel to the catalog, or update the link of an existing one."""
+        with self._connection() as conn:
+            conn.execute("INSERT INTO novels (name, link, added_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT (name) DO UPDATE SET link = excluded.link",
+                         (name, link, time.time()))
+
+    def list_novels(self) -> list[tuple[str, str]]:
+        """
+        Returns:
+            list[tuple[str, str]]: (name, link) of every novel in the catalog, in the order they were added.
+        """
+        rows = self._connection().execute("SELECT name, link FROM novels ORDER BY id").fetchall()
+        return [(row['name'], row['link']) for row in rows]
+
+    def get_novel_link(self, name: str) -> str | None:
+        """Return the link of a novel, or None if it is not in the catalog."""
+        row = self._connection().execute("SELECT link FROM novels WHERE name = ?", (name,)).fetchone()
+        return row['link'] if row else None
+
+    def _novel_id(self, name: str) -> int:
+        if name not in self._novel_ids:
+            row = self._connection().execute("SELECT id FROM novels WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise KeyError(f"Novel '{name}' is not in the catalog.")
+            self._novel_ids[name] = row['id']
+        return self._novel_ids[name]
+
+    # Chapters
+
+    def list_chapters(self, novel_name: str, status: str | None = None) -> list[int]:
+        """
+        List the chapters of a novel known to the store.
+
+        Args:
+            novel_name (str): The name of the novel.
+            status (str): Only list chapters with this status (e.g. `TRANSLATED`).
+
+        Returns:
+            list[int]: Chapter indices in ascending order.
+        """
+        query, params = "SELECT idx FROM chapters WHERE novel_id = ?", [self._novel_id(novel_name)]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        return [row['idx'] for row in self._connection().execute(query + " ORDER BY idx", params)]
+
+    def get_status(self, novel_name: str, idx: int) -> str | None:
+        row = self._connection().execute("SELECT status FROM chapters WHERE novel_id = ? AND idx = ?",
+                                         (self._novel_id(novel_name), idx)).fetchone()
+        return row['status'] if row else None
+
+    def set_status(self, novel_name: str, idx: int, status: str) -> None:
+        with self._connection() as conn:
+            self._upsert_chapter(conn, self._novel_id(novel_name), idx, status)
+
+    def set_titles(self, novel_name: str, titles: dict[int, str]) -> None:
+        """Record chapter titles (e.g. from the table of contents), listing chapters not seen before."""
+        novel_id, now = self._novel_id(novel_name), time.time()
+        with self._connection() as conn:
+            conn.executemany("INSERT INTO chapters (novel_id, idx, title, status, updated_at) VALUES (?, ?, ?, ?, ?) "
+                             "ON CONFLICT (novel_id, idx) DO UPDATE SET title = excluded.title",
+                             [(novel_id, idx, title, LISTED, now) for idx, title in titles.items()])
+
+    @staticmethod
+    def _upsert_chapter(conn: sqlite3.Connection, novel_id: int, idx: int, status: str) -> None:
+        conn.execute("INSERT INTO chapters (novel_id, idx, status, updated_at) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT (novel_id, idx) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                     (novel_id, idx, status, time.time()))
+
+    # Raw HTML, doubling as the HTTP cache of chapter pages
+
+    def get_page(self, novel_name: str, idx: int) -> dict | None:
+        """
+        Returns:
+            dict: The saved page of a chapter with its HTTP cache metadata
+                (url, html, etag, last_modified, max_age, fetched_at), or None.
+        """
+        row = self._connection().execute("SELECT url, html, etag, last_modified, max_age, fetched_at, dict_id FROM pages "
+                                         "WHERE novel_id = ? AND idx = ?",
+                                         (self._novel_id(novel_name), idx)).fetchone()
+        if not row:
+            return None
+        page = dict(row)
+        page['html'] = self._decompress(page.pop('html'), page.pop('dict_id'))
+        return page
+
+    def put_page(self, novel_name: str, idx: int, page: dict) -> None:
+        """Save a chapter page (see `get_page`). Pages revalidated without changes are stored the same way."""
+        novel_id = self._novel_id(novel_name)
+
+        def write(conn: sqlite3.Connection, html: bytes, dict_id: int | None) -> None:
+            if self._chapter_status(conn, novel_id, idx) in (None, LISTED, FAILED):
+                self._upsert_chapter(conn, novel_id, idx, FETCHED)
+            conn.execute("INSERT OR REPLACE INTO pages "
+                         "(novel_id, idx, url, html, etag, last_modified, max_age, fetched_at, dict_id) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (novel_id, idx, page['url'], html, page.get('etag'), page.get('last_modified'),
+                          page.get('max_age', 0), page['fetched_at'], dict_id))
+
+        self._put_compressed(novel_id, 'html', page['html'], write)
+        self._train_if_ready(novel_id, 'html')
+
+    # Parsed content
+
+    def get_content(self, novel_name: str, idx: int) -> str | None:
+        row = self._connection().execute("SELECT content, dict_id FROM contents WHERE novel_id = ? AND idx = ?",
+                                         (self._novel_id(novel_name), idx)).fetchone()
+        return self._decompress(row['content'], row['dict_id']) if row else None
+
+    def put_content(self, novel_name: str, idx: int, content: str) -> None:
+        novel_id, now = self._novel_id(novel_name), time.time()
+
+        def write(conn: sqlite3.Connection, compressed: bytes, dict_id: int | None) -> None:
+            if self._chapter_status(conn, novel_id, idx) != TRANSLATED:
+                self._upsert_chapter(conn, novel_id, idx, PARSED)
+            conn.execute("INSERT OR REPLACE INTO contents (novel_id, idx, content, parsed_at, dict_id) VALUES (?, ?, ?, ?, ?)",
+                         (novel_id, idx, compressed, now, dict_id))
+            self._index_search(conn, novel_id, idx, 'content', content, now)
+
+        self._put_compressed(novel_id, 'content', content, write)
+        self._train_if_ready(novel_id, 'content')
+
+    # Translations
+
+    def has_translation(self, novel_name: str, idx: int) -> bool:
+        row = self._connection().execute("SELECT 1 FROM translations WHERE novel_id = ? AND idx = ?",
+                                         (self._novel_id(novel_name), idx)).fetchone()
+        return row is not None
+
+    def get_translation(self, novel_name: str, idx: int) -> str | None:
+        row = self._connection().execute("SELECT translation FROM translations WHERE novel_id = ? AND idx = ?",
+                                         (self._novel_id(novel_name), idx)).fetchone()
+        return row['translation'] if row else None
+
+    def get_alignment(self, novel_name: str, idx: int) -> dict | None:
+        """Return the paragraph alignment of a chapter's translation (see `incremental.make_alignment`), if any."""
+        row = self._connection().execute("SELECT alignment FROM translations WHERE novel_id = ? AND idx = ?",
+                                         (self._novel_id(novel_name), idx)).fetchone()
+        if not row or not row['alignment']:
+            return None
+        return json.loads(row['alignment'])
+
+    def put_translation(self, novel_name: str, idx: int, translation: str, alignment: dict | None = None) -> None:
+        """Save a chapter's translation, along with its paragraph alignment to the source if it has one."""
+        novel_id, now = self._novel_id(novel_name), time.time()
+        with self._connection() as conn:
+            self._upsert_chapter(conn, novel_id, idx, TRANSLATED)
+            conn.execute("DELETE FROM dead_letters WHERE novel_id = ? AND idx = ?", (novel_id, idx))
+            conn.execute("INSERT OR REPLACE INTO translations (novel_id, idx, translation, alignment, translated_at) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (novel_id, idx, translation,
+                          json.dumps(alignment, ensure_ascii=False) if alignment else None, now))
+            self._index_chapter(conn, novel_id, idx, translation, now)
+            self._index_search(conn, novel_id, idx, 'translation', translation, now)
+
+    # Chapter index: translated title and word count of each translation, for listing chapters without reading them
+
+    @staticmethod
+    def _index_chapter(conn: sqlite3.Connection, novel_id: int, idx: int, translation: str, translated_at: float) -> None:
+        title = next((line.strip() for line in translation.splitlines() if line.strip()), None)
+        conn.execute("INSERT OR REPLACE INTO chapter_index (novel_id, idx, title, words, translated_at) VALUES (?, ?, ?, ?, ?)",
+                     (novel_id, idx, title, len(translation.split()), translated_at))
+
+    def update_chapter_index(self, novel_name: str, batch_size: int = 256) -> int:
+        """
+        Index the translations of a novel that are not in the chapter index yet, e.g. those
+        saved before it existed. Translations saved since are indexed as they are written.
+
+        Args:
+            novel_name (str): The name of the novel.
+            batch_size (int): Number of translations read per transaction (default: 256).
+
+        Returns:
+            int: The number of chapters indexed.
+        """
+        novel_id = self._novel_id(novel_name)
+        conn = self._connection()
+        idxs = [row['idx'] for row in conn.execute(
+            "SELECT translations.idx AS idx FROM translations "
+            "LEFT JOIN chapter_index ON chapter_index.novel_id = translations.novel_id AND chapter_index.idx = translations.idx "
+            "WHERE translations.novel_id = ? AND (chapter_index.translated_at IS NULL OR chapter_index.translated_at < translations.translated_at)",
+            (novel_id,))]
+
+        for start in range(0, len(idxs), batch_size):
+            batch = idxs[start:start + batch_size]
+            with conn:
+                rows = conn.execute(f"SELECT idx, translation, translated_at FROM translations "
+                                    f"WHERE novel_id = ? AND idx IN ({', '.join('?' * len(batch))})",
+                                    [novel_id, *batch]).fetchall()
+                for row in rows:
+                    self._index_chapter(conn, novel_id, row['idx'], row['translation'], row['translated_at'])
+        return len(idxs)
+
+    def count_chapter_list(self, novel_name: str, search: str | None = None) -> int:
+        """Number of chapters `list_chapter_page` pages through."""
+        query, params = self._chapter_list_query(novel_name, search)
+        return self._connection().execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+    def list_chapter_page(self,
+                          novel_name: str,
+                          offset: int,
+                          limit: int,
+                          search: str | None = None,
+                          descending: bool = True) -> list[dict]:
+        """
+        List one page of a novel's chapters with their metadata, read from the chapter index.
+
+        Args:
+            novel_name (str): The name of the novel.
+            offset (int): Number of chapters to skip.
+            limit (int): Maximum number of chapters.
+            search (str): Only list chapters whose translated or original title contains this text, ignoring case,
+                or whose number it is.
+            descending (bool): List the latest chapters first (default: True).
+
+        Returns:
+            list[dict]: The chapters (idx, title, status, words), where `title` is the translated
+                title if there is one and `words` is None for untranslated chapters.
+        """
+        query, params = self._chapter_list_query(novel_name, search)
+        order = "DESC" if descending else "ASC"
+        rows = self._connection().execute(f"{query} ORDER BY chapters.idx {order} LIMIT ? OFFSET ?",
+                                          [*params, limit, offset])
+        return [dict(row) for row in rows]
+
+    def _chapter_list_query(self, novel_name: str, search: str | None) -> tuple[str, list]:
+        query = ("SELECT chapters.idx AS idx, COALESCE(chapter_index.title, chapters.title) AS title, "
+                 "chapters.status AS status, chapter_index.words AS words "
+                 "FROM chapters LEFT JOIN chapter_index "
+                 "ON chapter_index.novel_id = chapters.novel_id AND chapter_index.idx = chapters.idx "
+                 "WHERE chapters.novel_id = ?")
+        params = [self._novel_id(novel_name)]
+        if search:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            query += " AND (chapter_index.title LIKE ? ESCAPE '\\' OR chapters.title LIKE ? ESCAPE '\\' OR chapters.idx = ?)"
+            params += [pattern, pattern, int(search) if search.strip().isdigit() else -1]
+        return query, params
+
+    # Dead letters: chapters that failed, kept to be retried later
+
+    def add_dead_letter(self, novel_name: str, idx: int, reason: str, error: str | None = None) -> None:
+        """
+        Record that a chapter failed. The entry is removed once the chapter is translated.
+
+        Args:
+            novel_name (str): The name of the novel.
+            idx (int): Chapter index.
+            reason (str): Short cause, e.g. "scrape", "blocked", "http_429" (see `retry.GeminiError`).
+            error (str): The error message.
+        """
+        novel_id = self._novel_id(novel_name)
+        with self._connection() as conn:
+            if self._chapter_status(conn, novel_id, idx) is None:
+                self._upsert_chapter(conn, novel_id, idx, FAILED)
+            conn.execute("INSERT INTO dead_letters (novel_id, idx, reason, error, attempts, failed_at) VALUES (?, ?, ?, ?, 1, ?) "
+                         "ON CONFLICT (novel_id, idx) DO UPDATE SET reason = excluded.reason, error = excluded.error, "
+                         "attempts = attempts + 1, failed_at = excluded.failed_at",
+                         (novel_id, idx, reason, error, time.time()))
+
+    def list_dead_letters(self, novel_name: str | None = None) -> list[dict]:
+        """
+        Args:
+            novel_name (str): Only list chapters of this novel (default: every novel).
+
+        Returns:
+            list[dict]: The failed chapters (novel, idx, reason, error, attempts, failed_at), oldest failure first.
+        """
+        query = ("SELECT novels.name AS novel, idx, reason, error, attempts, failed_at "
+                 "FROM dead_letters JOIN novels ON novels.id = dead_letters.novel_id")
+        params = []
+        if novel_name is not None:
+            query += " WHERE novel_id = ?"
+            params.append(self._novel_id(novel_name))
+        return [dict(row) for row in self._connection().execute(query + " ORDER BY failed_at", params)]
+
+    # Batch jobs: chapters submitted to the Gemini Batch API, kept until their results are ingested
+
+    def add_batch_job(self, name: str, novel_name: str, model: str, chapters: list[dict]) -> None:
+        """
+        Record a submitted batch job, so an interrupted run can collect its results later.
+
+        Args:
+            name (str): The job name returned by the batch backend.
+            novel_name (str): The name of the novel.
+            model (str): The model the job runs on.
+            chapters (list[dict]): The submitted chapters as {"idx": int, "cache_key": str} entries.
+        """
+        with self._connection() as conn:
+            conn.execute("INSERT INTO batch_jobs (name, novel_id, model, chapters, state, submitted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                         (name, self._novel_id(novel_name), model, json.dumps(chapters), "pending", time.time()))
+
+    def list_batch_jobs(self, novel_name: str | None = None, unfinished: bool = True) -> list[dict]:
+        """
+        Args:
+            novel_name (str): Only list jobs of this novel (default: every novel).
+            unfinished (bool): Only list jobs whose results were not ingested yet (default: True).
+
+        Returns:
+            list[dict]: The jobs (name, novel, model, chapters, state, submitted_at, finished_at), oldest first.
+        """
+        query = ("SELECT batch_jobs.name AS name, novels.name AS novel, model, chapters, state, submitted_at, finished_at "
+                 "FROM batch_jobs JOIN novels ON novels.id = batch_jobs.novel_id WHERE 1")
+        params = []
+        if novel_name is not None:
+            query += " AND novel_id = ?"
+            params.append(self._novel_id(novel_name))
+        if unfinished:
+            query += " AND finished_at IS NULL"
+        jobs = [dict(row) for row in self._connection().execute(query + " ORDER BY submitted_at", params)]
+        for job in jobs:
+            job['chapters'] = json.loads(job['chapters'])
+        return jobs
+
+    def finish_batch_job(self, name: str, state: str) -> None:
+        """Mark a batch job as finished with its final state, once its results were ingested."""
+        with self._connection() as conn:
+            conn.execute("UPDATE batch_jobs SET state = ?, finished_at = ? WHERE name = ?", (state, time.time(), name))
+
+    @staticmethod
+    def _chapter_status(conn: sqlite3.Connection, novel_id: int, idx: int) -> str | None:
+        row = conn.execute("SELECT status FROM chapters WHERE novel_id = ? AND idx = ?", (novel_id, idx)).fetchone()
+        return row['status'] if row else None
+
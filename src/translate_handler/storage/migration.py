@@ -0,0 +1,78 @@
+import csv
+import glob
+import json
+import os
+import re
+
+from .. import incremental
+
+def _read_file(path: str) -> str | None:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def migrate_from_files(storage, verbosity: int = 1) -> int:
+    """
+    Import the file-based layout (`novels.csv` plus `raw_html/`, `raw_content/`,
+    `translation/` and `alignment/` per novel) into the store. The files are left
+    in place. Importing again is harmless: rows are overwritten with the same data.
+
+    Args:
+        storage (Storage): The store to import into.
+        verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+    Returns:
+        int: Number of chapters imported.
+    """
+    catalog_path = os.path.join(storage.storage_path, "novels.csv")
+    if not os.path.exists(catalog_path):
+        return 0
+
+    with open(catalog_path, 'r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        novels = [(row[0].strip(), row[1].strip().strip('"')) for row in reader
+                  if len(row) >= 2 and row[0].strip() and row[1].strip()]
+
+    imported = 0
+    for name, link in novels:
+        storage.add_novel(name, link)
+        novel_dir = os.path.join(storage.storage_path, name)
+
+        for path in glob.glob(os.path.join(novel_dir, "raw_html", "Chapter_*.html")):
+            match = re.search(r'Chapter_(\d+)\.html$', path)
+            html = _read_file(path)
+            if not match or html is None:
+                continue
+            meta_path = os.path.splitext(path)[0] + ".meta.json"
+            meta = json.loads(_read_file(meta_path) or '{}') if os.path.exists(meta_path) else {}
+            storage.put_page(name, int(match.group(1)), {
+                'url': meta.get('url') or f"{link.rstrip('/')}/{match.group(1)}/",
+                'html': html,
+                'etag': meta.get('etag'),
+                'last_modified': meta.get('last_modified'),
+                'max_age': meta.get('max_age', 0),
+                'fetched_at': meta.get('fetched_at', os.path.getmtime(path)),
+            })
+
+        for path in glob.glob(os.path.join(novel_dir, "raw_content", "Chapter_*.txt")):
+            match = re.search(r'Chapter_(\d+)\.txt$', path)
+            content = _read_file(path)
+            if match and content is not None:
+                storage.put_content(name, int(match.group(1)), content.strip())
+
+        for path in glob.glob(os.path.join(novel_dir, "translation", "*_translated.txt")):
+            match = re.search(r'Chapter_(\d+)_translated\.txt$', path, re.IGNORECASE)
+            translation = _read_file(path)
+            if not match or translation is None:
+                continue
+            idx = int(match.group(1))
+            alignment = incremental.load_alignment(os.path.join(novel_dir, "alignment", f"Chapter_{idx}.json"))
+            storage.put_translation(name, idx, translation, alignment)
+            imported += 1
+
+    if verbosity >= 1 and novels:
+        print(f"Imported {len(novels)} novels and {imported} translated chapters into {storage.path}.")
+    return imported
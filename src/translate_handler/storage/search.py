@@ -0,0 +1,139 @@
+import sqlite3
+
+from .. import incremental
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_scans (
+    novel_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    PRIMARY KEY (novel_id, idx, kind),
+    FOREIGN KEY (novel_id, idx) REFERENCES chapters (novel_id, idx) ON DELETE CASCADE
+) WITHOUT ROWID;
+"""
+
+# Full-text index of every paragraph of the translations and parsed contents. Trigram
+# tokenization needs no word boundaries, so Japanese text is searchable as well as English.
+# Needs SQLite 3.34+; without it, searching is unavailable and everything else works
+_SEARCH_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(text, tokenize='trigram')"
+
+# Search rows are keyed by (novel, chapter, kind, paragraph) packed into the rowid, so a
+# chapter's rows are replaced with a rowid range delete instead of a scan of the index
+_SEARCH_KINDS = ('translation', 'content')
+_SEARCH_PARAGRAPH_BITS = 12
+_SEARCH_IDX_BITS = 20
+
+class SearchMixin:
+    """Full-text search of the translations and parsed contents, for `Storage`."""
+
+    @staticmethod
+    def _search_rowid(novel_id: int, idx: int, kind: str, paragraph: int = 0) -> int:
+        chapter = (novel_id << _SEARCH_IDX_BITS | idx) << 1 | _SEARCH_KINDS.index(kind)
+        return chapter << _SEARCH_PARAGRAPH_BITS | paragraph
+
+    @staticmethod
+    def _search_key(rowid: int) -> tuple[int, int, str, int]:
+        chapter, paragraph = rowid >> _SEARCH_PARAGRAPH_BITS, rowid & ((1 << _SEARCH_PARAGRAPH_BITS) - 1)
+        kind, chapter = _SEARCH_KINDS[chapter & 1], chapter >> 1
+        return chapter >> _SEARCH_IDX_BITS, chapter & ((1 << _SEARCH_IDX_BITS) - 1), kind, paragraph
+
+    def _index_search(self, conn: sqlite3.Connection, novel_id: int, idx: int, kind: str, text: str, indexed_at: float) -> None:
+        if not self.search_available or idx >= 1 << _SEARCH_IDX_BITS:
+            return
+        paragraphs = incremental.split_paragraphs(text)
+        # The rare paragraphs past the rowid range share the last row
+        last = (1 << _SEARCH_PARAGRAPH_BITS) - 1
+        if len(paragraphs) > last:
+            paragraphs[last:] = ['\n'.join(paragraphs[last:])]
+
+        first = self._search_rowid(novel_id, idx, kind)
+        conn.execute("DELETE FROM search_index WHERE rowid BETWEEN ? AND ?", (first, first + last))
+        conn.executemany("INSERT INTO search_index (rowid, text) VALUES (?, ?)",
+                         [(first + paragraph, text) for paragraph, text in enumerate(paragraphs)])
+        conn.execute("INSERT OR REPLACE INTO search_scans (novel_id, idx, kind, indexed_at) VALUES (?, ?, ?, ?)",
+                     (novel_id, idx, kind, indexed_at))
+
+    def update_search_index(self, novel_name: str | None = None, batch_size: int = 256) -> int:
+        """
+        Add the translations and parsed contents that are not in the search index yet, e.g.
+        those saved before it existed. Chapters saved since are indexed as they are written.
+
+        Args:
+            novel_name (str): Only index this novel (default: every novel).
+            batch_size (int): Number of chapters read per transaction (default: 256).
+
+        Returns:
+            int: The number of chapter texts indexed.
+        """
+        if not self.search_available:
+            return 0
+
+        novel_ids = [self._novel_id(novel_name)] if novel_name is not None else \
+                    [row['id'] for row in self._connection().execute("SELECT id FROM novels")]
+        conn = self._connection()
+        indexed = 0
+        for novel_id in novel_ids:
+            for kind, table, column, version in (('translation', 'translations', 'translation', 'translated_at'),
+                                                  ('content', 'contents', 'content', 'parsed_at')):
+                idxs = [row['idx'] for row in conn.execute(
+                    f"SELECT {table}.idx AS idx FROM {table} "
+                    f"LEFT JOIN search_scans ON search_scans.novel_id = {table}.novel_id AND search_scans.idx = {table}.idx "
+                    f"AND search_scans.kind = ? "
+                    f"WHERE {table}.novel_id = ? AND (search_scans.indexed_at IS NULL OR search_scans.indexed_at < {table}.{version})",
+                    (kind, novel_id))]
+
+                for start in range(0, len(idxs), batch_size):
+                    batch = idxs[start:start + batch_size]
+                    dict_id = ", dict_id" if kind == 'content' else ""
+                    with conn:
+                        rows = conn.execute(f"SELECT idx, {column} AS text, {version} AS version{dict_id} FROM {table} "
+                                            f"WHERE novel_id = ? AND idx IN ({', '.join('?' * len(batch))})",
+                                            [novel_id, *batch]).fetchall()
+                        for row in rows:
+                            text = self._decompress(row['text'], row['dict_id']) if kind == 'content' else row['text']
+                            self._index_search(conn, novel_id, row['idx'], kind, text, row['version'])
+                indexed += len(idxs)
+        return indexed
+
+    def search(self, query: str, novel_name: str | None = None, kind: str | None = None, limit: int = 100) -> list[dict]:
+        """
+        Find the paragraphs containing `query`, ignoring case.
+
+        Args:
+            query (str): The text to look for, matched literally (e.g. a name, in English or Japanese).
+            novel_name (str): Only search this novel (default: every novel).
+            kind (str): Only search "translation"s or parsed "content"s (default: both).
+            limit (int): Maximum number of paragraphs (default: 100).
+
+        Returns:
+            list[dict]: The matches (novel, idx, kind, paragraph, text) in library order, where `paragraph`
+                is the position of the paragraph among the chapter's non-empty lines, the title being 0.
+        """
+        query = query.strip()
+        if not query or not self.search_available:
+            return []
+
+        # Trigrams need three characters; shorter queries (e.g. two-kanji names) scan the index instead
+        if len(query) >= 3:
+            condition, params = "search_index MATCH ?", ['"' + query.replace('"', '""') + '"']
+        else:
+            pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            condition, params = "text LIKE ? ESCAPE '\\'", [pattern]
+        if novel_name is not None:
+            novel_id = self._novel_id(novel_name)
+            condition += " AND rowid BETWEEN ? AND ?"
+            params += [self._search_rowid(novel_id, 0, _SEARCH_KINDS[0]), self._search_rowid(novel_id + 1, 0, _SEARCH_KINDS[0]) - 1]
+
+        names = {row['id']: row['name'] for row in self._connection().execute("SELECT id, name FROM novels")}
+        matches = []
+        rows = self._connection().execute(f"SELECT rowid, text FROM search_index WHERE {condition} ORDER BY rowid", params)
+        for row in rows:
+            novel_id, idx, row_kind, paragraph = self._search_key(row['rowid'])
+            if kind is not None and row_kind != kind:
+                continue
+            matches.append({'novel': names.get(novel_id), 'idx': idx, 'kind': row_kind,
+                            'paragraph': paragraph, 'text': row['text']})
+            if len(matches) >= limit:
+                break
+        return matches
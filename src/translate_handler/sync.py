@@ -0,0 +1,200 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+from . import atomic, rate_limiter, sites
+from .gemini_client import GeminiClient
+from .glossary import build_glossary
+from .scraper import ScraperSession
+from .storage import TRANSLATED, Storage
+from .toc import sync_toc
+from .retry import RetryPolicy
+from .pipeline import REQUEST_HEADERS, ChapterJob, make_job, open_translation_cache, run_pipeline
+
+def _load_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(path: str, state: dict) -> None:
+    atomic.write_json(path, state)
+
+async def _discover_chapters(session: ScraperSession,
+                             storage: Storage,
+                             novels: dict[str, str],
+                             toc_max_age: float,
+                             max_chapters_per_novel: int | None,
+                             verbosity: int = 1) -> list[dict]:
+    """
+    Find the chapters of every novel that are new (not translated yet) or revised since they were fetched.
+    Chapters of different novels are interleaved round-robin, so no novel starves the others.
+
+    :return: Pending chapters as {"novel": str, "idx": int, "url": str | None, "stale": bool} entries, in scheduling order.
+    """
+
+    async def discover(novel_name: str, novel_link: str) -> list[dict]:
+        os.makedirs(f"{storage.storage_path}/{novel_name}", exist_ok=True)
+        toc = await sync_toc(session, novel_link, f"{storage.storage_path}/{novel_name}/toc.json",
+                             max_age=toc_max_age, verbosity=verbosity - 1)
+        if not toc:
+            if verbosity >= 1: print(f"Could not retrieve the table of contents of '{novel_name}'. Skipping...")
+            return []
+
+        storage.set_titles(novel_name, {entry.idx: entry.title for entry in toc['chapters']})
+        translated = set(storage.list_chapters(novel_name, status=TRANSLATED))
+        # Blocked chapters would be blocked again; they are retried explicitly (see main.py --retry_failed)
+        blocked = {letter['idx'] for letter in storage.list_dead_letters(novel_name) if letter['reason'] == 'blocked'}
+
+        entries = []
+        for entry in toc['chapters']:
+            job = make_job(storage, novel_name, novel_link, entry.idx, entry.modified_at, url=entry.url)
+            if job.stale or (entry.idx not in translated and entry.idx not in blocked):
+                entries.append({'novel': novel_name, 'idx': entry.idx, 'url': entry.url, 'stale': job.stale})
+
+        if max_chapters_per_novel is not None:
+            entries = entries[:max_chapters_per_novel]
+        if verbosity >= 1: print(f"'{novel_name}': {len(entries)} new or revised chapters.")
+        return entries
+
+    per_novel = await asyncio.gather(*(discover(name, link) for name, link in novels.items()))
+    return [entry for entry in itertools.chain(*itertools.zip_longest(*per_novel)) if entry]
+
+async def sync_novels(api_key: str,
+                      storage_path: str = "chapters",
+                      interval: float | None = None,
+                      novel_names: list[str] | None = None,
+                      max_chapters_per_novel: int | None = None,
+                      toc_max_age: float = 0,
+                      syosetu_rpm: float = 12,
+                      gemini_rpm: float = 10,
+                      gemini_tpm: float = 250_000,
+                      gemini_retries: int = 4,
+                      gemini_models: list[str] | None = None,
+                      short_chapter_model: str | None = None,
+                      short_chapter_chars: int = 2000,
+                      context_cache_ttl: float = 3600,
+                      glossary_terms: int = 200,
+                      http_timeout: float = 30.0,
+                      translation_cache_mb: int = 512,
+                      scrape_workers: int = 2,
+                      translate_workers: int = 2,
+                      verbosity: int = 1,
+                      **pipeline_options) -> None:
+    """Keep every novel in the catalog up to date, translating new and revised chapters.
+
+    Each cycle syncs the table of contents of every followed novel, collects the
+    chapters that are not translated yet or were revised since they were fetched,
+    and runs them through one shared scrape -> translate pipeline. Chapters of
+    different novels are interleaved so every novel makes progress, and the worker
+    counts and rate limits form a global budget across all novels.
+
+    The pending chapters are persisted to `sync_state.json` in the storage directory
+    as they complete, so a restarted sync resumes the interrupted cycle instead of
+    rescanning every novel.
+
+    :param str api_key: API key for Google Gemini, or several keys separated by commas.
+    :param str storage_path: Path to the storage directory (default: "chapters").
+    :param float interval: Seconds to wait between sync cycles, or None to run a single cycle (default: None).
+    :param list[str] novel_names: Only sync these novels from the catalog (default: every novel).
+    :param int max_chapters_per_novel: Maximum number of chapters per novel in one cycle (default: no limit).
+    :param float toc_max_age: Seconds a stored table of contents is used before re-crawling it (default: 0).
+    :param float syosetu_rpm: Maximum requests per minute to each novel host (default: 12).
+    :param float gemini_rpm: Maximum Gemini requests per minute, per API key and model (default: 10).
+    :param float gemini_tpm: Maximum Gemini input tokens per minute, per API key and model (default: 250000).
+    :param int gemini_retries: Number of times a failed Gemini request is retried (default: 4).
+    :param list[str] gemini_models: Models to translate with, in order of preference (default: gemini-2.5-flash).
+    :param str short_chapter_model: Cheaper, faster model for short chapters (default: None, disabled).
+    :param int short_chapter_chars: Chapters of at most this many characters count as short (default: 2000).
+    :param float context_cache_ttl: Lifetime in seconds of the Gemini context cache holding each novel's system instruction and glossary, 0 disables it (default: 3600).
+    :param int glossary_terms: Maximum number of ruby-annotated terms added to each novel's glossary, 0 disables them (default: 200).
+    :param float http_timeout: Timeout in seconds for each scrape request (default: 30).
+    :param int translation_cache_mb: Size limit of the translation cache in megabytes, 0 disables it (default: 512).
+    :param int scrape_workers: Number of chapters scraped concurrently across all novels (default: 2).
+    :param int translate_workers: Number of chapters translated concurrently across all novels (default: 2).
+    :param int verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
+    :param pipeline_options: Further pipeline options (queue_size, cache_max_age, batch_tokens,
+        chunk_chars, chunk_overlap), see `translate_chapters`.
+    :return: None
+    """
+
+    if scrape_workers < 1 or translate_workers < 1:
+        raise ValueError("Worker counts must be positive integers.")
+
+    client = GeminiClient(api_key, RetryPolicy(max_attempts=gemini_retries + 1),
+                          models=gemini_models,
+                          short_chapter_model=short_chapter_model,
+                          short_chapter_chars=short_chapter_chars,
+                          context_cache_ttl=context_cache_ttl)
+    client.configure_limits(gemini_rpm, gemini_tpm)
+    storage = Storage(storage_path)
+    cache = open_translation_cache(storage_path, translation_cache_mb)
+    state_path = os.path.join(storage_path, "sync_state.json")
+
+    while True:
+        novels = dict(storage.list_novels())
+        if novel_names is not None:
+            novels = {name: link for name, link in novels.items() if name in novel_names}
+
+        for name, link in list(novels.items()):
+            site = sites.find_site(link)
+            if site is None:
+                if verbosity >= 1: print(f"Skipping '{name}': unsupported novel link {link}")
+                del novels[name]
+            else:
+                link = novels[name] = site.normalize_link(link)
+                # Reloaded every cycle, so glossary edits apply without a restart
+                client.set_glossary(name, build_glossary(storage, name, max_terms=glossary_terms, verbosity=verbosity))
+                rate_limiter.configure_limit(urlparse(link).hostname, syosetu_rpm, burst=1)
+
+        async with ScraperSession(headers=REQUEST_HEADERS,
+                                  max_connections=scrape_workers,
+                                  timeout=http_timeout) as session:
+            state = _load_state(state_path)
+            if state.get('pending'):
+                if verbosity >= 1: print(f"Resuming interrupted sync: {len(state['pending'])} chapters pending.")
+            else:
+                state = {
+                    'cycle_started_at': time.time(),
+                    'last_cycle_finished_at': state.get('last_cycle_finished_at'),
+                    'pending': await _discover_chapters(session, storage, novels, toc_max_age,
+                                                        max_chapters_per_novel, verbosity=verbosity),
+                }
+                _save_state(state_path, state)
+
+            jobs = []
+            for entry in state['pending']:
+                if entry['novel'] in novels: # The novel may have been removed from the catalog
+                    job = make_job(storage, entry['novel'], novels[entry['novel']], entry['idx'], url=entry.get('url'))
+                    job.stale = entry['stale']
+                    jobs.append(job)
+
+            def on_done(job: ChapterJob) -> None:
+                # Failed chapters are dropped too; unless blocked, they are rediscovered next cycle
+                state['pending'] = [entry for entry in state['pending']
+                                    if (entry['novel'], entry['idx']) != (job.novel_name, job.idx)]
+                _save_state(state_path, state)
+                if job.status is False and verbosity >= 1:
+                    print(f"'{job.novel_name}' chapter {job.idx} failed and was added to the dead-letter list.")
+
+            if jobs and verbosity >= 1: print(f"Syncing {len(jobs)} chapters across {len(novels)} novels...")
+            await run_pipeline(session, storage, client, cache, jobs,
+                                scrape_workers=scrape_workers,
+                                translate_workers=translate_workers,
+                                on_done=on_done,
+                                verbosity=verbosity,
+                                **pipeline_options)
+
+        state = {'pending': [], 'last_cycle_finished_at': time.time()}
+        _save_state(state_path, state)
+
+        if interval is None:
+            return
+        if verbosity >= 1: print(f"Sync cycle finished. Next cycle in {interval} seconds.")
+        await asyncio.sleep(interval)
@@ -0,0 +1,84 @@
+import json
+import os
+import time
+from dataclasses import asdict
+
+from . import atomic
+from .scraper import ScraperSession
+from .sites import TocEntry, get_site
+
+async def fetch_toc(session: ScraperSession, novel_link: str, verbosity: int = 1) -> list[TocEntry] | None:
+    """
+    Crawl a novel's table of contents with the adapter of its site.
+
+    Args:
+        session (ScraperSession): The pooled session to fetch through.
+        novel_link (str): The link to the novel.
+        verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+    Returns:
+        list[TocEntry]: Every chapter of the novel in order, or None if a page could not be retrieved.
+
+    Raises:
+        ValueError: If the novel's site is not supported.
+    """
+    return await get_site(novel_link).fetch_toc(session, novel_link, verbosity=verbosity)
+
+def load_toc(path: str) -> dict | None:
+    """
+    Load a stored table of contents.
+
+    Args:
+        path (str): Path to the stored table of contents.
+
+    Returns:
+        dict: {"novel_link": str, "synced_at": float, "chapters": list[TocEntry]}, or None if there is none.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            toc = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    toc['chapters'] = [TocEntry(**entry) for entry in toc.get('chapters', [])]
+    return toc
+
+def save_toc(path: str, novel_link: str, chapters: list[TocEntry]) -> dict:
+    """Store a table of contents, stamping it with the current time. Returns the stored table of contents."""
+    toc = {'novel_link': novel_link, 'synced_at': time.time(), 'chapters': chapters}
+    atomic.write_json(path, {**toc, 'chapters': [asdict(entry) for entry in chapters]})
+    return toc
+
+async def sync_toc(session: ScraperSession,
+                   novel_link: str,
+                   path: str,
+                   max_age: float = 0,
+                   verbosity: int = 1) -> dict | None:
+    """
+    Return the novel's table of contents, re-crawling it if the stored copy is older than `max_age`.
+
+    Args:
+        session (ScraperSession): The pooled session to fetch through.
+        novel_link (str): The link to the novel.
+        path (str): Path to the stored table of contents.
+        max_age (float): Seconds a stored table of contents is used without re-crawling it.
+        verbosity (int): Verbosity level (0: silent, 1: basic info, 2: detailed info).
+
+    Returns:
+        dict: The table of contents (see `load_toc`), or None if it is unavailable.
+    """
+    toc = load_toc(path)
+    if toc and toc.get('novel_link') != novel_link:
+        toc = None  # Stored for another link (the novel was renamed or re-pointed), so it is never used
+    if toc and time.time() - toc['synced_at'] < max_age:
+        return toc
+
+    chapters = await fetch_toc(session, novel_link, verbosity=verbosity)
+    if chapters is None:
+        return toc  # Fall back to the stale copy, if any
+
+    if verbosity >= 1: print(f"Table of contents synced: {len(chapters)} chapters.")
+    return save_toc(path, novel_link, chapters)
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+import unicodedata
+
+from . import atomic
+
+class TranslationCache:
+    """
+    Content-addressed on-disk cache of chapter translations.
+
+    Entries are keyed by a hash of the normalized source text, the model, the
+    system instruction version and the novel's glossary, so identical chapters (re-posts, duplicated author
+    notes, the same novel stored under two names) are only ever translated once.
+    Entries live in `<cache_dir>/<first two hex digits>/<hash>.txt`; reads refresh an
+    entry's modification time, and the least recently used entries are evicted once
+    the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache entries.
+            max_bytes (int): Maximum total size of the cache entries in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path, _ in self._entries())
+
+    @staticmethod
+    def make_key(content: str, model: str, instruction_version: str, glossary: list[str] | None = None) -> str:
+        """
+        Build the cache key for a source text.
+
+        Args:
+            content (str): The source text to translate.
+            model (str): The model used for the translation.
+            instruction_version (str): Version of the system instruction used for the translation.
+            glossary (list[str]): The glossary entries sent with the system instruction (default: none).
+
+        Returns:
+            str: The hex digest identifying the translation.
+        """
+        normalized = unicodedata.normalize('NFC', content.replace('\r\n', '\n'))
+        normalized = '\n'.join(line.strip() for line in normalized.strip().split('\n'))
+
+        parts = [model, instruction_version, normalized]
+        if glossary: # Keys of translations made without a glossary are unchanged
+            parts.append('\n'.join(glossary))
+
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached translation for `key`, or None on a cache miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                translation = file.read()
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            return None
+        return translation
+
+    def put(self, key: str, translation: str) -> None:
+        """Store the translation for `key`, evicting the least recently used entries if needed."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._lock:
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            atomic.write_text(path, translation)
+            self._size += os.path.getsize(path) - previous_size
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _entries(self) -> list[tuple[str, float]]:
+        """List (path, last used time) of every cache entry."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith('.txt'):
+                    path = os.path.join(root, filename)
+                    entries.append((path, os.path.getmtime(path)))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries until the cache fits in `max_bytes`."""
+        for path, _ in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
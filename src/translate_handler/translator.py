@@ -1,132 +1,154 @@
 import os
-import time
-import asyncio
+from typing import Callable
+from urllib.parse import urlparse
 
-from .scraper import scrape_chapter
+from . import rate_limiter, sites
 from .gemini_client import GeminiClient
-
-_REQUEST_HEADERS = {
-    'User-Agent': 'Mozilla/5.0',
-    'Referer': 'https://ncode.syosetu.com/',
-}
+from .glossary import build_glossary
+from .pipeline import REQUEST_HEADERS, open_translation_cache, plan_jobs, run_pipeline
+from .retry import RetryPolicy
+from .scraper import ScraperSession
+from .storage import Storage
 
 async def translate_chapters(api_key: str,
                              novel_link: str,
                              novel_name: str,
-                             chapter_idxs: list[int] = [1],
+                             chapter_idxs: list[int] | None = [1],
                              storage_path: str = "chapters",
                              verbosity: int = 1,
-                             cooldown_time: int = 5) -> None:
+                             syosetu_rpm: float = 12,
+                             gemini_rpm: float = 10,
+                             gemini_tpm: float = 250_000,
+                             gemini_retries: int = 4,
+                             gemini_models: list[str] | None = None,
+                             short_chapter_model: str | None = None,
+                             short_chapter_chars: int = 2000,
+                             context_cache_ttl: float = 3600,
+                             glossary_terms: int = 200,
+                             scrape_workers: int = 2,
+                             translate_workers: int = 2,
+                             queue_size: int | None = None,
+                             http_timeout: float = 30.0,
+                             cache_max_age: float | None = None,
+                             batch_tokens: int = 0,
+                             chunk_chars: int = 6000,
+                             chunk_overlap: int = 2,
+                             refresh: bool = False,
+                             translation_cache_mb: int = 512,
+                             toc_max_age: float | None = 3600,
+                             on_chapter_done: Callable[[int, bool | None], None] | None = None) -> dict[int, bool | None]:
     """Translate chapters of a Japanese web novel using Google Gemini (asynchronously).
-        
-    :param str api_key: API key for Google Gemini.
-    :param str novel_link: The link to the novel on ncode.syosetu.com.
+
+    Chapters flow through a producer/consumer pipeline: a pool of scrape workers
+    fetches and parses chapters into a bounded queue, which a separate pool of
+    translate workers drains. Chapter N+1 is therefore being fetched while chapter
+    N is being translated. Requests are throttled by shared token buckets, one
+    for the novel's host and two per Gemini API key and model (requests and input
+    tokens per minute), so the pipeline runs at exactly the allowed quota.
+
+    Several API keys (a comma-separated `api_key`) are load balanced: each request
+    goes to the key that would serve it soonest, and keys that run out of quota or
+    are rejected are routed around. All scrapes share
+    one pooled keep-alive HTTP session sized to the number of scrape workers.
+
+    Every request carries the system instruction and the novel's glossary: the
+    entries of `<storage_path>/<novel_name>/glossary.txt` (one `term = translation`
+    per line) and the ruby-annotated names and terms found most often in its
+    chapters, read from an index that is updated with newly parsed chapters only.
+    They are uploaded once per novel as a Gemini context cache, which requests refer
+    to instead of resending them, once they are large enough to be cached.
+
+    The novel's table of contents is synced first, so chapters that do not exist
+    are never requested and chapters revised since they were last fetched are
+    refetched (and retranslated) even if a translation already exists.
+
+    Each chapter's stage (fetched, parsed, translated) is committed to the library
+    as soon as it completes, so an interrupted run resumes where it stopped: parsed
+    chapters go straight to translation and fetched pages are parsed from the
+    library, without spending scrape requests or Gemini calls again.
+
+    :param str api_key: API key for Google Gemini, or several keys separated by commas.
+    :param str novel_link: The link to the novel on a supported site (see `sites.supported_sites`).
     :param str novel_name: The name of the novel (used for directory structure).
-    :param list[int] chapter_idxs: List of chapter indices to translate (default: [1]).
-    :param str storage_path: Path to store the raw HTML, raw content, and translations (default: "chapters").
+    :param list[int] chapter_idxs: List of chapter indices to translate, or None for every chapter in the table of contents (default: [1]).
+    :param str storage_path: Path to the storage directory holding the library database (raw HTML, raw content and translations), the tables of contents and the translation cache (default: "chapters").
     :param int verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
-    :param int cooldown_time: Time in seconds to wait between requests to avoid rate limiting (default: 5).
-    :raises ValueError: If the novel link does not start with 'https://ncode.syosetu.com/'.
+    :param float syosetu_rpm: Maximum requests per minute to the novel's host (default: 12).
+    :param float gemini_rpm: Maximum Gemini requests per minute, per API key and model (default: 10).
+    :param float gemini_tpm: Maximum Gemini input tokens per minute, per API key and model (default: 250000).
+    :param int gemini_retries: Number of times a failed Gemini request is retried, with jittered exponential backoff (default: 4).
+    :param list[str] gemini_models: Models to translate with, in order of preference; later models are used while every key is out of quota for the earlier ones (default: gemini-2.5-flash).
+    :param str short_chapter_model: Cheaper, faster model for short chapters (default: None, disabled).
+    :param int short_chapter_chars: Chapters of at most this many characters count as short (default: 2000).
+    :param float context_cache_ttl: Lifetime in seconds of the Gemini context cache holding each novel's system instruction and glossary, 0 disables it (default: 3600).
+    :param int glossary_terms: Maximum number of ruby-annotated terms added to each novel's glossary, 0 disables them (default: 200).
+    :param int scrape_workers: Number of chapters scraped concurrently (default: 2).
+    :param int translate_workers: Number of chapters translated concurrently (default: 2).
+    :param int queue_size: Maximum number of scraped chapters waiting for translation (default: 2 * translate_workers).
+    :param float http_timeout: Timeout in seconds for each scrape request (default: 30).
+    :param int batch_tokens: Pack consecutive scraped chapters into one Gemini request up to this many estimated input tokens (default: 0, one chapter per request). Only chapters already waiting in the queue are packed, so raise `queue_size` for larger batches.
+    :param int chunk_chars: Split chapters longer than this many characters into paragraph-aligned chunks translated concurrently (default: 6000, 0 disables).
+    :param int chunk_overlap: Number of preceding paragraphs sent as context with each chunk (default: 2).
+    :param bool refresh: Re-check chapters that already have a translation; unchanged chapters are served from the translation cache (default: False).
+    :param int translation_cache_mb: Size limit of the translation cache in megabytes, 0 disables it (default: 512).
+    :param float cache_max_age: Seconds saved chapter HTML is reused without revalidating it with the server (default: the server's Cache-Control max-age).
+    :param float toc_max_age: Seconds the stored table of contents is used before re-crawling it, or None to not use it (default: 3600).
+    :param Callable on_chapter_done: Optional callback invoked as `on_chapter_done(idx, status)` as each chapter finishes, with the status it has in the returned mapping.
+    :raises ValueError: If the novel's site is not supported.
     :raises Exception: If there is an error retrieving or parsing the HTML content.
-    :return: None
-    """    
-    
-    # Clean novel link
-    novel_link = novel_link.rstrip('/')
-    if not novel_link.startswith('https://ncode.syosetu.com'):
-        raise ValueError(f"Novel link must start with 'https://ncode.syosetu.com'. Provided: {novel_link}")
-
-    # Define paths for the files
-    raw_html_dir = f"{storage_path}/{novel_name}/raw_html"
-    raw_content_dir = f"{storage_path}/{novel_name}/raw_content"
-    translation_dir = f"{storage_path}/{novel_name}/translation"
-
-    # Ensure directories exist
-    os.makedirs(raw_html_dir, exist_ok=True)
-    os.makedirs(raw_content_dir, exist_ok=True)
-    os.makedirs(translation_dir, exist_ok=True)
-    
-    # Initialize the Gemini client
-    client = GeminiClient(api_key)
-
-    for idx in chapter_idxs:
-        if verbosity >= 2: print(f"=== Processing Chapter {idx} ===")        
-        
-        start_time = time.time()
-        status = await _translate_chapter(client,
-                                          novel_link=novel_link,
-                                          idx=idx,
-                                          raw_html_dir=raw_html_dir,
-                                          raw_content_dir=raw_content_dir,
-                                          translation_dir=translation_dir,
-                                          verbosity=verbosity)
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        
-        if verbosity >= 2: print("Done.")
-        if verbosity >= 1: print(f"Chapter {idx} processed successfully in {elapsed_time:.2f} seconds")
-        
-        if status is None:
-            continue  # Skip if translation already exists
-        
-        # Wait 'cooldown_time' seconds to avoid rate limiting
-        # But skip if this is the last chapter
-        if idx != chapter_idxs[-1]:
-            if verbosity >= 2: print(f"Waiting for {cooldown_time} seconds before the next request...\n")
-            await asyncio.sleep(cooldown_time)
-            
-async def _translate_chapter(client: GeminiClient,
-                             novel_link: str,
-                             idx: int,
-                             raw_html_dir: str,
-                             raw_content_dir: str,
-                             translation_dir: str,
-                             verbosity: int = 1) -> bool | None:
-    """
-    Translate a single chapter of a Japanese web novel using Google Gemini.
-    
-    :param client: Instance of GeminiClient for translation.
-    :param novel_link: The link to the novel on ncode.syosetu.com.
-    :param idx: Chapter index to translate.
-    :param raw_html_dir: Directory to save raw HTML files.
-    :param raw_content_dir: Directory to save raw content files.
-    :param translation_dir: Directory to save translated files.
-    :param verbosity: Verbosity level (0: silent, 1: basic info, 2: detailed info).
-    :return: True if translation was successful, False if it failed, None if translation already exists.
+    :return: Mapping of chapter index to status (True: translated, False: failed, None: already translated).
     """
-    
-    # Construct file paths
-    url = f"{novel_link}/{idx}/"
-    filename = f"Chapter_{idx}"
-    path_to_raw_html = os.path.join(raw_html_dir, f"{filename}.html")
-    path_to_raw_content = os.path.join(raw_content_dir, f"{filename}.txt")
-    path_to_translation = os.path.join(translation_dir, f"{filename}_translated.txt")
-    
-    # Check if the translation already exists
-    if os.path.exists(path_to_translation):
-        if verbosity >= 1: print(f"Translation for chapter {idx} already exists. Skipping...")
-        return None
-    
-    # Step 1: Scrape the chapter HTML content
-    if verbosity >= 2: print(f"1. Scraping chapter {idx} HTML content...", end=' ')
-    content = await asyncio.to_thread(scrape_chapter, url, _REQUEST_HEADERS,
-                                      verbosity=verbosity-1,
-                                      html_save_dir=path_to_raw_html,
-                                      content_save_dir=path_to_raw_content)
-    
-    if not content:
-        if verbosity >= 1: print(f"Failed to retrieve or parse HTML content for chapter {idx}. Skipping...")
-        return False
-    
-    if verbosity >= 2: print("Done.")
-    if verbosity >= 2: print(f"3. Translating chapter {idx} content...", end=' ')
-    
-    translated_text = await asyncio.to_thread(client.translate_chapter, content)        
-    if not translated_text:
-        if verbosity >= 1: print(f"Translation failed for chapter {idx}.")
-        return False
-    
-    with open(path_to_translation, "w", encoding="utf-8") as file:
-        file.write(translated_text)
-    
-    return True
\ No newline at end of file
+
+    # Clean novel link
+    novel_link = sites.get_site(novel_link).normalize_link(novel_link)
+
+    if scrape_workers < 1 or translate_workers < 1:
+        raise ValueError("Worker counts must be positive integers.")
+
+    # Configure the shared rate limits; scraping is spaced out evenly rather than bursting
+    rate_limiter.configure_limit(urlparse(novel_link).hostname, syosetu_rpm, burst=1)
+
+    # Initialize the Gemini client, the store and the translation cache shared by every novel in the storage
+    client = GeminiClient(api_key, RetryPolicy(max_attempts=gemini_retries + 1),
+                          models=gemini_models,
+                          short_chapter_model=short_chapter_model,
+                          short_chapter_chars=short_chapter_chars,
+                          context_cache_ttl=context_cache_ttl)
+    client.configure_limits(gemini_rpm, gemini_tpm)
+    storage = Storage(storage_path)
+    cache = open_translation_cache(storage_path, translation_cache_mb)
+
+    if storage.get_novel_link(novel_name) is None:
+        storage.add_novel(novel_name, novel_link)
+    os.makedirs(f"{storage_path}/{novel_name}", exist_ok=True)
+    client.set_glossary(novel_name, build_glossary(storage, novel_name, max_terms=glossary_terms, verbosity=verbosity))
+
+    async with ScraperSession(headers=REQUEST_HEADERS,
+                              max_connections=scrape_workers,
+                              timeout=http_timeout) as session:
+        jobs = await plan_jobs(session, storage, novel_name, novel_link, chapter_idxs, toc_max_age, verbosity=verbosity)
+
+        await run_pipeline(session, storage, client, cache, jobs,
+                            scrape_workers=scrape_workers,
+                            translate_workers=translate_workers,
+                            queue_size=queue_size,
+                            cache_max_age=cache_max_age,
+                            refresh=refresh,
+                            batch_tokens=batch_tokens,
+                            chunk_chars=chunk_chars,
+                            chunk_overlap=chunk_overlap,
+                            on_done=(lambda job: on_chapter_done(job.idx, job.status)) if on_chapter_done else None,
+                            verbosity=verbosity)
+
+    failed = [job.idx for job in jobs if job.status is False]
+    if failed and verbosity >= 1:
+        print(f"{len(failed)} chapter(s) failed and were added to the dead-letter list: {', '.join(map(str, failed))}")
+    if verbosity >= 2:
+        _print_usage(client)
+    return {job.idx: job.status for job in jobs}
+
+def _print_usage(client: GeminiClient) -> None:
+    for usage in client.usage():
+        disabled = f", disabled ({usage['disabled']})" if usage['disabled'] else ""
+        print(f"Gemini key {usage['key']} / {usage['model']}: {usage['requests']} requests, "
+              f"{usage['failures']} failed, {usage['quota_errors']} over quota{disabled}")
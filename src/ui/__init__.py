@@ -1,7 +1,8 @@
 import tkinter.messagebox
 from .select_chapters import SelectChaptersUI
 from .new_novel import NewNovelUI
+from .search import SearchUI
 from .select_novels import SelectNovelsUI
 from .view_chapter import ViewChapterUI
 
-__all__ = ["SelectChaptersUI", "NewNovelUI", "SelectNovelsUI", "ViewChapterUI"]
\ No newline at end of file
+__all__ = ["SelectChaptersUI", "NewNovelUI", "SearchUI", "SelectNovelsUI", "ViewChapterUI"]
\ No newline at end of file
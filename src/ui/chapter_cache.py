@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Callable
+
+from translate_handler import Storage
+
+def format_chapter(translation: str | None) -> str | None:
+    """Lay out a stored translation for the reader: its title line, a blank line, then the story."""
+    content_txt = translation.strip() if translation else translation
+
+    # Split the content into title and body
+    if content_txt:
+        title_txt = content_txt.split('\n')[0] if content_txt else "No Title"
+        story_txt = content_txt[len(title_txt):].strip() if title_txt else content_txt
+
+        content_txt = f"{title_txt}\n\n{story_txt}"
+
+    return content_txt
+
+class ChapterCache:
+    """
+    Size-bounded LRU cache of chapters laid out for the reader, shared by every frame.
+
+    Chapters are read from the library on a background loader thread, so a slow
+    storage directory never blocks the Tk main loop: `load` fetches the chapter
+    being opened ahead of everything else, and `preload` queues its neighbours so
+    paging to them is instant. Untranslated chapters are cached as None.
+    """
+
+    def __init__(self, storage: Storage, max_chapters: int = 32):
+        self.storage = storage
+        self.max_chapters = max_chapters
+
+        self._chapters: OrderedDict[tuple[str, int], str | None] = OrderedDict()
+        # Bumped by `invalidate`, so a read that started before a chapter was translated is not cached
+        self._versions: dict[tuple[str, int], int] = {}
+        self._queue: deque[tuple[str, int]] = deque()
+        self._callbacks: dict[tuple[str, int], list[Callable[[str | None], None]]] = {}
+        self._condition = threading.Condition()
+        self._loader: threading.Thread | None = None
+
+    def peek(self, novel: str, chapter: int) -> tuple[bool, str | None]:
+        """Whether the chapter is cached, and its content if it is."""
+        key = (novel, chapter)
+        with self._condition:
+            if key not in self._chapters:
+                return False, None
+            self._chapters.move_to_end(key)
+            return True, self._chapters[key]
+
+    def load(self, novel: str, chapter: int, on_loaded: Callable[[str | None], None]) -> None:
+        """
+        Load a chapter ahead of the queued preloads. `on_loaded(content)` is called with
+        its content (None if not translated), from the loader thread unless it was cached.
+        """
+        hit, content = self.peek(novel, chapter)
+        if hit:
+            on_loaded(content)
+            return
+
+        key = (novel, chapter)
+        with self._condition:
+            self._callbacks.setdefault(key, []).append(on_loaded)
+            if key in self._queue:
+                self._queue.remove(key)
+            self._queue.appendleft(key)
+            self._start_loader()
+
+    def preload(self, novel: str, chapters: list[int]) -> None:
+        """Queue chapters to be loaded in the background, if they are not cached yet."""
+        with self._condition:
+            for chapter in chapters:
+                key = (novel, chapter)
+                if chapter > 0 and key not in self._chapters and key not in self._queue:
+                    self._queue.append(key)
+            self._start_loader()
+
+    def invalidate(self, novel: str, chapter: int) -> None:
+        """Drop a chapter whose translation changed; it is read again on next use."""
+        key = (novel, chapter)
+        with self._condition:
+            self._chapters.pop(key, None)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _start_loader(self) -> None:
+        if self._queue:
+            self._condition.notify()
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._load_forever, daemon=True, name="chapter-loader")
+            self._loader.start()
+
+    def _load_forever(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                key = self._queue.popleft()
+                version = self._versions.get(key, 0)
+
+            try:
+                content = format_chapter(self.storage.get_translation(*key))
+            except Exception as e:
+                print(f"Could not load chapter {key[1]} of '{key[0]}': {e}")
+                content = None
+                version = None # Do not cache the failure
+
+            with self._condition:
+                if version is not None and version == self._versions.get(key, 0):
+                    self._chapters[key] = content
+                    self._chapters.move_to_end(key)
+                    while len(self._chapters) > self.max_chapters:
+                        self._chapters.popitem(last=False)
+                callbacks = self._callbacks.pop(key, [])
+
+            for callback in callbacks:
+                callback(content)
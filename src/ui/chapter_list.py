@@ -0,0 +1,186 @@
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from translate_handler import Storage
+from translate_handler.storage import FAILED, LISTED, TRANSLATED
+
+def chapter_state(status: str) -> str:
+    """What the reader has of a chapter: "translated", "raw" (scraped, not translated) or "missing"."""
+    if status == TRANSLATED:
+        return "translated"
+    if status in (LISTED, FAILED):
+        return "missing"
+    return "raw"
+
+class VirtualChapterList(tk.Frame):
+    """
+    Chapter list that only holds the rows on screen.
+
+    The chapters are paged from the library's chapter index on a background
+    thread as the list is scrolled, so opening a novel with thousands of chapters
+    costs one count query; the Listbox only ever holds `rows` lines.
+    """
+
+    def __init__(self, master, storage: Storage, novel: str,
+                 on_open: Callable[[int], None] | None = None,
+                 rows: int = 20,
+                 page_size: int = 100):
+        super().__init__(master)
+        self.storage = storage
+        self.novel = novel
+        self.on_open = on_open
+        self.rows = rows
+        self.page_size = page_size
+
+        self.search = ""
+        self.total = 0
+        self.offset = 0
+        self._pages: dict[int, list[dict]] = {}
+        self._loading: set[int] = set()
+        # Bumped on every refresh, so pages loaded for an earlier filter are dropped
+        self._generation = 0
+        # One thread, so every query reuses the same connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chapter-list")
+
+        self.create_widgets()
+
+        # Translations saved before the chapter index existed are indexed before the first page is read
+        self._executor.submit(self.storage.update_chapter_index, novel)
+        self.refresh()
+
+    def create_widgets(self):
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox = tk.Listbox(self, height=self.rows, width=80, font=("Courier", 10), activestyle="none")
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind("<Double-Button-1>", lambda e: self.open_selected())
+        self.listbox.bind("<Return>", lambda e: self.open_selected())
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll_by(-3 if e.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.listbox.bind("<Up>", lambda e: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self.scroll_by(-self.rows))
+        self.listbox.bind("<Next>", lambda e: self.scroll_by(self.rows))
+
+    def refresh(self, search: str | None = None):
+        """
+        Reload the list from the index, optionally with a new title filter; the count runs off the UI thread.
+        Without a new filter the list stays scrolled where it is.
+        """
+        reset = search is not None
+        if search is not None:
+            self.search = search.strip()
+        self._generation += 1
+        self._pages.clear()
+        self._loading.clear()
+        generation, search = self._generation, self.search
+
+        def count():
+            total = self.storage.count_chapter_list(self.novel, search=search or None)
+            self.after(0, self.on_counted, generation, total, reset)
+        self._executor.submit(count)
+
+    def on_counted(self, generation: int, total: int, reset: bool = True):
+        if generation != self._generation or not self.winfo_exists():
+            return
+        self.total = total
+        if reset:
+            self.offset = 0
+        self.render()
+
+    def render(self):
+        self.offset = max(0, min(self.offset, self.total - self.rows))
+        self.listbox.delete(0, tk.END)
+        for position in range(self.offset, min(self.offset + self.rows, self.total)):
+            chapter = self.chapter_at(position)
+            self.listbox.insert(tk.END, self.format_row(chapter) if chapter else "  ...")
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + self.rows) / self.total))
+        else:
+            self.scrollbar.set(0, 1)
+            self.listbox.insert(tk.END, "No chapters match." if self.search else "No chapters yet.")
+
+    @staticmethod
+    def format_row(chapter: dict) -> str:
+        words = f"{chapter['words']:,} words" if chapter['words'] is not None else ""
+        return f"{chapter['idx']:>5}  {chapter_state(chapter['status']):<10} {words:>12}  {chapter['title'] or ''}"
+
+    def chapter_at(self, position: int) -> dict | None:
+        page, row = divmod(position, self.page_size)
+        if page not in self._pages:
+            self.load_page(page)
+            return None
+        rows = self._pages[page]
+        return rows[row] if row < len(rows) else None
+
+    def load_page(self, page: int):
+        if page in self._loading:
+            return
+        self._loading.add(page)
+        generation, search = self._generation, self.search
+
+        def load():
+            rows = self.storage.list_chapter_page(self.novel, page * self.page_size, self.page_size,
+                                                  search=search or None)
+            self.after(0, self.on_page_loaded, generation, page, rows)
+        self._executor.submit(load)
+
+    def on_page_loaded(self, generation: int, page: int, rows: list[dict]):
+        if generation != self._generation or not self.winfo_exists():
+            return
+        self._pages[page] = rows
+        self._loading.discard(page)
+
+        # Only redraw if the page is on screen
+        first, last = self.offset // self.page_size, (self.offset + self.rows - 1) // self.page_size
+        if first <= page <= last:
+            selection = self.listbox.curselection()
+            self.render()
+            if selection:
+                self.listbox.selection_set(selection[0])
+
+    def on_scrollbar(self, action: str, amount: str, unit: str | None = None):
+        if action == tk.MOVETO:
+            self.offset = int(float(amount) * self.total)
+            self.render()
+        elif action == tk.SCROLL:
+            self.scroll_by(int(amount) * (self.rows if unit == tk.PAGES else 1))
+
+    def scroll_by(self, rows: int):
+        self.offset += rows
+        self.render()
+        return "break"
+
+    def move_selection(self, step: int):
+        # Scroll the window when the selection moves past its edge
+        selection = self.listbox.curselection()
+        row = selection[0] + step if selection else 0
+        if row < 0 or row >= self.rows:
+            self.scroll_by(step)
+            row = max(0, min(row, self.listbox.size() - 1))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(row)
+        self.listbox.activate(row)
+        return "break"
+
+    def selected_chapter(self) -> int | None:
+        selection = self.listbox.curselection()
+        if not selection:
+            return None
+        chapter = self.chapter_at(self.offset + selection[0])
+        return chapter['idx'] if chapter else None
+
+    def destroy(self):
+        # Drop the queued pages; the query in progress finishes on its own
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def open_selected(self):
+        idx = self.selected_chapter()
+        if idx is not None and self.on_open:
+            self.on_open(idx)
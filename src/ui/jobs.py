@@ -0,0 +1,252 @@
+import asyncio
+import dataclasses
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from translate_handler import Storage, translate_chapters
+
+# Chapter job states
+QUEUED, RUNNING, DONE, FAILED, SKIPPED, CANCELLED = "queued", "running", "done", "failed", "skipped", "cancelled"
+CANCELLING = "cancelling" # Cancelled while running; its requests already sent have not returned yet
+ACTIVE_STATES = {QUEUED, RUNNING, CANCELLING}
+
+@dataclass
+class ChapterJob:
+    novel: str
+    idx: int
+    prefetch: bool = False # Queued by the reader's prefetch rather than by the user; runs after the user's jobs
+    state: str = QUEUED
+    error: str | None = None
+
+    @property
+    def key(self) -> tuple[str, int]:
+        return (self.novel, self.idx)
+
+class JobManager:
+    """
+    App-wide queue of chapter translations, run on one persistent event loop.
+
+    Every translation the UI starts goes through here. A chapter that is already
+    queued or running is not queued twice, so it is never translated twice at
+    once. User jobs run before prefetch jobs; consecutive user jobs of the same
+    novel run together (up to `chapters_per_run`) so scraping and translation
+    overlap, while prefetch jobs run one at a time, nearest first.
+
+    Each change of a job's state is sent to the listeners as a copy of the job,
+    on the Tk main loop. Cancelling a running job stops the run it is part of and
+    queues its other chapters again; pausing does the same for the whole run.
+    Requests already sent to Gemini run in threads that cannot be interrupted, so
+    a cancelled running job shows as cancelling until they return, and no run
+    starts before then; what they return is discarded. Chapter stages are
+    committed as they complete, so interrupted chapters resume where they stopped.
+    """
+
+    # Finished jobs kept for the jobs panel
+    HISTORY = 200
+
+    def __init__(self, root, api_key: str, storage_path: str, chapters_per_run: int = 10):
+        self.root = root
+        self.api_key = api_key
+        self.storage_path = storage_path
+        self.chapters_per_run = chapters_per_run
+
+        self.paused = False
+        self._listeners: list[Callable[[ChapterJob], None]] = []
+
+        # Only touched on the event loop thread
+        self._jobs: OrderedDict[tuple[str, int], ChapterJob] = OrderedDict()
+        self._running: tuple[asyncio.Task, list[ChapterJob]] | None = None
+        self._stopped = False
+        self._wakeup: asyncio.Event | None = None
+        self._storage: Storage | None = None
+
+        # The runs' blocking calls go through an executor of their own, so a stopped run can wait for them
+        self.loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="jobs-worker")
+        self.loop.set_default_executor(self._executor)
+        threading.Thread(target=self.loop.run_forever, daemon=True, name="jobs").start()
+        asyncio.run_coroutine_threadsafe(self._dispatch(), self.loop)
+
+    # Called from the Tk thread
+
+    def subscribe(self, listener: Callable[[ChapterJob], None]) -> None:
+        """Call `listener(job)` on the Tk main loop whenever a job changes state."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[ChapterJob], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def submit(self, novel: str, chapters: list[int], prefetch: bool = False) -> None:
+        """Queue chapters for translation; chapters already queued or running are not queued again."""
+        self.loop.call_soon_threadsafe(self._submit, novel, list(chapters), prefetch)
+
+    def cancel(self, novel: str, idx: int, prefetch_only: bool = False) -> None:
+        """Cancel a chapter's job, or only if it is a prefetch job."""
+        self.loop.call_soon_threadsafe(self._cancel, {(novel, idx)}, prefetch_only)
+
+    def cancel_all(self) -> None:
+        self.loop.call_soon_threadsafe(lambda: self._cancel(set(self._jobs), False))
+
+    def pause(self) -> None:
+        """Stop the run in progress and start no new ones until `resume`; its chapters stay queued."""
+        self.paused = True
+        self.loop.call_soon_threadsafe(self._pause)
+
+    def resume(self) -> None:
+        self.paused = False
+        self.loop.call_soon_threadsafe(self._wake)
+
+    # Event loop thread
+
+    def _emit(self, job: ChapterJob) -> None:
+        event = dataclasses.replace(job)
+        for listener in list(self._listeners):
+            self.root.after(0, listener, event)
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _submit(self, novel: str, chapters: list[int], prefetch: bool) -> None:
+        for idx in chapters:
+            job = self._jobs.get((novel, idx))
+            # A cancelling job may be queued again; it does not run before its requests have returned
+            if job is not None and job.state in (QUEUED, RUNNING):
+                # Asked for by the user now, so the prefetch may no longer cancel it
+                if job.prefetch and not prefetch:
+                    job.prefetch = False
+                    self._emit(job)
+                continue
+
+            job = ChapterJob(novel, idx, prefetch=prefetch)
+            self._jobs.pop(job.key, None)
+            self._jobs[job.key] = job
+            self._emit(job)
+
+        # Forget the oldest finished jobs
+        finished = [key for key, job in self._jobs.items() if job.state not in ACTIVE_STATES]
+        for key in finished[:max(0, len(finished) - self.HISTORY)]:
+            del self._jobs[key]
+        self._wake()
+
+    def _cancel(self, keys: set[tuple[str, int]], prefetch_only: bool) -> None:
+        stop_run = False
+        for key in keys:
+            job = self._jobs.get(key)
+            if job is None or job.state not in (QUEUED, RUNNING) or (prefetch_only and not job.prefetch):
+                continue
+            stop_run |= job.state == RUNNING
+            job.state = CANCELLING if job.state == RUNNING else CANCELLED
+            self._emit(job)
+        if stop_run:
+            self._stop_run()
+
+    def _pause(self) -> None:
+        if self._running is not None:
+            self._stop_run()
+
+    def _stop_run(self) -> None:
+        # The run's other chapters go back to the queue, in their original place
+        task, batch = self._running
+        for job in batch:
+            if job.state == RUNNING:
+                job.state = QUEUED
+                self._emit(job)
+        self._stopped = True
+        task.cancel()
+
+    def _next_batch(self) -> list[ChapterJob]:
+        queued = [job for job in self._jobs.values() if job.state == QUEUED]
+        user_jobs = [job for job in queued if not job.prefetch]
+        if user_jobs:
+            novel = user_jobs[0].novel
+            return [job for job in user_jobs if job.novel == novel][:self.chapters_per_run]
+        return queued[:1]
+
+    async def _dispatch(self) -> None:
+        self._wakeup = asyncio.Event()
+        while True:
+            batch = [] if self.paused else self._next_batch()
+            if not batch:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            task = asyncio.create_task(self._run(batch))
+            self._running = (task, batch)
+            await asyncio.wait([task])
+            self._running = None
+
+            if self._stopped:
+                # Nothing the stopped run's requests return is written; waiting for them keeps
+                # a chapter queued again from being translated twice at once
+                self._stopped = False
+                await self._drain()
+                for job in batch:
+                    if job.state == CANCELLING and self._jobs.get(job.key) is job:
+                        job.state = CANCELLED
+                        self._emit(job)
+
+    async def _drain(self) -> None:
+        """Wait for every blocking call of the runs so far to return, sending new ones to a fresh executor."""
+        executor, self._executor = self._executor, ThreadPoolExecutor(thread_name_prefix="jobs-worker")
+        self.loop.set_default_executor(self._executor)
+        await asyncio.to_thread(executor.shutdown)
+
+    async def _run(self, batch: list[ChapterJob]) -> None:
+        # Jobs cancelled between the batch being picked and the run starting are left out
+        batch = [job for job in batch if job.state == QUEUED]
+        if not batch:
+            return
+        novel = batch[0].novel
+        jobs = {job.idx: job for job in batch}
+        for job in batch:
+            job.state = RUNNING
+            self._emit(job)
+
+        def on_chapter_done(idx: int, status: bool | None) -> None:
+            job = jobs.get(idx)
+            if job is None or job.state != RUNNING:
+                return
+            job.state = FAILED if status is False else DONE
+            if status is False:
+                job.error = self._failure_reason(novel, idx)
+            self._emit(job)
+
+        if self._storage is None:
+            self._storage = Storage(self.storage_path)
+        link = self._storage.get_novel_link(novel)
+        try:
+            if link is None:
+                raise ValueError(f"Novel '{novel}' not found in the catalog.")
+            await translate_chapters(api_key=self.api_key,
+                                     novel_link=link,
+                                     novel_name=novel,
+                                     chapter_idxs=list(jobs),
+                                     storage_path=self.storage_path,
+                                     on_chapter_done=on_chapter_done,
+                                     verbosity=0)
+        except asyncio.CancelledError:
+            return # The states were set by whoever stopped the run
+        except Exception as e:
+            for job in batch:
+                if job.state == RUNNING:
+                    job.state, job.error = FAILED, str(e)
+                    self._emit(job)
+            return
+
+        # Chapters the run did not report are not in the table of contents
+        for job in batch:
+            if job.state == RUNNING:
+                job.state, job.error = SKIPPED, "Not in the table of contents."
+                self._emit(job)
+
+    def _failure_reason(self, novel: str, idx: int) -> str | None:
+        for letter in self._storage.list_dead_letters(novel):
+            if letter['idx'] == idx:
+                return f"{letter['reason']}: {letter['error']}" if letter['error'] else letter['reason']
+        return None
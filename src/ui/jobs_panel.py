@@ -0,0 +1,108 @@
+import tkinter as tk
+from collections import OrderedDict
+
+from .jobs import ACTIVE_STATES, CANCELLING, FAILED, QUEUED, RUNNING, ChapterJob, JobManager
+
+class JobsPanel(tk.Frame):
+    """Status bar of the background translations, with pause/cancel controls and an expandable job list."""
+
+    def __init__(self, master, jobs: JobManager):
+        super().__init__(master, bd=1, relief=tk.SUNKEN)
+        self.manager = jobs
+        self.jobs: OrderedDict[tuple[str, int], ChapterJob] = OrderedDict()
+        self.expanded = False
+
+        self.create_widgets()
+        self.manager.subscribe(self.on_job_changed)
+        self.update_summary()
+
+    def create_widgets(self):
+        bar = tk.Frame(self)
+        bar.pack(fill=tk.X)
+        self.summary_label = tk.Label(bar, anchor="w")
+        self.summary_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.details_button = tk.Button(bar, text="Jobs ▲", command=self.toggle_details)
+        self.details_button.pack(side=tk.RIGHT, padx=2, pady=2)
+        tk.Button(bar, text="Cancel all", command=self.manager.cancel_all).pack(side=tk.RIGHT, padx=2, pady=2)
+        self.pause_button = tk.Button(bar, text="Pause", command=self.toggle_pause)
+        self.pause_button.pack(side=tk.RIGHT, padx=2, pady=2)
+
+        # Latest jobs first, shown on demand
+        self.details_frame = tk.Frame(self)
+        scrollbar = tk.Scrollbar(self.details_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self.details_frame, height=8, yscrollcommand=scrollbar.set)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        tk.Button(self.details_frame, text="Cancel selected", command=self.cancel_selected).pack(side=tk.BOTTOM, padx=5, pady=2)
+
+    def on_job_changed(self, job: ChapterJob):
+        self.jobs.pop(job.key, None)
+        self.jobs[job.key] = job
+        while len(self.jobs) > JobManager.HISTORY:
+            self.jobs.popitem(last=False)
+        self.update_summary()
+        if self.expanded:
+            self.update_details()
+
+    def update_summary(self):
+        running = [job for job in self.jobs.values() if job.state == RUNNING]
+        cancelling = sum(job.state == CANCELLING for job in self.jobs.values())
+        queued = sum(job.state == QUEUED for job in self.jobs.values())
+        failed = sum(job.state == FAILED for job in self.jobs.values())
+
+        if running:
+            chapters = ", ".join(str(job.idx) for job in running)
+            text = f"Translating {running[0].novel}: chapter(s) {chapters}"
+        elif cancelling:
+            text = f"Cancelling {cancelling} chapter(s)..."
+        elif queued:
+            text = "Paused" if self.manager.paused else "Starting..."
+        else:
+            text = "No translations in progress"
+        if queued:
+            text += f" | {queued} queued"
+        if failed:
+            text += f" | {failed} failed"
+        self.summary_label.config(text=text)
+
+    def update_details(self):
+        self.listbox.delete(0, tk.END)
+        for job in reversed(self.jobs.values()):
+            source = " (prefetch)" if job.prefetch else ""
+            error = f": {job.error}" if job.error else ""
+            self.listbox.insert(tk.END, f"{job.novel} - Chapter {job.idx}{source}  [{job.state}]{error}")
+
+    def selected_job(self) -> ChapterJob | None:
+        selection = self.listbox.curselection()
+        if not selection:
+            return None
+        return list(reversed(self.jobs.values()))[selection[0]]
+
+    def cancel_selected(self):
+        job = self.selected_job()
+        if job is not None and job.state in ACTIVE_STATES:
+            self.manager.cancel(job.novel, job.idx)
+
+    def toggle_pause(self):
+        if self.manager.paused:
+            self.manager.resume()
+            self.pause_button.config(text="Pause")
+        else:
+            self.manager.pause()
+            self.pause_button.config(text="Resume")
+        self.update_summary()
+
+    def toggle_details(self):
+        self.expanded = not self.expanded
+        if self.expanded:
+            self.update_details()
+            self.details_frame.pack(fill=tk.BOTH, expand=True)
+            self.details_button.config(text="Jobs ▼")
+        else:
+            self.details_frame.pack_forget()
+            self.details_button.config(text="Jobs ▲")
+
+    def destroy(self):
+        self.manager.unsubscribe(self.on_job_changed)
+        super().destroy()
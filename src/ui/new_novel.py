@@ -1,7 +1,7 @@
-import csv
-import os
 import tkinter as tk
 
+from translate_handler.sites import find_site, supported_sites
+
 class NewNovelUI(tk.Frame):
     def __init__(self, master, app, **kwargs):
         super().__init__(master)
@@ -31,11 +31,11 @@ class NewNovelUI(tk.Frame):
         link = self.link_entry.get().strip()
         name = self.name_entry.get().strip()
         
-        if link and name:
-            novel_catalog_filepath = os.path.join(self.storage_path, 'novels.csv')
-            with open(novel_catalog_filepath, 'a', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([name, link])
+        site = find_site(link)
+        if link and name and site is None:
+            tk.messagebox.showerror("Error", f"Unsupported novel link. Supported sites: {', '.join(supported_sites())}.")
+        elif link and name:
+            self.app.storage.add_novel(name, site.normalize_link(link))
             
             tk.messagebox.showinfo("Success", f"Novel '{name}' added successfully!")
             
@@ -0,0 +1,41 @@
+from .jobs import JobManager
+
+class ChapterPrefetcher:
+    """
+    Translates the chapters after the one being read in the background, so the
+    next chapter is ready by the time the reader gets there.
+
+    At most `count` chapters ahead are queued as prefetch jobs on the app's job
+    manager, which runs them one at a time, nearest first, after anything the user
+    asked for. Moving the reader cancels the prefetch jobs that fell out of the
+    read-ahead window, including the one in progress; chapters the user asked for
+    themselves are left alone.
+    """
+
+    def __init__(self, jobs: JobManager, count: int = 3):
+        self.jobs = jobs
+        self.count = count
+        self._queued: set[tuple[str, int]] = set()
+
+    def read_ahead(self, storage, novel: str, chapter: int) -> None:
+        """Prefetch the chapters after `chapter` of `novel` that are not translated yet."""
+        if self.count <= 0 or not self.jobs.api_key:
+            return
+
+        targets = [idx for idx in range(chapter + 1, chapter + 1 + self.count)
+                   if not storage.has_translation(novel, idx)]
+
+        # The chapter just opened may still be prefetching; it is the one the reader waits for
+        wanted = {(novel, idx) for idx in (chapter, *targets)}
+        for novel_name, idx in self._queued - wanted:
+            self.jobs.cancel(novel_name, idx, prefetch_only=True)
+        self._queued = (self._queued & wanted) | {(novel, idx) for idx in targets}
+
+        if targets:
+            self.jobs.submit(novel, targets, prefetch=True)
+
+    def cancel(self) -> None:
+        """Stop prefetching, e.g. when the reader is closed."""
+        for novel, idx in self._queued:
+            self.jobs.cancel(novel, idx, prefetch_only=True)
+        self._queued.clear()
@@ -0,0 +1,151 @@
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+from translate_handler import incremental
+
+def make_snippet(text: str, query: str, width: int = 80) -> str:
+    """The part of a paragraph around the first match of `query`, on one line."""
+    text = ' '.join(text.split())
+    position = text.lower().find(query.lower())
+    if len(text) <= width or position < 0:
+        return text[:width]
+    start = max(0, min(position - width // 3, len(text) - width))
+    return ("…" if start else "") + text[start:start + width] + ("…" if start + width < len(text) else "")
+
+class SearchUI(tk.Frame):
+    def __init__(self, master, app, novel: str | None = None, **kwargs):
+        super().__init__(master)
+        self.app = app
+        self.novel = novel
+        self.storage_path = kwargs.get('storage_path', None)
+
+        self.results: list[dict] = []
+        self.query = ""
+        self._search_job = None
+        # One thread, so every query reuses the same connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+
+        self.create_widgets()
+
+        # Chapters saved before the search index existed are indexed before the first query
+        self._executor.submit(self.app.storage.update_search_index)
+
+    def create_widgets(self):
+        tk.Label(self, text="Search", font=("Arial", 16)).pack(pady=10)
+
+        search_frame = tk.Frame(self)
+        search_frame.pack(pady=5)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.on_search_changed())
+        entry = tk.Entry(search_frame, textvariable=self.search_var, width=40)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda e: self.run_search())
+        entry.focus_set()
+
+        # Limit the search to the novel it was opened from, if any
+        self.only_novel = tk.BooleanVar(value=self.novel is not None)
+        if self.novel is not None:
+            tk.Checkbutton(search_frame, text=f"Only in {self.novel}", variable=self.only_novel,
+                           command=self.run_search).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(self, text="Search translations (English) and original text (Japanese).")
+        self.status_label.pack()
+
+        results_frame = tk.Frame(self)
+        results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        scrollbar = tk.Scrollbar(results_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(results_frame, yscrollcommand=scrollbar.set)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind("<Double-Button-1>", lambda e: self.open_result())
+        self.listbox.bind("<Return>", lambda e: self.open_result())
+
+        tk.Button(self, text="Open", command=self.open_result).pack(pady=5)
+        tk.Button(self, text="Back", command=self.go_back).pack(pady=10)
+
+    def on_search_changed(self):
+        # Wait for a pause in typing before querying
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(250, self.run_search)
+
+    def run_search(self):
+        self._search_job = None
+        query = self.search_var.get().strip()
+        novel = self.novel if self.only_novel.get() else None
+        self.query = query
+
+        def search():
+            results = self.app.storage.search(query, novel_name=novel, limit=200)
+            self.after(0, self.on_results, query, results)
+        self._executor.submit(search)
+
+    def on_results(self, query: str, results: list[dict]):
+        # Drop the results of queries typed over since
+        if query != self.query or not self.winfo_exists():
+            return
+
+        self.results = results
+        self.listbox.delete(0, tk.END)
+        for result in results:
+            language = "EN" if result['kind'] == 'translation' else "JP"
+            self.listbox.insert(tk.END, f"{result['novel']} - Chapter {result['idx']} [{language}]  "
+                                        f"{make_snippet(result['text'], query)}")
+
+        if not query:
+            self.status_label.config(text="Search translations (English) and original text (Japanese).")
+        elif not self.app.storage.search_available:
+            self.status_label.config(text="Search needs SQLite with FTS5 trigram support (3.34 or newer).")
+        else:
+            more = "+" if len(results) >= 200 else ""
+            self.status_label.config(text=f"{len(results)}{more} paragraph(s) found.")
+
+    def translation_paragraph(self, result: dict) -> int:
+        # Matches in the original text are shown at the corresponding paragraph of the translation
+        if result['kind'] == 'translation':
+            return result['paragraph']
+        if self.app.storage.get_alignment(result['novel'], result['idx']) is not None:
+            return result['paragraph'] # Aligned paragraph by paragraph
+
+        translation = self.app.storage.get_translation(result['novel'], result['idx'])
+        content = self.app.storage.get_content(result['novel'], result['idx'])
+        if not translation or not content:
+            return 0
+        source_count = len(incremental.split_paragraphs(content))
+        translated_count = len(incremental.split_paragraphs(translation))
+        return min(translated_count - 1, result['paragraph'] * translated_count // max(1, source_count))
+
+    def open_result(self):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        result = self.results[selection[0]]
+
+        self.app.show_frame(
+            __import__('ui.view_chapter', fromlist=['ViewChapterUI']).ViewChapterUI,
+            novel=result['novel'],
+            chapter=result['idx'],
+            storage_path=self.storage_path,
+            paragraph=self.translation_paragraph(result),
+            highlight=self.query if result['kind'] == 'translation' else None
+        )
+
+    def go_back(self):
+        if self.novel is not None:
+            self.app.show_frame(
+                __import__('ui.select_chapters', fromlist=['SelectChaptersUI']).SelectChaptersUI,
+                novel=self.novel,
+                storage_path=self.storage_path
+            )
+        else:
+            self.app.show_frame(
+                __import__('ui.select_novels', fromlist=['SelectNovelsUI']).SelectNovelsUI,
+                storage_path=self.storage_path
+            )
+
+    def destroy(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
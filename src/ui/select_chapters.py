@@ -1,10 +1,6 @@
-import csv
-import os
-import re
 import tkinter as tk
-import asyncio
-from threading import Thread
-from translate_handler import translate_chapters
+from .chapter_list import VirtualChapterList
+from .jobs import QUEUED
 
 class SelectChaptersUI(tk.Frame):
     def __init__(self, master, app, novel, **kwargs):
@@ -17,74 +13,36 @@ class SelectChaptersUI(tk.Frame):
             raise ValueError("Storage path must be provided in kwargs.")
         
         self.storage_path = kwargs['storage_path']
-        self.api_key = kwargs.get('api_key', os.getenv('GEMINI_API_KEY', ''))
         
-        self.chapters = self.get_chapters()
-        self.create_widgets()
-
-    def get_chapters(self) -> list[int]:
-        # Locate novel catalog
-        novel_catalog_filepath = os.path.join(self.storage_path, 'novels.csv')
-        if not os.path.exists(novel_catalog_filepath):
-            raise FileNotFoundError(f"Novel catalog not found at {novel_catalog_filepath}.")
-        
-        # Read the novel catalog to find the link for the selected novel
-        with open(novel_catalog_filepath, 'r', newline='') as file:
-            reader = csv.reader(file)
-            next(reader)
-            
-            for row in reader:
-                if row[0].strip() == self.novel:
-                    self.novel_link = row[1].strip().strip('\"')
-                    break
-            else:
-                raise ValueError(f"Novel '{self.novel}' not found in the catalog.")
-        
-        # Locate directory for the novel translations
-        novel_dir = os.path.join(self.storage_path, self.novel)
-        translation_dir = os.path.join(novel_dir, 'translation')
-        
-        # Create the directory if it doesn't exist
-        os.makedirs(novel_dir, exist_ok=True)
-        os.makedirs(translation_dir, exist_ok=True)
+        # Find the link for the selected novel
+        self.novel_link = self.app.storage.get_novel_link(self.novel)
+        if self.novel_link is None:
+            raise ValueError(f"Novel '{self.novel}' not found in the catalog.")
         
-        # Read chapter files and determine their chapter numbers
-        # Chapter files are expected to be named like "Chapter_1_translated.txt"
-        chapters: list[int] = []
-        
-        for filename in os.listdir(translation_dir):
-            match = re.match(r'Chapter_(\d+)_translated\.txt', filename)
-            if match:
-                chapter_number = int(match.group(1))
-                chapters.append(chapter_number)
-                
-        # Sort chapters in ascending order
-        chapters.sort(reverse=True)
-        return chapters
+        self._search_job = None
+        self._refresh_job = None
+        self.create_widgets()
+        self.app.jobs.subscribe(self.on_job_changed)
                 
     def create_widgets(self):
         tk.Label(self, text=f"Novel: {self.novel}", font=("Arial", 16)).pack(pady=10)
-        tk.Label(self, text="Chapters:").pack()
         
-        # Create a frame for the listbox and scrollbar
-        view_chapters_frame = tk.Frame(self)
-        view_chapters_frame.pack(pady=5)
+        # Filter the chapters by title or number as the user types
+        search_frame = tk.Frame(self)
+        search_frame.pack(pady=2)
+        tk.Label(search_frame, text="Chapters:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.on_search_changed())
+        tk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=5)
         
-        # Create a vertical scrollbar
-        scrollbar = tk.Scrollbar(view_chapters_frame, orient=tk.VERTICAL)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Only the visible rows are loaded, page by page, latest chapters first
+        self.chapter_list = VirtualChapterList(self, self.app.storage, self.novel, on_open=self.open_chapter)
+        self.chapter_list.pack(pady=5, fill=tk.BOTH, expand=True)
         
-        # Create a listbox to display chapters
-        self.listbox = tk.Listbox(view_chapters_frame, yscrollcommand=scrollbar.set, height=10)
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        for idx in self.chapters:
-            label = f"Chapter {idx}"
-            self.listbox.insert(tk.END, label)
-        
-        # Add scrollbar to the listbox
-        scrollbar.config(command=self.listbox.yview)
-        
-        tk.Button(self, text="View Chapter", command=self.view_chapter).pack(pady=5)
+        buttons_frame = tk.Frame(self)
+        buttons_frame.pack(pady=5)
+        tk.Button(buttons_frame, text="View Chapter", command=self.view_chapter).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Search", command=self.search).pack(side=tk.LEFT, padx=5)
         
         tk.Label(self, text="Enter chapter numbers to translate. Use dashes for ranges (e.g., 1 2 4-6):").pack(pady=5)
         self.chapter_entry = tk.Entry(self, width=30)
@@ -93,16 +51,31 @@ class SelectChaptersUI(tk.Frame):
         
         tk.Button(self, text="Back", command=self.go_back).pack(pady=10)
 
+    def on_search_changed(self):
+        # Wait for a pause in typing before querying
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(250, lambda: self.chapter_list.refresh(self.search_var.get()))
+
     def view_chapter(self):
-        selection = self.listbox.curselection()
-        if selection:
-            idx = self.chapters[selection[0]]
-            self.app.show_frame(
-                __import__('ui.view_chapter', fromlist=['ViewChapterUI']).ViewChapterUI,
-                novel=self.novel,
-                chapter=idx,
-                storage_path=self.storage_path
-            )
+        idx = self.chapter_list.selected_chapter()
+        if idx is not None:
+            self.open_chapter(idx)
+
+    def open_chapter(self, idx: int):
+        self.app.show_frame(
+            __import__('ui.view_chapter', fromlist=['ViewChapterUI']).ViewChapterUI,
+            novel=self.novel,
+            chapter=idx,
+            storage_path=self.storage_path
+        )
+
+    def search(self):
+        self.app.show_frame(
+            __import__('ui.search', fromlist=['SearchUI']).SearchUI,
+            novel=self.novel,
+            storage_path=self.storage_path
+        )
 
     def translate_chapters(self):
         chapter_input = self.chapter_entry.get().strip()
@@ -129,34 +102,29 @@ class SelectChaptersUI(tk.Frame):
                     tk.messagebox.showerror("Error", f"Invalid chapter number: {part}")
                     return
         
-        if not self.api_key:
+        if not self.app.jobs.api_key:
             tk.messagebox.showerror("Error", "API key is required for translation.")
             return
         
-        # Run the async translation in a background thread to avoid blocking the UI
-        def run_async_translation():
-            asyncio.run(translate_chapters(
-                novel_link=self.novel_link,
-                novel_name=self.novel,
-                chapter_idxs=chapter_idxs,
-                api_key=self.api_key,
-                storage_path=self.storage_path
-            ))
-            self.after(0, self.on_translation_complete)
-        Thread(target=run_async_translation, daemon=True).start()
-        tk.messagebox.showinfo("Info", "Translation started. This may take a while. You will be notified when it finishes.")
+        # Runs in the background; the jobs panel shows the progress of each chapter
+        self.app.jobs.submit(self.novel, chapter_idxs)
+        self.chapter_entry.delete(0, tk.END)
     
-    def on_translation_complete(self):
-        tk.messagebox.showinfo("Info", "Translation completed successfully.")
-        
-        # Only reload the chapter list if the frame is still active
-        if self.winfo_exists():
-            self.app.show_frame(
-                __import__('ui.select_chapters', fromlist=['SelectChaptersUI']).SelectChaptersUI,
-                novel=self.novel,
-                storage_path=self.storage_path,
-                api_key=self.api_key
-            )
+    def on_job_changed(self, job):
+        # Show the new states in the list, at most twice a second
+        if job.novel == self.novel and job.state != QUEUED and self._refresh_job is None:
+            self._refresh_job = self.after(500, self.refresh_list)
+
+    def refresh_list(self):
+        self._refresh_job = None
+        self.chapter_list.refresh()
+
+    def destroy(self):
+        for job in (self._search_job, self._refresh_job):
+            if job is not None:
+                self.after_cancel(job)
+        self.app.jobs.unsubscribe(self.on_job_changed)
+        super().destroy()
 
     def go_back(self):
         self.app.show_frame(
@@ -1,5 +1,3 @@
-import os
-import csv
 import tkinter as tk
 
 class SelectNovelsUI(tk.Frame):
@@ -16,21 +14,7 @@ class SelectNovelsUI(tk.Frame):
         self.create_widgets()
 
     def get_novels(self):
-        novel_catalog_filepath = os.path.join(self.storage_path, 'novels.csv')
-        
-        with open(novel_catalog_filepath, 'r', newline='') as file:
-            reader = csv.reader(file)
-            next(reader)
-            
-            novels = []
-            for row in reader:
-                if len(row) >= 2:
-                    novel_name = row[0].strip()
-                    link = row[1].strip()
-                    if novel_name and link:
-                        novels.append(novel_name)
-    
-        return novels    
+        return [novel_name for novel_name, _ in self.app.storage.list_novels()]
 
     def create_widgets(self):
         tk.Label(self, text="Select a Novel", font=("Arial", 18)).pack(pady=20)
@@ -40,6 +24,7 @@ class SelectNovelsUI(tk.Frame):
         self.listbox.pack(pady=10)
         tk.Button(self, text="View Selected Novel", command=self.select_novel).pack(pady=5)
         tk.Button(self, text="Add New Novel", command=self.add_new_novel).pack(pady=5)
+        tk.Button(self, text="Search", command=self.search).pack(pady=5)
 
     def select_novel(self):
         selection = self.listbox.curselection()
@@ -51,6 +36,12 @@ class SelectNovelsUI(tk.Frame):
                 storage_path=self.storage_path
             )
 
+    def search(self):
+        self.app.show_frame(
+            __import__('ui.search', fromlist=['SearchUI']).SearchUI,
+            storage_path=self.storage_path
+        )
+
     def add_new_novel(self):
         self.app.show_frame(
             __import__('ui.new_novel', fromlist=['NewNovelUI']).NewNovelUI,
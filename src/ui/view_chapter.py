@@ -1,10 +1,6 @@
-import asyncio
-import csv
-import os
 import tkinter as tk
-from threading import Thread
 
-from translate_handler import translate_chapters
+from .jobs import FAILED, QUEUED, RUNNING, SKIPPED
 
 class ViewChapterUI(tk.Frame):
     def __init__(self, master, app, novel: str, chapter: int, **kwargs):
@@ -13,70 +9,122 @@ class ViewChapterUI(tk.Frame):
         self.novel = novel
         self.chapter = chapter
         self.storage_path = kwargs.get('storage_path', None)
-        self.api_key = kwargs.get('api_key', os.getenv('GEMINI_API_KEY', ''))
         
-        self.chapter_content = self.load_chapter_content()
-        self.translated = self.chapter_content is not None
-        self.is_translating = False
-        if self.chapter_content is None:
-            self.chapter_content = "This chapter has not been translated yet. Please request a translation."
+        self.translated = False
+        self.requested: set[int] = set()
+        
+        # Paragraph to scroll to once the chapter is shown, e.g. a search result
+        self.jump = (chapter, kwargs['paragraph'], kwargs.get('highlight')) if kwargs.get('paragraph') is not None else None
         
         self.create_widgets()
         self.add_key_bindings()
+        self.app.jobs.subscribe(self.on_job_changed)
+        self.show_chapter(chapter)
 
-    def load_chapter_content(self) -> str | None:
-        # Placeholder: Load chapter content from a file or database
-        chapter_file_path = os.path.join(self.storage_path,
-                                         self.novel,
-                                         "translation",
-                                         f"chapter_{self.chapter}_translated.txt")
-        
-        content_txt = None
-        if not os.path.exists(chapter_file_path):
-            content_txt = None
+    def show_chapter(self, chapter: int):
+        # The widgets are reused; only the header and the text change
+        self.chapter = chapter
+        self.header_label.config(text=f"{self.novel} - Chapter {self.chapter}")
+        
+        hit, content = self.app.chapters.peek(self.novel, chapter)
+        if hit:
+            self.render(content)
         else:
-            with open(chapter_file_path, 'r', encoding='utf-8') as file:
-                content_txt = file.read().strip()
+            self.render_text("Loading...", translated=True)
+            self.app.chapters.load(self.novel, chapter,
+                                   lambda content: self.app.root.after(0, self.on_chapter_loaded, chapter, content))
+        
+        # Keep the neighbouring chapters ready for paging
+        neighbours = [chapter + 1, chapter - 1, chapter + 2, chapter - 2]
+        self.app.chapters.preload(self.novel, neighbours)
+        self.app.prefetcher.read_ahead(self.app.storage, self.novel, chapter)
+
+    def on_chapter_loaded(self, chapter: int, content: str | None):
+        # Ignore chapters the reader already paged away from
+        if self.winfo_exists() and chapter == self.chapter:
+            self.render(content)
+
+    def render(self, content: str | None):
+        if content is None:
+            self.render_text("This chapter has not been translated yet. Please request a translation.", translated=False)
+        else:
+            self.render_text(content, translated=True)
+            if self.jump and self.jump[0] == self.chapter:
+                self.show_paragraph(*self.jump[1:])
+                self.jump = None
+
+    def show_paragraph(self, paragraph: int, highlight: str | None = None):
+        # Paragraphs are the non-empty lines, the title being the first
+        lines = self.text_widget.get("1.0", tk.END).split('\n')
+        numbers = [number for number, line in enumerate(lines, start=1) if line.strip()]
+        if not numbers:
+            return
+        line = numbers[min(paragraph, len(numbers) - 1)]
+        
+        self.text_widget.tag_configure("match", background="#ffff66")
+        start, end = f"{line}.0", f"{line}.end"
+        if highlight:
+            # Mark each occurrence of the search text in the paragraph
+            index = start
+            while True:
+                length = tk.IntVar()
+                index = self.text_widget.search(highlight, index, stopindex=end, nocase=True, count=length)
+                if not index:
+                    break
+                self.text_widget.tag_add("match", index, f"{index}+{length.get()}c")
+                index = f"{index}+{length.get()}c"
+        else:
+            self.text_widget.tag_add("match", start, end)
         
-        # Split the content into title and body
-        if content_txt:
-            title_txt = content_txt.split('\n')[0] if content_txt else "No Title"
-            story_txt = content_txt[len(title_txt):].strip() if title_txt else content_txt
-            
-            content_txt = f"{title_txt}\n\n{story_txt}"
+        self.text_widget.see(end)
+        self.text_widget.yview(f"{max(1, line - 2)}.0")
+
+    def render_text(self, text: str, translated: bool):
+        self.translated = translated
+        self.text_widget.config(state=tk.NORMAL)
+        self.text_widget.delete("1.0", tk.END)
+        self.text_widget.insert(tk.END, text)
+        self.text_widget.tag_add("title", "1.0", "1.end")
+        self.text_widget.config(state=tk.DISABLED)  # Make the text widget read-only
+        self.text_widget.yview_moveto(0)
         
-        return content_txt
+        # Offer a translation only for untranslated chapters
+        if translated:
+            self.translate_button.pack_forget()
+            self.master.unbind("<Return>")
+        else:
+            self.translate_button.config(text="Translate", state=tk.NORMAL)
+            self.translate_button.pack(padx=5, before=self.text_frame)
+            self.master.bind("<Return>", lambda e: self.request_translation())
 
     def create_widgets(self):
         # Create frame for chapter header
         header_frame = tk.Frame(self)
         header_frame.pack(fill=tk.X, padx=10, pady=5)
-        header_label = tk.Label(header_frame, text=f"{self.novel} - Chapter {self.chapter}",
-                                font=("Arial", 16, "bold"),
-                                bg="#0000ff", fg="#333")
-        header_label.pack(fill=tk.X, padx=10, pady=5)
-        header_label.config(bg="#0000ff", fg="#ffffff")  # Set background and foreground colors
+        self.header_label = tk.Label(header_frame, text=f"{self.novel} - Chapter {self.chapter}",
+                                     font=("Arial", 16, "bold"),
+                                     bg="#0000ff", fg="#333")
+        self.header_label.pack(fill=tk.X, padx=10, pady=5)
+        self.header_label.config(bg="#0000ff", fg="#ffffff")  # Set background and foreground colors
         
-        if not self.translated:
-            tk.Button(self, text="Translate", command=self.request_translation).pack(padx=5)
+        # Shown only for untranslated chapters
+        self.translate_button = tk.Button(self, text="Translate", command=self.request_translation)
         
         # Create a text widget to display the chapter content
-        text_frame = tk.Frame(self)
-        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.text_frame = tk.Frame(self)
+        self.text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Create vertical scrollbar
-        scrollbar = tk.Scrollbar(text_frame)
+        scrollbar = tk.Scrollbar(self.text_frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Create text widget with scrollbar
-        self.text_widget = tk.Text(text_frame,
+        self.text_widget = tk.Text(self.text_frame,
                                    wrap=tk.WORD,
                                    font=("Arial", 12),
                                    padx=10, pady=10,
                                    bg="#ffffff", fg="#333",
                                    yscrollcommand=scrollbar.set)
-        self.text_widget.insert(tk.END, self.chapter_content)
-        self.text_widget.config(state=tk.DISABLED)  # Make the text widget read-only
         self.text_widget.pack(fill=tk.BOTH, expand=True)
         
         # Configure scrollbar to work with the text widget
@@ -84,7 +132,6 @@ class ViewChapterUI(tk.Frame):
         
         # Add a title tag for the chapter title
         self.text_widget.tag_configure("title", font=("Arial", 12, "bold"), foreground="#000000")
-        self.text_widget.tag_add("title", "1.0", "1.end")
         
         # Create frame for navigation buttons
         nav_frame = tk.Frame(self)
@@ -103,82 +150,50 @@ class ViewChapterUI(tk.Frame):
         self.master.bind("<Up>", lambda e: self.text_widget.yview_scroll(-1, "units"))
         self.master.bind("<Down>", lambda e: self.text_widget.yview_scroll(1, "units"))
         
-        # Hotkey for translation request
-        if not self.translated:
-            self.master.bind("<Return>", lambda e: self.request_translation())
-        
     def request_translation(self):
-        if self.is_translating:
-            tk.messagebox.showinfo("Info", "Translation is already in progress. Please wait.")
-            return
-        
-        if not self.api_key:
+        if not self.app.jobs.api_key:
             tk.messagebox.showerror("Error", "API key is required for translation.")
             return
                 
-        novel_catalog_path = os.path.join(self.storage_path, "novels.csv")
-
-        # Read the novel catalog to find the link for the selected novel
-        link = None
-        with open(novel_catalog_path, 'r', newline='') as file:
-            reader = csv.reader(file)
-            next(reader)
-            
-            for row in reader:
-                if row[0].strip() == self.novel:
-                    link = row[1].strip().strip('\"')
-                    break
-            else:
-                tk.messagebox.showerror("Error", f"Novel '{self.novel}' not found in the catalog.")
-                return
-        
-        # Run the async translation in a background thread to avoid blocking the UI
-        def run_async_translation():
-            asyncio.run(translate_chapters(
-                novel_link=link,
-                novel_name=self.novel,
-                chapter_idxs=[ self.chapter ],
-                api_key=self.api_key,
-                storage_path=self.storage_path
-            ))
-            self.after(0, self.on_translation_complete)
-            
-        Thread(target=run_async_translation, daemon=True).start()
-        tk.messagebox.showinfo("Info", "Translation started. This may take a while. You will be notified when it finishes.")
+        # Find the link for the selected novel
+        link = self.app.storage.get_novel_link(self.novel)
+        if link is None:
+            tk.messagebox.showerror("Error", f"Novel '{self.novel}' not found in the catalog.")
+            return
+        
+        # Runs in the background; the jobs panel shows its progress and the chapter is shown once it is done
+        self.requested.add(self.chapter)
+        self.app.jobs.submit(self.novel, [self.chapter])
     
-    def on_translation_complete(self):
-        tk.messagebox.showinfo("Info", "Translation completed successfully.")
-        
-        # Only reload the current chapter if the frame is still active
-        if self.winfo_exists():
-            self.app.show_frame(
-                __import__('ui.view_chapter', fromlist=['ViewChapterUI']).ViewChapterUI,
-                novel=self.novel,
-                chapter=self.chapter,
-                storage_path=self.storage_path
-            )
+    def on_job_changed(self, job):
+        if job.novel != self.novel or not self.winfo_exists():
+            return
+        
+        if job.idx == self.chapter and not self.translated:
+            labels = {QUEUED: "Queued...", RUNNING: "Translating..."}
+            self.translate_button.config(text=labels.get(job.state, "Translate"),
+                                         state=tk.DISABLED if job.state in labels else tk.NORMAL)
+        
+        # Report failures of the translations asked for here
+        if job.idx in self.requested and job.state not in (QUEUED, RUNNING):
+            self.requested.discard(job.idx)
+            if job.state in (FAILED, SKIPPED):
+                tk.messagebox.showerror("Error", f"Chapter {job.idx} could not be translated: {job.error or job.state}")
+
+    def reload(self):
+        self.show_chapter(self.chapter)
 
     def go_previous(self):
         prev_chapter = self.chapter - 1
-        # Placeholder: check if next chapter is translated, if not, translate it
         if prev_chapter > 0:
-            self.app.show_frame(
-                __import__('ui.view_chapter', fromlist=['ViewChapterUI']).ViewChapterUI,
-                novel=self.novel,
-                chapter=prev_chapter,
-                storage_path=self.storage_path
-            )
+            self.show_chapter(prev_chapter)
 
     def go_next(self):
-        next_chapter = self.chapter + 1
-        self.app.show_frame(
-            __import__('ui.view_chapter', fromlist=['ViewChapterUI']).ViewChapterUI,
-            novel=self.novel,
-            chapter=next_chapter,
-            storage_path=self.storage_path
-        )
+        self.show_chapter(self.chapter + 1)
         
     def go_back(self):
+        # Leaving the reader, the upcoming chapters are no longer needed
+        self.app.prefetcher.cancel()
         self.app.show_frame(
             __import__('ui.select_chapters', fromlist=['SelectChaptersUI']).SelectChaptersUI,
             novel=self.novel,
@@ -194,4 +209,5 @@ class ViewChapterUI(tk.Frame):
         self.master.unbind("<Down>")
         self.master.unbind("<Return>")
         
+        self.app.jobs.unsubscribe(self.on_job_changed)
         super().destroy()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+
+from google.genai import errors
+
+from translate_handler import Storage, bulk
+from translate_handler.batch_api import FakeBatchBackend
+from translate_handler.retry import GeminiError
+
+NOVEL_LINK = "https://ncode.syosetu.com/n0000aa/"
+
+def translate_offline(monkeypatch, tmp_path, backend: FakeBatchBackend, chapters: list[int]) -> dict:
+    async def scrape_job(session, storage, job, *args, **kwargs):
+        job.content = f"第{job.idx}話\n\n本文です。"
+        storage.put_content(job.novel_name, job.idx, job.content)
+        return True
+
+    monkeypatch.setattr(bulk, "scrape_job", scrape_job)
+    return asyncio.run(bulk.translate_bulk("key", NOVEL_LINK, "novel",
+                                           chapter_idxs=chapters,
+                                           storage_path=str(tmp_path),
+                                           backend=backend,
+                                           chapters_per_job=2,
+                                           poll_interval=0,
+                                           toc_max_age=None,
+                                           translation_cache_mb=1,
+                                           verbosity=0))
+
+def test_bulk_translation_submits_polls_and_ingests_offline(monkeypatch, tmp_path):
+    backend = FakeBatchBackend(translate=lambda prompt: "Chapter\n\nTranslated.", polls=2, fail_keys={"2"})
+    statuses = translate_offline(monkeypatch, tmp_path, backend, [1, 2, 3])
+
+    assert statuses == {1: True, 2: False, 3: True}
+    assert len(backend.jobs) == 2
+    assert all(job["polls"] == 3 for job in backend.jobs.values())
+
+    storage = Storage(str(tmp_path))
+    assert storage.get_translation("novel", 1) == "Chapter\n\nTranslated."
+    assert storage.get_alignment("novel", 3) is not None
+    assert not storage.has_translation("novel", 2)
+    assert [letter['idx'] for letter in storage.list_dead_letters("novel")] == [2]
+    assert storage.list_batch_jobs("novel") == []
+
+def test_bulk_translation_serves_cached_chapters_without_submitting(monkeypatch, tmp_path):
+    translate_offline(monkeypatch, tmp_path, FakeBatchBackend(translate=lambda prompt: "Translated."), [1])
+
+    backend = FakeBatchBackend()
+    statuses = translate_offline(monkeypatch, tmp_path, backend, [1])
+    assert statuses == {1: True}
+    assert backend.jobs == {}
+
+class FailingPollBackend(FakeBatchBackend):
+    """Fails the first `failures` polls with the given status code, as `RetryPolicy.call` reports it after giving up."""
+
+    def __init__(self, code: int, failures: int):
+        super().__init__(translate=lambda prompt: "Translated.")
+        self.code, self.failures = code, failures
+
+    def poll(self, name):
+        if self.failures:
+            self.failures -= 1
+            error = errors.APIError(self.code, {"error": {"code": self.code, "message": "failed"}})
+            raise GeminiError(f"Gemini request failed: {error}") from error
+        return super().poll(name)
+
+def test_permanent_poll_errors_fail_the_job(monkeypatch, tmp_path):
+    statuses = translate_offline(monkeypatch, tmp_path, FailingPollBackend(404, failures=1), [1, 2])
+
+    assert statuses == {1: False, 2: False}
+    storage = Storage(str(tmp_path))
+    assert [letter['idx'] for letter in storage.list_dead_letters("novel")] == [1, 2]
+    assert storage.list_batch_jobs("novel") == []
+
+def test_transient_poll_errors_keep_the_job_pending(monkeypatch, tmp_path):
+    statuses = translate_offline(monkeypatch, tmp_path, FailingPollBackend(503, failures=2), [1])
+    assert statuses == {1: True}
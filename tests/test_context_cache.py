@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from translate_handler import context_cache
+from translate_handler.context_cache import ContextCache
+from translate_handler.gemini_client import GeminiClient
+
+class FakeCaches:
+    def __init__(self, failures: list[int]):
+        self.failures = failures # Status codes of the next failed creations
+        self.created = 0
+
+    def create(self, model, config):
+        if self.failures:
+            code = self.failures.pop(0)
+            raise errors.APIError(code, {"error": {"code": code, "message": "failed"}})
+        self.created += 1
+        return SimpleNamespace(name=f"cachedContents/{self.created}")
+
+    def delete(self, name):
+        pass
+
+@pytest.fixture(autouse=True)
+def entries(monkeypatch):
+    monkeypatch.setattr(context_cache, "_entries", {})
+
+def endpoint(failures: list[int]) -> SimpleNamespace:
+    return SimpleNamespace(request_limit_key="key/model", model="model",
+                           client=SimpleNamespace(caches=FakeCaches(failures)))
+
+@pytest.mark.parametrize("code", [429, 500, 503])
+def test_transient_errors_retry_creation_on_the_next_request(code):
+    cache, target = ContextCache(ttl=3600), endpoint([code])
+    assert cache.get(target, "novel", "instruction", tokens=5000) is None
+    assert cache.get(target, "novel", "instruction", tokens=5000) == "cachedContents/1"
+
+def test_rejected_instructions_are_sent_inline_until_the_ttl():
+    cache, target = ContextCache(ttl=3600), endpoint([400])
+    assert cache.get(target, "novel", "instruction", tokens=5000) is None
+    assert cache.get(target, "novel", "instruction", tokens=5000) is None
+    assert target.client.caches.created == 0
+
+def test_instructions_below_the_minimum_size_are_not_cached():
+    cache, target = ContextCache(ttl=3600), endpoint([])
+    assert cache.get(target, "novel", "instruction", tokens=100) is None
+    assert target.client.caches.created == 0
+
+def test_glossary_instructions_reach_the_minimum_cacheable_size():
+    # 200 ruby terms as build_glossary lists them, e.g. "魔導 (read まどう)"
+    kanji, kana = "魔導剣聖王騎士竜帝国神殿森都姫", "あいうえおかきくけこさしすせそたちつてと"
+    glossary = [f"{kanji[n % 15]}{kanji[n // 15]} (read {kana[n % 20]}{kana[n * 3 % 20]}{kana[n // 20]})" for n in range(200)]
+    instruction = GeminiClient.system_instruction(glossary)
+
+    assert GeminiClient.estimate_tokens("", instruction) >= context_cache._DEFAULT_MIN_TOKENS
+    assert GeminiClient.estimate_tokens("", GeminiClient.system_instruction()) < context_cache._DEFAULT_MIN_TOKENS
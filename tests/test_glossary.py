@@ -0,0 +1,42 @@
+from collections import Counter
+
+import pytest
+
+from translate_handler import Storage
+from translate_handler.glossary import build_glossary, extract_ruby
+
+@pytest.mark.parametrize("content, terms", [
+    ("魔王【まおう】が来た。魔王【まおう】だ。", {("魔王", "まおう"): 2}),
+    # Hiragana and punctuation before the base belong to the sentence
+    ("その魔導具【まどうぐ】を、聖剣【エクスカリバー】で", {("魔導具", "まどうぐ"): 1, ("聖剣", "エクスカリバー"): 1}),
+    # Kanji before the base cannot be told apart from it once rendered
+    ("大魔王【まおう】", {("大魔王", "まおう"): 1}),
+    # Emphasis dots (傍点) are not readings
+    ("本当【・・】に、絶対【﹅﹅】だ", {}),
+    # Neither are readings repeating the base, or empty ones
+    ("ＡＩ【ＡＩ】と剣【 】", {}),
+    ("Ｓ級【えすきゅう】", {("Ｓ級", "えすきゅう"): 1}),
+])
+def test_extract_ruby(content, terms):
+    assert extract_ruby(content) == Counter(terms)
+
+def test_build_glossary_keeps_the_dominant_reading_of_each_term(tmp_path):
+    storage = Storage(str(tmp_path))
+    storage.add_novel("novel", "https://ncode.syosetu.com/n0000aa/")
+    chapters = ["魔王【まおう】と勇者【ゆうしゃ】", "魔王【サタン】と勇者【ゆうしゃ】",
+                "魔王【まおう】", "魔王【サタン】", "魔王【まおう】"]
+    for idx, content in enumerate(chapters, start=1):
+        storage.put_content("novel", idx, content)
+
+    assert build_glossary(storage, "novel", verbosity=0) == ["勇者 (read ゆうしゃ)", "魔王 (read まおう)"]
+    assert build_glossary(storage, "novel", max_terms=1, verbosity=0) == ["魔王 (read まおう)"]
+
+def test_build_glossary_prefers_hand_written_entries(tmp_path):
+    storage = Storage(str(tmp_path))
+    storage.add_novel("novel", "https://ncode.syosetu.com/n0000aa/")
+    for idx in (1, 2):
+        storage.put_content("novel", idx, "魔王【まおう】と勇者【ゆうしゃ】")
+    (tmp_path / "novel").mkdir()
+    (tmp_path / "novel" / "glossary.txt").write_text("# Names\n魔王 = Demon Lord\n", encoding='utf-8')
+
+    assert build_glossary(storage, "novel", verbosity=0) == ["魔王 = Demon Lord", "勇者 (read ゆうしゃ)"]
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+from translate_handler import Storage
+from ui import jobs
+from ui.jobs import CANCELLED, CANCELLING, RUNNING, JobManager
+
+class Root:
+    """Stands in for Tk, calling listeners right away."""
+    def after(self, delay, callback, *args):
+        callback(*args)
+
+def wait_for(condition, timeout: float = 5) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+def test_cancelled_chapter_stays_cancelling_until_its_request_returns(monkeypatch, tmp_path):
+    Storage(str(tmp_path)).add_novel("novel", "https://ncode.syosetu.com/n0000aa")
+    release = threading.Event()
+    written = []
+
+    async def translate_chapters(chapter_idxs, on_chapter_done, **kwargs):
+        await asyncio.to_thread(release.wait) # A Gemini request, which cannot be interrupted
+        written.extend(chapter_idxs)
+        for idx in chapter_idxs:
+            on_chapter_done(idx, True)
+    monkeypatch.setattr(jobs, "translate_chapters", translate_chapters)
+
+    states = []
+    manager = JobManager(Root(), "key", str(tmp_path))
+    manager.subscribe(lambda job: states.append((job.idx, job.state)))
+    manager.submit("novel", [1])
+    wait_for(lambda: (1, RUNNING) in states)
+
+    manager.cancel("novel", 1)
+    manager.submit("novel", [2])
+    wait_for(lambda: (1, CANCELLING) in states)
+    time.sleep(0.1)
+    assert (2, RUNNING) not in states # No run starts while the cancelled request is in flight
+
+    release.set()
+    wait_for(lambda: (1, CANCELLED) in states and (2, RUNNING) in states)
+    assert states.index((1, CANCELLED)) < states.index((2, RUNNING))
+    assert 1 not in written
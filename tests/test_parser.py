@@ -0,0 +1,54 @@
+import glob
+import os
+
+import lxml.html
+import pytest
+
+from benchmark_parser import parse_html_reference
+from translate_handler.sites import SiteAdapter, syosetu
+from translate_handler.sites.base import element_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+SERIALIZED_PAGES = sorted(glob.glob(os.path.join(FIXTURES, "syosetu", "*.html")))
+
+@pytest.mark.parametrize("path", SERIALIZED_PAGES, ids=os.path.basename)
+def test_extractor_matches_the_reference_parser(path):
+    page = read(path)
+    assert syosetu.parse_chapter_page(page) == parse_html_reference(page)
+
+@pytest.mark.parametrize("declaration", ['<?xml version="1.0" encoding="UTF-8"?>', '<?xml version="1.0" encoding="Shift_JIS"?>'])
+def test_xml_declaration_does_not_change_the_extracted_text(declaration):
+    # lxml refuses a str carrying an encoding declaration; the page text is already decoded whatever it declares
+    page = read(os.path.join(FIXTURES, "syosetu", "ruby.html"))
+    assert syosetu.parse_chapter_page(f"{declaration}\n{page}") == syosetu.parse_chapter_page(page)
+
+def test_short_story_title_is_extracted():
+    # The reference parser predates short stories, whose title has another modifier class
+    page = read(os.path.join(FIXTURES, "syosetu_tanpen", "short_story.html"))
+    assert syosetu.parse_chapter_page(page) == "雨の日の約束\n\n雨が降っていた。\n\n傘 &amp; 長靴。"
+
+@pytest.mark.parametrize("markup, text", [
+    # Kakuyomu: <rb> bases, full-width parentheses
+    ("<p><ruby><rb>魔王</rb><rp>（</rp><rt>まおう</rt><rp>）</rp></ruby>と勇者</p>", "魔王【まおう】と勇者"),
+    ("<p><ruby>傍点<rt>・・</rt></ruby>&amp;<!-- note -->続き</p>", "傍点【・・】&続き"),
+])
+def test_element_text_renders_any_ruby(markup, text):
+    assert element_text(lxml.html.fragment_fromstring(markup)) == text
+
+def test_element_text_strict_only_renders_syosetu_ruby():
+    paragraph = lxml.html.fragment_fromstring("<p><ruby>魔王<rp>(</rp><rt>まおう</rt><rp>)</rp></ruby>と"
+                                              "<ruby><rb>勇者</rb><rt>ゆうしゃ</rt></ruby> &amp;</p>")
+    assert element_text(paragraph, escape=True, strict=True) == "魔王【まおう】と勇者ゆうしゃ &amp;"
+
+def test_site_adapters_must_implement_toc_and_chapter_parsing():
+    class Incomplete(SiteAdapter):
+        def parse_chapter(self, content: str) -> str | None:
+            return content
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from translate_handler import Storage, pipeline
+from translate_handler.gemini_client import GeminiClient
+
+@pytest.fixture
+def storage(tmp_path):
+    return Storage(str(tmp_path))
+
+def run_pipeline(monkeypatch, storage, chapters: list[int], **options) -> list:
+    async def scrape_chapter(session, storage, job, *args, **kwargs):
+        job.content = "あ" * chapters[job.idx - 1]
+        return True
+
+    async def translate_batch(client, storage, batch, **kwargs):
+        await asyncio.sleep(0.02) # Slow enough for the other workers to pack sentinels into their batches
+        return [True] * len(batch)
+
+    monkeypatch.setattr(pipeline, "scrape_job", scrape_chapter)
+    monkeypatch.setattr(pipeline, "_translate_batch", translate_batch)
+
+    jobs = [pipeline.ChapterJob("novel", idx, url=f"https://ncode.syosetu.com/n1/{idx}/")
+            for idx in range(1, len(chapters) + 1)]
+    asyncio.run(asyncio.wait_for(pipeline.run_pipeline(None, storage, GeminiClient("key"), None, jobs, verbosity=0, **options), 5))
+    return jobs
+
+@pytest.mark.parametrize("translate_workers", [1, 2, 3, 4])
+@pytest.mark.parametrize("chapters", [[400] * 4, [300] * 7, [900, 100, 100, 900, 100]])
+def test_packed_batches_keep_every_shutdown_sentinel(monkeypatch, storage, translate_workers, chapters):
+    jobs = run_pipeline(monkeypatch, storage, chapters,
+                        scrape_workers=4, translate_workers=translate_workers, batch_tokens=1200)
+    assert [job.status for job in jobs] == [True] * len(chapters)
+
+def test_unbatched_run_translates_every_chapter(monkeypatch, storage):
+    done = []
+    jobs = run_pipeline(monkeypatch, storage, [100] * 5, translate_workers=2, on_done=lambda job: done.append(job.idx))
+    assert sorted(done) == [1, 2, 3, 4, 5]
+    assert all(job.status for job in jobs)
@@ -0,0 +1,66 @@
+import asyncio
+
+from translate_handler.scraper import ScraperSession
+
+class StubServer:
+    """Minimal keep-alive HTTP/1.1 server counting connections and requests in flight."""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def __aenter__(self) -> "StubServer":
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n") # Requests are bodyless GETs
+                self.requests += 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(self.delay)
+                self.in_flight -= 1
+
+                body = b"<html>chapter</html>"
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def test_sequential_requests_reuse_one_connection():
+    async def run():
+        async with StubServer() as server, ScraperSession(max_connections=4) as session:
+            for n in range(5):
+                response = await session.get(f"{server.url}/n1/{n}/")
+                assert response.text == "<html>chapter</html>"
+            return server
+
+    server = asyncio.run(run())
+    assert server.requests == 5
+    assert server.connections == 1
+
+def test_concurrent_requests_are_bounded_by_the_pool():
+    async def run():
+        async with StubServer() as server, ScraperSession(max_connections=3) as session:
+            responses = await asyncio.gather(*(session.get(f"{server.url}/n1/{n}/") for n in range(20)))
+            assert all(response.status_code == 200 for response in responses)
+            return server
+
+    server = asyncio.run(run())
+    assert server.requests == 20
+    assert server.max_in_flight == 3 # Saturated, but never above the limit
+    assert server.connections == 3 # Each connection served several requests
@@ -0,0 +1,59 @@
+from translate_handler import Storage
+
+def write_file_layout(path) -> None:
+    (path / "novels.csv").write_text("name,link\nnovel,https://ncode.syosetu.com/n0000aa/\n", encoding='utf-8')
+    (path / "novel" / "translation").mkdir(parents=True)
+    (path / "novel" / "translation" / "Chapter_1_translated.txt").write_text("Chapter 1\n\nText.", encoding='utf-8')
+
+def test_opening_a_storage_directory_does_not_import_it(tmp_path):
+    write_file_layout(tmp_path)
+    assert Storage(str(tmp_path)).list_novels() == []
+
+def test_migrate_imports_the_file_layout_once(tmp_path):
+    write_file_layout(tmp_path)
+    storage = Storage(str(tmp_path))
+    assert storage.migrate(verbosity=0) == 1
+    assert storage.list_novels() == [("novel", "https://ncode.syosetu.com/n0000aa/")]
+    assert storage.get_translation("novel", 1) == "Chapter 1\n\nText."
+
+    storage.put_translation("novel", 1, "Chapter 1\n\nEdited.")
+    assert storage.migrate(verbosity=0) == 0
+    assert storage.get_translation("novel", 1) == "Chapter 1\n\nEdited."
+
+def page(idx: int) -> dict:
+    html = f"<html><nav>{'目次 ' * 200}</nav><p>第{idx}話 {'本文' * idx}</p><footer>{'広告 ' * 200}</footer></html>"
+    return {'url': f"https://ncode.syosetu.com/n0000aa/{idx}/", 'html': html, 'fetched_at': 0.0}
+
+def test_compact_from_another_process_does_not_strand_cached_dictionaries(tmp_path):
+    writer = Storage(str(tmp_path))
+    writer.add_novel("novel", "https://ncode.syosetu.com/n0000aa/")
+    for idx in range(1, 41):
+        writer.put_page("novel", idx, page(idx))
+    trained = writer._dictionary_id(writer._novel_id("novel"), 'html')
+    assert trained is not None
+
+    # Another process retrains and drops the dictionary the writer has cached
+    compactor = Storage(str(tmp_path))
+    compactor.compact("novel", vacuum=False, verbosity=0)
+    assert compactor._connection().execute("SELECT 1 FROM dictionaries WHERE id = ?", (trained,)).fetchone() is None
+    assert compactor.get_page("novel", 1)['html'] == page(1)['html']
+
+    writer.put_page("novel", 41, page(41))
+    assert writer._dictionary_id(writer._novel_id("novel"), 'html') != trained
+    assert compactor.get_page("novel", 41)['html'] == page(41)['html']
+    assert writer.get_page("novel", 40)['html'] == page(40)['html']
+
+def test_training_recompresses_only_untrained_rows(tmp_path):
+    storage = Storage(str(tmp_path))
+    storage.add_novel("novel", "https://ncode.syosetu.com/n0000aa/")
+    for idx in range(1, 16):
+        storage.put_page("novel", idx, page(idx))
+    novel_id = storage._novel_id("novel")
+    assert storage._dictionary_id(novel_id, 'html') is None
+
+    storage.put_page("novel", 16, page(16)) # Enough samples to train on
+    dict_id = storage._dictionary_id(novel_id, 'html')
+    rows = storage._connection().execute("SELECT dict_id FROM pages WHERE novel_id = ?", (novel_id,)).fetchall()
+    assert dict_id is not None and {row['dict_id'] for row in rows} == {dict_id}
+    assert storage._train(novel_id, 'html') == 0
+    assert all(storage.get_page("novel", idx)['html'] == page(idx)['html'] for idx in range(1, 17))
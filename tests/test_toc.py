@@ -0,0 +1,16 @@
+import asyncio
+
+from translate_handler import toc
+from translate_handler.sites import TocEntry
+
+def test_failed_crawl_falls_back_only_to_the_same_novel(monkeypatch, tmp_path):
+    async def fetch_toc(session, novel_link, verbosity=1):
+        return None
+    monkeypatch.setattr(toc, "fetch_toc", fetch_toc)
+
+    path = str(tmp_path / "toc.json")
+    toc.save_toc(path, "https://ncode.syosetu.com/n0000aa", [TocEntry(idx=1, title="第一話")])
+
+    stale = asyncio.run(toc.sync_toc(None, "https://ncode.syosetu.com/n0000aa", path, verbosity=0))
+    assert [entry.idx for entry in stale['chapters']] == [1]
+    assert asyncio.run(toc.sync_toc(None, "https://ncode.syosetu.com/n1111bb", path, verbosity=0)) is None
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from google.genai import errors
+
+from translate_handler import Storage, pipeline
+from translate_handler.gemini_client import GeminiClient
+from translate_handler.translation_cache import TranslationCache
+
+@pytest.fixture
+def client(monkeypatch):
+    client = GeminiClient("key", models=["preferred-model", "fallback-model"], context_cache_ttl=0)
+
+    def send(endpoint, prompt, config, tokens, stream):
+        if endpoint.model == "preferred-model":
+            raise errors.APIError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+        return "Chapter 1\n\nTranslated by the fallback."
+    monkeypatch.setattr(client, "_send", send)
+    return client
+
+def test_translation_is_cached_under_the_model_that_answered(client, tmp_path):
+    storage = Storage(str(tmp_path))
+    storage.add_novel("novel", "https://ncode.syosetu.com/n1")
+    cache = TranslationCache(str(tmp_path / "cache"))
+    job = pipeline.ChapterJob("novel", 1, url="https://ncode.syosetu.com/n1/1/", content="第一話\n\n本文")
+
+    assert asyncio.run(pipeline._translate_chapter(client, storage, job, cache, verbosity=0))
+
+    assert cache.get(client.cache_key(job.content, "fallback-model")) == "Chapter 1\n\nTranslated by the fallback."
+    assert cache.get(client.cache_key(job.content, "preferred-model")) is None
+
+    # Served from the cache, whichever of the client's models produced it
+    assert pipeline._load_cached_translation(storage, job, client, cache, verbosity=0)
+
+def test_answered_by_collects_the_answering_model(client):
+    answered_by = set()
+    client.translate_chapter("本文", answered_by=answered_by)
+    assert answered_by == {"fallback-model"}
+
+def test_editing_the_glossary_invalidates_cached_translations(client, tmp_path):
+    storage = Storage(str(tmp_path))
+    storage.add_novel("novel", "https://ncode.syosetu.com/n1")
+    cache = TranslationCache(str(tmp_path / "cache"))
+    job = pipeline.ChapterJob("novel", 1, url="https://ncode.syosetu.com/n1/1/", content="第一話\n\n魔王が来た")
+
+    client.set_glossary("novel", ["魔王 = Demon King"])
+    assert asyncio.run(pipeline._translate_chapter(client, storage, job, cache, verbosity=0))
+    assert pipeline._load_cached_translation(storage, job, client, cache, verbosity=0)
+
+    client.set_glossary("novel", ["魔王 = Dark Lord"])
+    assert not pipeline._load_cached_translation(storage, job, client, cache, verbosity=0)